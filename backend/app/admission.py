@@ -0,0 +1,228 @@
+"""
+Admission control for LLM generations.
+
+At most max_concurrency generations run at once; other requests wait in a
+bounded queue. Waiting requests are ordered by priority, then served
+round-robin across users (one slot per user in turn, FIFO within a user),
+so a user sending many questions cannot starve the others.
+
+Every request carries a deadline. A request is rejected right away when the
+queue is full or when the estimated queueing plus generation time already
+exceeds its deadline, and is dropped from the queue when its deadline passes
+while waiting.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+REASON_QUEUE_FULL = "queue_full"
+REASON_DEADLINE = "deadline"
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted before its deadline."""
+
+    def __init__(self, reason: str, retry_after: float):
+        """
+        Args:
+            reason: REASON_QUEUE_FULL or REASON_DEADLINE
+            retry_after: Suggested delay in seconds before retrying
+        """
+        super().__init__(f"LLM admission rejected ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        """Value of the Retry-After header (whole seconds, at least 1)."""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class _Waiter:
+    __slots__ = ("user", "deadline", "future", "enqueued_at")
+
+    def __init__(self, user: str, deadline: float, future: asyncio.Future):
+        self.user = user
+        self.deadline = deadline
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class AdmissionController:
+    """Bounded concurrency limiter with a fair, deadline-aware priority queue."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        initial_service_seconds: float = 5.0
+    ):
+        """
+        Initialize controller.
+
+        Args:
+            name: Controller name, used in statistics
+            max_concurrency: Generations allowed to run at once
+            max_queue: Requests allowed to wait for a slot
+            initial_service_seconds: Generation time assumed until some have been measured
+        """
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.active = 0
+        self.queued = 0
+        # Priority -> user -> waiters of that user, users in round-robin order
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Waiter]]"] = {}
+        # Moving average of slot hold times, used to estimate queueing delays
+        self.service_seconds = initial_service_seconds
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {REASON_QUEUE_FULL: 0, REASON_DEADLINE: 0}
+        self.total_wait_seconds = 0.0
+        # Recent queue waits (seconds), for percentiles
+        self._recent_waits = deque(maxlen=10000)
+        # Optional callbacks: on_admit(queue_wait_seconds), on_reject(reason)
+        self.on_admit: Optional[Callable[[float], None]] = None
+        self.on_reject: Optional[Callable[[str], None]] = None
+
+    def estimated_wait(self, position: Optional[int] = None) -> float:
+        """Estimated seconds before a request queued at position (default: last) gets a slot."""
+        if position is None:
+            position = self.queued
+        if self.active < self.max_concurrency and position == 0:
+            return 0.0
+        return (position // self.max_concurrency + 1) * self.service_seconds
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        user: str,
+        deadline: float,
+        priority: int = PRIORITY_INTERACTIVE
+    ) -> AsyncIterator[None]:
+        """
+        Hold a generation slot for the duration of the block.
+
+        Args:
+            user: User the request is scheduled for
+            deadline: time.monotonic() value by which the response is due
+            priority: PRIORITY_INTERACTIVE or PRIORITY_BATCH (lower is served first)
+
+        Raises:
+            AdmissionRejected: If the request cannot start in time
+        """
+        await self._acquire(user, deadline, priority)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.service_seconds += 0.2 * (time.monotonic() - started - self.service_seconds)
+            self._release()
+
+    async def _acquire(self, user: str, deadline: float, priority: int):
+        now = time.monotonic()
+        if self.active < self.max_concurrency and self.queued == 0:
+            self._admitted(0.0)
+            return
+
+        if self.queued >= self.max_queue:
+            self._reject(REASON_QUEUE_FULL, self.estimated_wait())
+        wait = self.estimated_wait()
+        if now + wait + self.service_seconds > deadline:
+            self._reject(REASON_DEADLINE, wait)
+
+        waiter = _Waiter(user, deadline, asyncio.get_running_loop().create_future())
+        users = self._queues.setdefault(priority, OrderedDict())
+        users.setdefault(user, deque()).append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait({waiter.future}, timeout=max(0.0, deadline - now))
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        if not waiter.future.done():
+            self._abandon(waiter)
+            self._reject(REASON_DEADLINE, self.estimated_wait())
+
+    def _abandon(self, waiter: _Waiter):
+        """Give up waiting, returning the slot if it was granted meanwhile."""
+        if waiter.future.done():
+            self._release()
+        else:
+            # Skipped (and uncounted) when the queue reaches it
+            waiter.future.cancel()
+            self.queued -= 1
+
+    def _admitted(self, waited: float):
+        self.active += 1
+        self.admitted += 1
+        self.total_wait_seconds += waited
+        self._recent_waits.append(waited)
+        if self.on_admit is not None:
+            self.on_admit(waited)
+
+    def _reject(self, reason: str, retry_after: float):
+        self.rejected[reason] += 1
+        if self.on_reject is not None:
+            self.on_reject(reason)
+        logger.warning(
+            f"{self.name}: request rejected ({reason}), {self.active} running, {self.queued} queued"
+        )
+        raise AdmissionRejected(reason, retry_after)
+
+    def _release(self):
+        self.active -= 1
+        while self.active < self.max_concurrency:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            self._admitted(time.monotonic() - waiter.enqueued_at)
+            waiter.future.set_result(None)
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        """Pop the next live waiter: highest priority, then next user in turn."""
+        for priority in sorted(self._queues):
+            users = self._queues[priority]
+            while users:
+                user, waiters = next(iter(users.items()))
+                waiter = waiters.popleft()
+                if waiters:
+                    users.move_to_end(user)
+                else:
+                    del users[user]
+                if not waiter.future.cancelled():
+                    self.queued -= 1
+                    return waiter
+            del self._queues[priority]
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Admission statistics."""
+        waits = np.fromiter(self._recent_waits, dtype=np.float64)
+        return {
+            "name": self.name,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "queued_users": len({user for users in self._queues.values() for user in users}),
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected[REASON_QUEUE_FULL],
+            "rejected_deadline": self.rejected[REASON_DEADLINE],
+            "mean_wait_ms": 1000 * self.total_wait_seconds / self.admitted if self.admitted else 0.0,
+            "p95_wait_ms": 1000 * float(np.percentile(waits, 95)) if len(waits) else 0.0,
+            "estimated_service_ms": 1000 * self.service_seconds,
+        }
@@ -3,33 +3,60 @@ JWT authentication and authorization.
 """
 
 import logging
+import secrets
 from datetime import datetime, timedelta
 from typing import Optional, Dict
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import APIKeyHeader, HTTPBearer, HTTPAuthorizationCredentials
+from ldap3.core.exceptions import LDAPException
+from pydantic import ValidationError
 
+from .cache import MISSING, TTLCache
+from .cache_backends import create_backend
+from .circuit_breaker import CircuitOpenError
 from .config import settings
 from .models import UserProfile
 from .ldap_service import ldap_service
+from .metrics import STAGE_JWT, STAGE_LDAP_PROFILE
+from .singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
-# Security scheme
+# Security schemes
 security = HTTPBearer()
+admin_key_header = APIKeyHeader(name="X-Admin-Key", auto_error=False)
 
+# Version of the profile claims layout; bump when UserProfile fields change so
+# tokens issued with the previous layout fall back to LDAP
+PROFILE_CLAIMS_VERSION = 1
 
-def create_access_token(data: dict) -> str:
+# LDAP profiles by username; None values remember unknown users
+profile_cache = TTLCache(
+    name="ldap_profiles",
+    max_size=settings.profile_cache_max_size,
+    ttl_seconds=settings.profile_cache_ttl_seconds,
+    backend=create_backend("ldap_profiles", settings.profile_cache_max_size)
+)
+# Concurrent profile cache misses of one user share a single LDAP lookup
+profile_lookups = SingleFlight("ldap_profiles")
+
+
+def create_access_token(data: dict, profile: Optional[Dict[str, str]] = None) -> str:
     """
     Create JWT access token.
     
     Args:
         data: Payload data to encode in token
+        profile: User profile to embed as signed claims (profile claims mode)
         
     Returns:
         Encoded JWT token
     """
     to_encode = data.copy()
+    if profile is not None:
+        to_encode.update({"profile": dict(profile), "pv": PROFILE_CLAIMS_VERSION})
     expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
     to_encode.update({"exp": expire, "type": "access"})
     
@@ -117,12 +144,82 @@ def verify_refresh_token(token: str) -> Optional[Dict]:
         return None
 
 
+def load_user_profile(username: str) -> Optional[Dict[str, str]]:
+    """
+    Retrieve user profile from LDAP and store it in the profile cache.
+    
+    Blocking: call it from a worker thread. Unknown users are cached with the
+    negative TTL; directory errors are not cached.
+    
+    Args:
+        username: LDAP username (uid)
+        
+    Returns:
+        Dictionary with user profile data or None if not found
+    """
+    if not settings.profile_cache_enabled:
+        return ldap_service.get_user_profile(username)
+    
+    try:
+        profile = ldap_service.lookup_user_profile(username)
+    except LDAPException as e:
+        logger.error(f"LDAP error retrieving profile for {username}: {str(e)}")
+        return None
+    
+    if profile is None:
+        profile_cache.set(username, None, ttl_seconds=settings.profile_cache_negative_ttl_seconds)
+    else:
+        profile_cache.set(username, profile)
+    return profile
+
+
+async def require_ldap_available():
+    """
+    Reject the request right away while the LDAP circuit breaker is open.
+    
+    Raises:
+        HTTPException: 503 with Retry-After if the directory is unavailable
+    """
+    try:
+        await ldap_service.breaker.check()
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="L'annuaire est temporairement indisponible, veuillez réessayer dans quelques instants.",
+            headers={"Retry-After": e.retry_after_header},
+        )
+
+
+def profile_from_claims(payload: Dict) -> Optional[UserProfile]:
+    """
+    Build the user profile from the signed claims of a verified access token.
+    
+    Args:
+        payload: Verified access token payload
+        
+    Returns:
+        UserProfile, or None if the token carries no usable profile claims
+    """
+    claims = payload.get("profile")
+    if payload.get("pv") != PROFILE_CLAIMS_VERSION or not isinstance(claims, dict):
+        return None
+    if claims.get("username") != payload.get("sub"):
+        return None
+    try:
+        return UserProfile(**claims)
+    except ValidationError:
+        logger.warning(f"Invalid profile claims in token for {payload.get('sub')}")
+        return None
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> UserProfile:
     """
     Dependency to get current authenticated user from JWT token.
-    Also retrieves user profile from LDAP.
+    The profile comes from the token claims in profile claims mode, otherwise
+    from LDAP (through the profile cache; concurrent misses of one user share
+    a single lookup).
     
     Args:
         credentials: HTTP Authorization credentials
@@ -131,7 +228,8 @@ async def get_current_user(
         UserProfile object
         
     Raises:
-        HTTPException: If token is invalid or user not found
+        HTTPException: If token is invalid or user not found, or 503 if the
+            profile must come from LDAP while its circuit breaker is open
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -140,7 +238,8 @@ async def get_current_user(
     )
     
     token = credentials.credentials
-    payload = verify_access_token(token)
+    with STAGE_JWT.time():
+        payload = verify_access_token(token)
     
     if payload is None:
         raise credentials_exception
@@ -149,9 +248,40 @@ async def get_current_user(
     if username is None:
         raise credentials_exception
     
-    # Retrieve user profile from LDAP
-    profile_data = ldap_service.get_user_profile(username)
+    # Profile claims mode: the verified token is enough, no directory I/O
+    if settings.jwt_profile_claims_enabled:
+        user = profile_from_claims(payload)
+        if user is not None:
+            return user
+    
+    # Retrieve user profile from the cache, falling back to LDAP
+    with STAGE_LDAP_PROFILE.time():
+        profile_data = await profile_cache.aget(username) if settings.profile_cache_enabled else MISSING
+        if profile_data is MISSING:
+            await require_ldap_available()
+            profile_data = await profile_lookups.do(
+                username, lambda: run_in_threadpool(load_user_profile, username)
+            )
     if profile_data is None:
         raise credentials_exception
     
     return UserProfile(**profile_data)
+
+
+async def require_admin(api_key: Optional[str] = Depends(admin_key_header)) -> None:
+    """
+    Dependency protecting admin endpoints with the X-Admin-Key header.
+    
+    Raises:
+        HTTPException: If the admin API is disabled or the key is invalid
+    """
+    if not settings.admin_api_key:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin API disabled"
+        )
+    if api_key is None or not secrets.compare_digest(api_key, settings.admin_api_key):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin key"
+        )
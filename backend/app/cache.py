@@ -0,0 +1,374 @@
+"""
+Caching utilities.
+
+TTLCache stores its entries in a backend (app.cache_backends): in the process,
+or in a key-value store shared by all replicas. SemanticCache is in-process.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from .cache_backends import MISSING, CacheBackend, LocalBackend
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with per-entry expiry and hit/miss counters.
+
+    Thread-safe: entries may be read and written from the event loop and from
+    threadpool workers at the same time. Coroutines use the async variants
+    (aget, aset, ...), which run the operations of a blocking backend in a
+    worker thread.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_size: int,
+        ttl_seconds: Optional[float] = None,
+        backend: Optional[CacheBackend] = None
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            name: Cache name, used in statistics
+            max_size: Maximum number of entries (least recently used are evicted)
+            ttl_seconds: Default time-to-live of an entry, None for no expiry
+            backend: Storage of the entries (default: in-process)
+        """
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend if backend is not None else LocalBackend(name, max_size)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _count(self, hits: int, misses: int):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def _found(self, value: Any, default: Any) -> Any:
+        """Count a lookup and return its value, or default on a miss."""
+        if value is MISSING:
+            self._count(0, 1)
+            return default
+        self._count(1, 0)
+        return value
+
+    def _found_many(self, values: List[Any]) -> List[Any]:
+        """Count a bulk lookup and return its values."""
+        misses = sum(1 for value in values if value is MISSING)
+        self._count(len(values) - misses, misses)
+        return values
+
+    async def _run(self, operation, *args) -> Any:
+        """Run a backend operation, in a worker thread if the backend blocks."""
+        if self.backend.blocking:
+            return await asyncio.to_thread(operation, *args)
+        return operation(*args)
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """
+        Get a cached value.
+
+        Args:
+            key: Cache key
+            default: Value returned on a miss
+
+        Returns:
+            Cached value, or default if absent or expired
+        """
+        return self._found(self.backend.get(key), default)
+
+    async def aget(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Get a cached value without blocking the event loop (see get)."""
+        return self._found(await self._run(self.backend.get, key), default)
+
+    def get_many(self, keys: List[Hashable]) -> List[Any]:
+        """
+        Get several cached values in one backend operation.
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Cached values, MISSING for absent or expired keys
+        """
+        if not keys:
+            return []
+        return self._found_many(self.backend.get_many(keys))
+
+    async def aget_many(self, keys: List[Hashable]) -> List[Any]:
+        """Get several cached values without blocking the event loop (see get_many)."""
+        if not keys:
+            return []
+        return self._found_many(await self._run(self.backend.get_many, keys))
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """
+        Store a value.
+
+        Args:
+            key: Cache key
+            value: Value to store (None is allowed)
+            ttl_seconds: Time-to-live overriding the cache default
+        """
+        if self.max_size <= 0:
+            return
+        self.backend.set(key, value, self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+
+    async def aset(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Store a value without blocking the event loop (see set)."""
+        if self.max_size <= 0:
+            return
+        await self._run(self.backend.set, key, value, self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+
+    def set_many(self, items: List[Tuple[Hashable, Any]]):
+        """Store several values with the default time-to-live, in one backend operation."""
+        if self.max_size <= 0 or not items:
+            return
+        self.backend.set_many(items, self.ttl_seconds)
+
+    async def aset_many(self, items: List[Tuple[Hashable, Any]]):
+        """Store several values without blocking the event loop (see set_many)."""
+        if self.max_size <= 0 or not items:
+            return
+        await self._run(self.backend.set_many, items, self.ttl_seconds)
+
+    def delete(self, key: Hashable) -> bool:
+        """Remove one entry. Returns True if it was present."""
+        return self.backend.delete(key)
+
+    async def adelete(self, key: Hashable) -> bool:
+        """Remove one entry without blocking the event loop (see delete)."""
+        return await self._run(self.backend.delete, key)
+
+    def clear(self) -> int:
+        """Remove all entries. Returns the number of entries removed."""
+        return self.backend.clear()
+
+    async def aclear(self) -> int:
+        """Remove all entries without blocking the event loop (see clear)."""
+        return await self._run(self.backend.clear)
+
+    def __len__(self) -> int:
+        return len(self.backend)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache statistics (size is 0 when entries are not held by the process)."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "backend": self.backend.kind,
+                "size": len(self.backend),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.backend.evictions,
+                "expirations": self.backend.expirations,
+                "errors": self.backend.errors,
+            }
+
+
+class _SemanticPartition:
+    """
+    Embeddings of one SemanticCache partition, in a preallocated matrix.
+
+    Rows are slots: a removed entry frees its slot, reused by the next entry,
+    and the matrix only grows (doubling) when no slot is free, so storing an
+    entry never restacks the partition.
+    """
+
+    INITIAL_CAPACITY = 4
+
+    def __init__(self, dim: int):
+        self.matrix = np.zeros((self.INITIAL_CAPACITY, dim), dtype=np.float32)
+        # Entry id of each slot (-1: free) and expiry time (inf: never)
+        self.entry_ids = np.full(self.INITIAL_CAPACITY, -1, dtype=np.int64)
+        self.expires = np.full(self.INITIAL_CAPACITY, np.inf)
+        # Slots in [0, end) have been used; freed ones are listed in free
+        self.end = 0
+        self.free: List[int] = []
+
+    def __len__(self) -> int:
+        return self.end - len(self.free)
+
+    def add(self, entry_id: int, embedding: np.ndarray, expires_at: Optional[float]) -> int:
+        """Store an embedding in a free slot. Returns the slot."""
+        if self.free:
+            slot = self.free.pop()
+        else:
+            if self.end == len(self.matrix):
+                self._grow()
+            slot = self.end
+            self.end += 1
+        self.matrix[slot] = embedding
+        self.entry_ids[slot] = entry_id
+        self.expires[slot] = np.inf if expires_at is None else expires_at
+        return slot
+
+    def _grow(self):
+        capacity = 2 * len(self.matrix)
+        matrix = np.zeros((capacity, self.matrix.shape[1]), dtype=np.float32)
+        matrix[:self.end] = self.matrix[:self.end]
+        entry_ids = np.full(capacity, -1, dtype=np.int64)
+        entry_ids[:self.end] = self.entry_ids[:self.end]
+        expires = np.full(capacity, np.inf)
+        expires[:self.end] = self.expires[:self.end]
+        self.matrix, self.entry_ids, self.expires = matrix, entry_ids, expires
+
+    def release(self, slot: int):
+        """Free a slot."""
+        self.entry_ids[slot] = -1
+        self.expires[slot] = np.inf
+        self.free.append(slot)
+
+    def expired(self, now: float) -> List[int]:
+        """Entry ids of the live slots expired at now."""
+        return self.entry_ids[:self.end][self.expires[:self.end] <= now].tolist()
+
+    def best(self, embedding: np.ndarray) -> Tuple[int, float]:
+        """Entry id and similarity of the live slot closest to an embedding."""
+        similarities = self.matrix[:self.end] @ embedding
+        similarities[self.entry_ids[:self.end] < 0] = -np.inf
+        slot = int(similarities.argmax())
+        return int(self.entry_ids[slot]), float(similarities[slot])
+
+
+class SemanticCache:
+    """
+    Bounded cache looked up by embedding similarity.
+
+    Entries are grouped in partitions (e.g. one per user profile); a lookup
+    returns the value of the most similar live entry of the partition if its
+    cosine distance to the query is within max_distance. Expired entries of
+    the partition are purged before comparing. Embeddings must be
+    L2-normalized. Eviction is least-recently-used across all partitions.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_size: int,
+        max_distance: float,
+        ttl_seconds: Optional[float] = None
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            name: Cache name, used in statistics
+            max_size: Maximum number of entries
+            max_distance: Maximum cosine distance (1 - similarity) for a hit
+            ttl_seconds: Time-to-live of an entry, None for no expiry
+        """
+        self.name = name
+        self.max_size = max_size
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        # Entry id -> (partition, slot, value), least recently used first
+        self._entries: "OrderedDict[int, Tuple[Hashable, int, Any]]" = OrderedDict()
+        self._partitions: Dict[Hashable, _SemanticPartition] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, entry_id: int):
+        """Remove an entry (lock held)."""
+        partition, slot, _ = self._entries.pop(entry_id)
+        stored = self._partitions[partition]
+        stored.release(slot)
+        if not len(stored):
+            del self._partitions[partition]
+
+    def get(self, partition: Hashable, embedding: np.ndarray, default: Any = MISSING) -> Any:
+        """
+        Get the value of the closest live entry within max_distance.
+
+        Args:
+            partition: Partition to search
+            embedding: L2-normalized query embedding
+            default: Value returned on a miss
+
+        Returns:
+            Cached value, or default
+        """
+        with self._lock:
+            stored = self._partitions.get(partition)
+            if stored is not None and self.ttl_seconds is not None:
+                for entry_id in stored.expired(time.monotonic()):
+                    self._remove(entry_id)
+                    self.expirations += 1
+                stored = self._partitions.get(partition)
+            if stored is not None:
+                entry_id, similarity = stored.best(embedding)
+                if 1.0 - similarity <= self.max_distance:
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return self._entries[entry_id][2]
+            self.misses += 1
+            return default
+
+    def set(self, partition: Hashable, embedding: np.ndarray, value: Any):
+        """
+        Store a value under an embedding.
+
+        Args:
+            partition: Partition of the entry
+            embedding: L2-normalized embedding
+            value: Value to store
+        """
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else None
+        embedding = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            # Evict first, so the new entry can take the freed slot
+            while len(self._entries) >= self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            stored = self._partitions.get(partition)
+            if stored is None:
+                stored = self._partitions[partition] = _SemanticPartition(len(embedding))
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (partition, stored.add(entry_id, embedding, expires_at), value)
+
+    def clear(self) -> int:
+        """Remove all entries. Returns the number of entries removed."""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._partitions.clear()
+            return count
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache statistics (same fields as TTLCache.stats)."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,350 @@
+"""
+Storage backends of the key-value caches (TTLCache).
+
+- local: bounded LRU dictionary with per-entry expiry, private to the process
+- redis: networked key-value store speaking the Redis protocol, shared by all
+  replicas, so an LDAP profile, question embedding or LLM answer cached by
+  one replica is a hit on the others (requires the redis package)
+
+Values stored over the network are serialized in a compact binary form:
+NumPy arrays as a small header (dtype, shape) followed by their raw bytes,
+strings as UTF-8 and other values as JSON. Bulk gets are a single MGET and
+bulk sets a single pipeline, so a batch costs one round trip.
+
+The networked backend never raises to its caller: on failure a get is a miss
+and a set is dropped; failures are counted and logged. Its calls block the
+calling thread for a round trip: from the event loop, go through the async
+methods of TTLCache, which run them in a worker thread.
+"""
+
+import json
+import logging
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Returned by TTLCache.get on a miss, so that None can be cached as a value
+MISSING = object()
+
+BACKEND_LOCAL = "local"
+BACKEND_REDIS = "redis"
+
+# Type tags of serialized values
+_TAG_ARRAY = b"A"
+_TAG_TEXT = b"S"
+_TAG_JSON = b"J"
+
+# Seconds between two logs of networked backend failures
+ERROR_LOG_INTERVAL_SECONDS = 60.0
+
+
+def pack_value(value: Any) -> bytes:
+    """
+    Serialize a cached value.
+
+    Args:
+        value: NumPy array (numeric dtype), string, or JSON-serializable value
+
+    Returns:
+        Type tag followed by the encoded value
+    """
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise ValueError("Cannot serialize arrays of Python objects")
+        array = np.ascontiguousarray(value)
+        dtype = array.dtype.str.encode("ascii")
+        header = struct.pack(f"<B{len(dtype)}sB{array.ndim}I", len(dtype), dtype, array.ndim, *array.shape)
+        return _TAG_ARRAY + header + array.tobytes()
+    if isinstance(value, str):
+        return _TAG_TEXT + value.encode("utf-8")
+    return _TAG_JSON + json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def unpack_value(data: bytes) -> Any:
+    """
+    Deserialize a value written by pack_value.
+
+    Arrays are read-only views of data (no copy).
+
+    Raises:
+        ValueError: If data is not a serialized value
+    """
+    tag = data[:1]
+    if tag == _TAG_ARRAY:
+        dtype_size = data[1]
+        dtype = np.dtype(data[2:2 + dtype_size].decode("ascii"))
+        ndim = data[2 + dtype_size]
+        offset = 3 + dtype_size
+        shape = struct.unpack_from(f"<{ndim}I", data, offset)
+        return np.frombuffer(data, dtype=dtype, offset=offset + 4 * ndim).reshape(shape)
+    if tag == _TAG_TEXT:
+        return data[1:].decode("utf-8")
+    if tag == _TAG_JSON:
+        return json.loads(data[1:].decode("utf-8"))
+    raise ValueError(f"Unknown cached value tag {tag!r}")
+
+
+class CacheBackend:
+    """Storage of one cache: values by key, with an optional time-to-live."""
+
+    kind = ""
+    # Whether operations wait on I/O (run them off the event loop)
+    blocking = False
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: Cache name, used in keys, logs and metrics
+        """
+        self.name = name
+        self.evictions = 0
+        self.expirations = 0
+        self.errors = 0
+        # Optional callback(cache, backend, operation, seconds) invoked after each operation
+        self.on_operation: Optional[Callable[[str, str, str, float], None]] = None
+
+    def _observe(self, operation: str, started: float):
+        if self.on_operation is not None:
+            self.on_operation(self.name, self.kind, operation, time.perf_counter() - started)
+
+    def get(self, key: Hashable) -> Any:
+        """Value of a key, or MISSING."""
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: List[Hashable]) -> List[Any]:
+        """Values of several keys (MISSING for absent ones), in one operation."""
+        raise NotImplementedError
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float]):
+        """Store a value (ttl_seconds None for no expiry)."""
+        self.set_many([(key, value)], ttl_seconds)
+
+    def set_many(self, items: Iterable[Tuple[Hashable, Any]], ttl_seconds: Optional[float]):
+        """Store several values with the same time-to-live, in one operation."""
+        raise NotImplementedError
+
+    def delete(self, key: Hashable) -> bool:
+        """Remove one entry. Returns True if it was present."""
+        raise NotImplementedError
+
+    def clear(self) -> int:
+        """Remove all entries. Returns the number of entries removed."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class LocalBackend(CacheBackend):
+    """Bounded LRU dictionary with per-entry expiry (thread-safe)."""
+
+    kind = BACKEND_LOCAL
+
+    def __init__(self, name: str, max_size: int):
+        """
+        Args:
+            name: Cache name
+            max_size: Maximum number of entries (least recently used are evicted)
+        """
+        super().__init__(name)
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, key: Hashable, now: float) -> Any:
+        """Value of a key (lock held)."""
+        item = self._data.get(key)
+        if item is None:
+            return MISSING
+        value, expires_at = item
+        if expires_at is not None and expires_at <= now:
+            del self._data[key]
+            self.expirations += 1
+            return MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def get(self, key: Hashable) -> Any:
+        started = time.perf_counter()
+        with self._lock:
+            value = self._lookup(key, time.monotonic())
+        self._observe("get", started)
+        return value
+
+    def get_many(self, keys: List[Hashable]) -> List[Any]:
+        started = time.perf_counter()
+        now = time.monotonic()
+        with self._lock:
+            values = [self._lookup(key, now) for key in keys]
+        self._observe("get_many", started)
+        return values
+
+    def set_many(self, items: Iterable[Tuple[Hashable, Any]], ttl_seconds: Optional[float]):
+        started = time.perf_counter()
+        expires_at = time.monotonic() + ttl_seconds if ttl_seconds is not None else None
+        with self._lock:
+            for key, value in items:
+                self._data[key] = (value, expires_at)
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        self._observe("set", started)
+
+    def delete(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._data.pop(key, MISSING) is not MISSING
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._data)
+            self._data.clear()
+            return count
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisBackend(CacheBackend):
+    """Namespace of a Redis-protocol key-value store."""
+
+    kind = BACKEND_REDIS
+    blocking = True
+
+    def __init__(self, name: str, client, prefix: str):
+        """
+        Args:
+            name: Cache name
+            client: redis.Redis client (its connection pool may be shared by several backends)
+            prefix: Prefix of the keys of this cache
+        """
+        import redis
+
+        super().__init__(name)
+        self.client = client
+        self.prefix = prefix
+        self._errors = (redis.RedisError, OSError, ValueError)
+        self._last_error_log = 0.0
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.prefix}{key}"
+
+    def _failed(self, operation: str, error: Exception):
+        self.errors += 1
+        now = time.monotonic()
+        if now - self._last_error_log >= ERROR_LOG_INTERVAL_SECONDS:
+            self._last_error_log = now
+            logger.warning(
+                f"Cache {self.name}: {operation} failed on the {self.kind} backend "
+                f"({self.errors} failures so far): {str(error)}"
+            )
+
+    def get_many(self, keys: List[Hashable]) -> List[Any]:
+        if not keys:
+            return []
+        started = time.perf_counter()
+        try:
+            raw = self.client.mget([self._key(key) for key in keys])
+            values = [MISSING if data is None else unpack_value(data) for data in raw]
+        except self._errors as e:
+            self._failed("get", e)
+            values = [MISSING] * len(keys)
+        self._observe("get_many" if len(keys) > 1 else "get", started)
+        return values
+
+    def set_many(self, items: Iterable[Tuple[Hashable, Any]], ttl_seconds: Optional[float]):
+        started = time.perf_counter()
+        expiry_ms = max(1, int(ttl_seconds * 1000)) if ttl_seconds is not None else None
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in items:
+                pipe.set(self._key(key), pack_value(value), px=expiry_ms)
+            pipe.execute()
+        except self._errors as e:
+            self._failed("set", e)
+        self._observe("set", started)
+
+    def delete(self, key: Hashable) -> bool:
+        started = time.perf_counter()
+        try:
+            deleted = self.client.delete(self._key(key)) > 0
+        except self._errors as e:
+            self._failed("delete", e)
+            deleted = False
+        self._observe("delete", started)
+        return deleted
+
+    def clear(self) -> int:
+        """Remove the keys of this cache (scanned by prefix)."""
+        count = 0
+        try:
+            batch = []
+            for key in self.client.scan_iter(match=f"{self.prefix}*", count=1000):
+                batch.append(key)
+                if len(batch) >= 1000:
+                    count += self.client.delete(*batch)
+                    batch = []
+            if batch:
+                count += self.client.delete(*batch)
+        except self._errors as e:
+            self._failed("clear", e)
+        return count
+
+    def __len__(self) -> int:
+        # Counting the keys of one namespace needs a full scan: not tracked
+        return 0
+
+
+_redis_client = None
+_redis_client_lock = threading.Lock()
+
+
+def shared_redis_client():
+    """Redis client of the process (one connection pool for all caches)."""
+    global _redis_client
+    with _redis_client_lock:
+        if _redis_client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ImportError(
+                    "The 'redis' cache backend requires the redis package (pip install redis)"
+                ) from e
+            _redis_client = redis.Redis.from_url(
+                settings.cache_redis_url,
+                socket_timeout=settings.cache_timeout_seconds,
+                socket_connect_timeout=settings.cache_timeout_seconds
+            )
+            logger.info(f"Caches shared through {settings.cache_redis_url}")
+        return _redis_client
+
+
+def create_backend(name: str, max_size: int, namespace: str = "") -> CacheBackend:
+    """
+    Backend of one cache, as configured by CACHE_BACKEND.
+
+    Args:
+        name: Cache name
+        max_size: Entries kept by the local backend (a disabled cache, 0, stays local)
+        namespace: Extra key prefix, for values that depend on more than the key
+            (e.g. the embedding model)
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    backend = settings.cache_backend
+    if backend == BACKEND_LOCAL or max_size <= 0:
+        return LocalBackend(name, max_size)
+    if backend == BACKEND_REDIS:
+        prefix = ":".join(part for part in (settings.cache_key_prefix, name, namespace) if part)
+        return RedisBackend(name, shared_redis_client(), f"{prefix}:")
+    raise ValueError(f"Unknown cache backend '{backend}' (expected 'local' or 'redis')")
+
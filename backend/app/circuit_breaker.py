@@ -0,0 +1,179 @@
+"""
+Circuit breakers for external dependencies (Ollama, LDAP).
+
+A breaker counts consecutive failures of calls to a dependency. After
+failure_threshold of them it opens: callers are rejected immediately instead
+of waiting for connection errors or timeouts. Once open_seconds have passed
+it becomes half-open, and the next caller runs the dependency's health check
+(concurrent callers are still rejected): the breaker closes if the check
+passes and opens again otherwise.
+
+Failures and successes may be recorded from worker threads (LDAP calls run
+in the threadpool); checks and probes run on the event loop.
+"""
+
+import logging
+import math
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+# Exported as a number (closed 0, half-open 1, open 2)
+STATE_VALUES = {STATE_CLOSED: 0, STATE_HALF_OPEN: 1, STATE_OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        """
+        Args:
+            name: Breaker name
+            retry_after: Seconds until the next probe
+        """
+        super().__init__(f"Circuit breaker {name} is open")
+        self.name = name
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        """Value of the Retry-After header (whole seconds, at least 1)."""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with health-check probing."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        open_seconds: float,
+        probe: Callable[[], Awaitable[bool]],
+        enabled: bool = True
+    ):
+        """
+        Initialize breaker.
+
+        Args:
+            name: Dependency name, used in logs and statistics
+            failure_threshold: Consecutive failures that open the breaker
+            open_seconds: How long the breaker stays open before probing
+            probe: Async health check of the dependency
+            enabled: When False, calls are never rejected (failures are still counted)
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.open_seconds = open_seconds
+        self.probe = probe
+        self.enabled = enabled
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.failures = 0
+        self.rejected = 0
+        self.transitions: Dict[str, int] = {state: 0 for state in STATE_VALUES}
+        self._lock = threading.Lock()
+        # Optional callback(name, old_state, new_state) invoked on each transition
+        self.on_transition: Optional[Callable[[str, str, str], None]] = None
+
+    def _transition(self, state: str):
+        """Change state (lock held)."""
+        previous = self.state
+        if previous == state:
+            return
+        self.state = state
+        self.transitions[state] += 1
+        if state == STATE_OPEN:
+            self.opened_at = time.monotonic()
+            cause = (
+                "health check failed" if previous == STATE_HALF_OPEN
+                else f"{self.consecutive_failures} consecutive failures"
+            )
+            logger.warning(
+                f"Circuit breaker {self.name}: {previous} -> open ({cause}), "
+                f"probing again in {self.open_seconds:.0f} s"
+            )
+        else:
+            logger.info(f"Circuit breaker {self.name}: {previous} -> {state}")
+        if state == STATE_CLOSED:
+            self.consecutive_failures = 0
+        if self.on_transition is not None:
+            self.on_transition(self.name, previous, state)
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker may probe the dependency again."""
+        return max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+
+    async def check(self):
+        """
+        Let a call through, or reject it.
+
+        When the open period has elapsed, the caller runs the probe first;
+        the breaker opens again unless the probe reports the dependency
+        healthy (including when the caller is cancelled during the probe).
+
+        Raises:
+            CircuitOpenError: If the breaker is open (or being probed by another caller)
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return
+            if self.state == STATE_HALF_OPEN or self.retry_after() > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, max(1.0, self.retry_after()))
+            self._transition(STATE_HALF_OPEN)
+
+        healthy = False
+        try:
+            healthy = bool(await self.probe())
+        except Exception as e:
+            logger.error(f"Circuit breaker {self.name}: probe failed: {str(e)}")
+        finally:
+            # Also reached when the probing caller is cancelled: the breaker
+            # must not stay half-open, which would reject every later call
+            with self._lock:
+                self._transition(STATE_CLOSED if healthy else STATE_OPEN)
+        if healthy:
+            return
+        with self._lock:
+            self.rejected += 1
+        raise CircuitOpenError(self.name, self.open_seconds)
+
+    def record_success(self):
+        """Record a successful call."""
+        with self._lock:
+            self.consecutive_failures = 0
+            if self.state == STATE_HALF_OPEN:
+                self._transition(STATE_CLOSED)
+
+    def record_failure(self):
+        """Record a failed call, opening the breaker at the threshold."""
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.state != STATE_OPEN and self.consecutive_failures >= self.failure_threshold:
+                self._transition(STATE_OPEN)
+
+    def stats(self) -> Dict[str, Any]:
+        """Breaker statistics."""
+        with self._lock:
+            return {
+                "name": self.name,
+                "enabled": self.enabled,
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "opened": self.transitions[STATE_OPEN],
+                "retry_after_seconds": self.retry_after() if self.state == STATE_OPEN else 0.0,
+            }
@@ -19,6 +19,43 @@ class Settings(BaseSettings):
     ldap_admin_dn: str = "cn=admin,dc=safran,dc=local"
     # WARNING: Change this password in production environments
     ldap_admin_password: str = "SecureAdminPass123!"
+    # Fetch schema/DSA info on connect (slow, only needed for schema-aware features)
+    ldap_get_server_info: bool = False
+    ldap_connect_timeout_seconds: float = 5.0
+    ldap_receive_timeout_seconds: float = 10.0
+    
+    # LDAP connection pools
+    # Reuse connections between calls (False opens a new connection per call)
+    ldap_pool_enabled: bool = True
+    # Persistent admin-bound connections used for profile searches
+    ldap_admin_pool_size: int = 4
+    # Connections used to verify user credentials at login
+    ldap_bind_pool_size: int = 8
+    # Wait at most this long for a free connection before failing
+    ldap_pool_acquire_timeout_seconds: float = 5.0
+    # Probe idle connections older than this before reusing them
+    ldap_pool_check_idle_seconds: float = 60.0
+    # Circuit breaker: after this many consecutive directory errors, requests needing
+    # LDAP fail immediately (503) until a health check passes, tried every open period
+    ldap_breaker_failure_threshold: int = 5
+    ldap_breaker_open_seconds: float = 15.0
+    
+    # LDAP profile cache
+    # Profiles are served from memory for this long before LDAP is queried again
+    profile_cache_enabled: bool = Field(default=True)
+    profile_cache_ttl_seconds: float = Field(default=300.0)
+    # Unknown users are remembered for a shorter time
+    profile_cache_negative_ttl_seconds: float = Field(default=30.0)
+    profile_cache_max_size: int = Field(default=10000)
+    
+    # Storage of the profile, query embedding and exact LLM answer caches:
+    # local (per process) or redis (a Redis-protocol store shared by all replicas)
+    cache_backend: str = Field(default="local")
+    cache_redis_url: str = Field(default="redis://localhost:6379/0")
+    # Prefix of the keys written to the shared store
+    cache_key_prefix: str = Field(default="hr")
+    # Timeout of a shared store call; on failure lookups are misses and writes are dropped
+    cache_timeout_seconds: float = Field(default=0.1)
     
     # JWT Configuration
     # SECURITY: Generate secure random keys for production using: openssl rand -hex 32
@@ -29,6 +66,9 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = 60
     # Refresh tokens expire after 7 days, allowing users to stay logged in
     refresh_token_expire_days: int = 7
+    # Embed the LDAP profile as signed claims in access tokens so authenticated
+    # requests skip LDAP; profile freshness is then bounded by the access token TTL
+    jwt_profile_claims_enabled: bool = False
     
     # CORS Configuration
     # Comma-separated list of allowed origins for CORS (update for production deployment)
@@ -39,6 +79,142 @@ class Settings(BaseSettings):
     ollama_base_url: str = Field(default="http://ollama:11434")
     # LLM model to use (llama3.2:3b provides good balance of speed and quality)
     ollama_model: str = Field(default="llama3.2:3b")
+    # Total timeout for a generation request, and for establishing the TCP connection
+    ollama_timeout_seconds: float = Field(default=30.0)
+    ollama_connect_timeout_seconds: float = Field(default=5.0)
+    ollama_health_timeout_seconds: float = Field(default=5.0)
+    # Connection pool shared by all requests (keep-alive avoids a TCP handshake per call)
+    ollama_max_connections: int = Field(default=100)
+    ollama_max_keepalive_connections: int = Field(default=20)
+    ollama_keepalive_expiry_seconds: float = Field(default=30.0)
+    # Circuit breaker: after this many consecutive failed generations, LLM fallbacks
+    # answer "service temporairement indisponible" immediately until a health check
+    # (GET /api/tags) passes, tried every open period
+    ollama_breaker_failure_threshold: int = Field(default=5)
+    ollama_breaker_open_seconds: float = Field(default=30.0)
+    
+    # LLM response cache (fallback answers)
+    llm_cache_enabled: bool = Field(default=True)
+    llm_cache_ttl_seconds: float = Field(default=3600.0)
+    # Exact layer: same model, options, profile and prompt
+    llm_cache_max_size: int = Field(default=5000)
+    # Semantic layer: same profile and a question embedding within this cosine distance
+    llm_semantic_cache_enabled: bool = Field(default=True)
+    llm_semantic_cache_max_size: int = Field(default=2000)
+    llm_semantic_cache_max_distance: float = Field(default=0.05)
+    # Concurrent generations of an identical prompt share one Ollama call (and token stream)
+    llm_coalescing_enabled: bool = Field(default=True)
+    # Admission control: at most llm_max_concurrency generations run on Ollama at once,
+    # up to llm_max_queue more wait (scheduled fairly across users); a request that
+    # cannot start within llm_request_deadline_seconds is answered 503 with Retry-After
+    llm_admission_enabled: bool = Field(default=True)
+    llm_max_concurrency: int = Field(default=4)
+    llm_max_queue: int = Field(default=64)
+    llm_request_deadline_seconds: float = Field(default=30.0)
+
+    # RAG Configuration
+    # Knowledge base CSV (relative paths are resolved from the backend working directory)
+    rag_csv_path: str = Field(default="data/knowledge_base.csv")
+    # Sentence-transformer model used to embed questions
+    rag_model_name: str = Field(default="all-mpnet-base-v2")
+    # Embedding backend: "torch" (sentence-transformers) or "onnx" (ONNX Runtime on an
+    # export written by: python -m app.embeddings export --quantize)
+    rag_embedding_backend: str = Field(default="torch")
+    # Root directory of ONNX exports, and whether to run the int8-quantized graph
+    rag_onnx_dir: str = Field(default="data/onnx")
+    rag_onnx_quantized: bool = Field(default=False)
+    # Intra-op threads of the embedding runtime (0 = runtime default)
+    rag_embedding_threads: int = Field(default=0)
+    # Directory holding the precomputed embedding artifact (built with: python -m app.kb_index build)
+    rag_index_dir: str = Field(default="data/index")
+    # Store L2-normalized embeddings so cosine similarity is a plain dot product
+    rag_normalize_embeddings: bool = Field(default=True)
+    # Cached query embeddings (by normalized question text); 0 disables the cache
+    rag_query_cache_size: int = Field(default=10000)
+    # Micro-batching of question encoding: concurrent questions collected for up to
+    # rag_batch_window_ms (or rag_batch_max_size questions) are encoded in one call
+    rag_batch_enabled: bool = Field(default=True)
+    rag_batch_window_ms: float = Field(default=5.0)
+    rag_batch_max_size: int = Field(default=32)
+    # "global": best match over all entries, denied if it belongs to another profile
+    # "partitioned": best match among the entries of the user's profile only
+    rag_search_mode: str = Field(default="global")
+    # Answer questions equal to a knowledge base question up to case, accents, spacing and
+    # punctuation from a hash table (similarity 1.0), without encoding them
+    rag_exact_match_enabled: bool = Field(default=True)
+    # Vector index backend: "exact" (NumPy scan), "ivf" (inverted file, approximate)
+    # or "hnsw" (approximate, requires hnswlib); built indexes are saved in rag_index_dir
+    rag_vector_backend: str = Field(default="exact")
+    # Approximate backends are only used for (profile partitions of) at least this many rows
+    rag_ann_min_rows: int = Field(default=10000)
+    # Similarity searches of chat requests run in a worker thread instead of on the event
+    # loop when the knowledge base has at least this many rows (0: always)
+    rag_search_offload_min_rows: int = Field(default=20000)
+    # IVF: number of clusters (0 = about 4 * sqrt(rows)) and clusters scanned per query
+    rag_ivf_nlist: int = Field(default=0)
+    rag_ivf_nprobe: int = Field(default=16)
+    # HNSW: graph degree and candidate list sizes
+    rag_hnsw_m: int = Field(default=16)
+    rag_hnsw_ef_construction: int = Field(default=200)
+    rag_hnsw_ef_search: int = Field(default=64)
+    # Poll the knowledge base file this often and hot-reload it when it changes
+    # (0 disables polling; POST /api/admin/kb/reload always works)
+    rag_watch_interval_seconds: float = Field(default=0.0)
+    # With several web workers, a reload runs in the worker that received it; the other
+    # workers check the KB index artifact it rewrites this often and reload from it
+    # (used when polling is off; 0 disables, leaving the other workers on the old index)
+    rag_worker_sync_interval_seconds: float = Field(default=5.0)
+
+    # Startup and readiness
+    # "background": serve HTTP immediately and load the RAG engine in the background
+    # (/ready reports progress, chat answers 503 until it is loaded);
+    # "blocking": load the RAG engine before accepting requests
+    startup_mode: str = Field(default="background")
+    # Knowledge base questions encoded right after loading so first requests are not slow
+    rag_warmup_queries: int = Field(default=8)
+    # Interval between the background LDAP and Ollama checks reported by /ready
+    readiness_check_interval_seconds: float = Field(default=15.0)
+
+    # Multi-process serving (gunicorn -c gunicorn.conf.py app.main:app): worker processes,
+    # and whether the master loads the knowledge base, index and model once before forking
+    # them (see app.prefork). Admission limits and caches apply per worker; Prometheus
+    # metrics are aggregated over the workers (PROMETHEUS_MULTIPROC_DIR, see gunicorn.conf.py).
+    web_workers: int = Field(default=1)
+    web_preload_enabled: bool = Field(default=True)
+
+    # Batch chat endpoint: messages per request, and LLM fallbacks run at once per request
+    chat_batch_max_messages: int = Field(default=50)
+    chat_batch_llm_concurrency: int = Field(default=4)
+
+    # Greetings and small talk: "local" answers them from the template table, "llm" sends
+    # them to Ollama alone
+    small_talk_mode: str = Field(default="local")
+    # JSON template table replacing the built-in one (list of intent, kind, patterns, response)
+    small_talk_templates_path: str = Field(default="")
+    # Other words a message may contain and still be answered from a template
+    small_talk_max_extra_words: int = Field(default=2)
+
+    # Chat sessions: LLM follow-up questions of a user continue from the context Ollama
+    # returned for the previous generation, instead of re-sending the full instruction prompt.
+    # Sessions are kept per process, up to chat_session_max_sessions (least recently used
+    # are evicted) and dropped after chat_session_idle_seconds without a message
+    chat_sessions_enabled: bool = Field(default=True)
+    chat_session_max_sessions: int = Field(default=1000)
+    chat_session_idle_seconds: float = Field(default=1800.0)
+    # Recent turns kept per session (history of rebuilt prompts)
+    chat_session_max_turns: int = Field(default=5)
+    # Longer Ollama contexts are dropped (the next turn sends the full prompt with history)
+    chat_session_max_context_tokens: int = Field(default=2048)
+
+    # Circuit breakers of the Ollama and LDAP dependencies (False only counts failures)
+    circuit_breakers_enabled: bool = Field(default=True)
+
+    # Expose Prometheus metrics on /metrics
+    metrics_enabled: bool = Field(default=True)
+
+    # Admin API
+    # Key expected in the X-Admin-Key header of /api/admin endpoints (empty disables them)
+    admin_api_key: str = Field(default="")
     
     # Environment
     # Current environment: development, staging, or production
@@ -0,0 +1,377 @@
+"""
+Embedding model backends.
+
+- torch: sentence-transformers model running in PyTorch (reference)
+- onnx: the same transformer exported to an ONNX graph and run with ONNX
+  Runtime on CPU, optionally with dynamically int8-quantized weights; pooling
+  is reproduced in NumPy and tokenization uses the fast ``tokenizers`` library,
+  so neither PyTorch nor transformers is imported at serving time
+
+Both expose the subset of the SentenceTransformer API used by the RAG engine
+(``encode`` and ``get_sentence_embedding_dimension``). A smaller distilled
+model is selected with RAG_MODEL_NAME and works with either backend.
+
+Export a model from the backend directory with:
+    python -m app.embeddings export --model all-mpnet-base-v2 --quantize
+"""
+
+import argparse
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKEND_TORCH = "torch"
+BACKEND_ONNX = "onnx"
+
+ONNX_CONFIG_FILENAME = "embedder.json"
+ONNX_MODEL_FILENAME = "model.onnx"
+ONNX_QUANTIZED_FILENAME = "model.int8.onnx"
+TOKENIZER_FILENAME = "tokenizer.json"
+
+POOLING_MEAN = "mean"
+POOLING_CLS = "cls"
+POOLING_MAX = "max"
+
+Texts = Union[str, List[str]]
+
+
+def onnx_model_dir(onnx_dir: Union[str, Path], model_name: str) -> Path:
+    """Directory holding the ONNX export of a model."""
+    return Path(onnx_dir) / model_name.replace("/", "__")
+
+
+def embedder_identity(backend: str, model_name: str, quantized: bool = False) -> str:
+    """
+    Identifier of the embedding function, stored with precomputed embeddings.
+
+    The PyTorch backend keeps the bare model name so existing artifacts stay
+    valid; ONNX exports get their own identity since their outputs differ
+    slightly (and more so when quantized).
+    """
+    if backend == BACKEND_TORCH:
+        return model_name
+    return f"{model_name}|{backend}|{'int8' if quantized else 'fp32'}"
+
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+class SentenceTransformerEmbedder:
+    """sentence-transformers model running in PyTorch."""
+
+    backend = BACKEND_TORCH
+
+    def __init__(self, model_name: str, threads: int = 0):
+        """
+        Load the model.
+
+        Args:
+            model_name: Sentence-transformer model name or path
+            threads: PyTorch intra-op threads (0 keeps the default)
+        """
+        from sentence_transformers import SentenceTransformer
+
+        if threads > 0:
+            import torch
+            torch.set_num_threads(threads)
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def encode(
+        self,
+        sentences: Texts,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+        batch_size: int = 32,
+        show_progress_bar: bool = False
+    ) -> np.ndarray:
+        """Encode texts (same arguments as SentenceTransformer.encode)."""
+        return self.model.encode(
+            sentences,
+            batch_size=batch_size,
+            convert_to_numpy=convert_to_numpy,
+            normalize_embeddings=normalize_embeddings,
+            show_progress_bar=show_progress_bar
+        )
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def share_memory(self):
+        """
+        Move the weights to shared memory, so processes forked afterwards map
+        the same pages instead of copying them on write.
+        """
+        self.model.share_memory()
+
+    def set_threads(self, threads: int):
+        """Set the PyTorch intra-op threads of this process."""
+        import torch
+        torch.set_num_threads(threads)
+
+
+class ONNXEmbedder:
+    """Transformer exported to ONNX, run with ONNX Runtime."""
+
+    backend = BACKEND_ONNX
+
+    def __init__(self, model_dir: Union[str, Path], quantized: bool = False, threads: int = 0):
+        """
+        Load an exported model.
+
+        Args:
+            model_dir: Directory written by export_onnx
+            quantized: Use the int8-quantized graph
+            threads: ONNX Runtime intra-op threads (0 keeps the default)
+
+        Raises:
+            ImportError: If onnxruntime or tokenizers is not installed
+            FileNotFoundError: If the model has not been exported
+        """
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError(
+                "The 'onnx' embedding backend requires onnxruntime and tokenizers "
+                "(pip install onnxruntime tokenizers)"
+            ) from e
+
+        model_dir = Path(model_dir)
+        config_path = model_dir / ONNX_CONFIG_FILENAME
+        if not config_path.exists():
+            raise FileNotFoundError(
+                f"No ONNX export in {model_dir} (run: python -m app.embeddings export)"
+            )
+        with open(config_path, "r", encoding="utf-8") as f:
+            self.config: Dict[str, Any] = json.load(f)
+
+        self.model_name = self.config["model_name"]
+        self.pooling = self.config["pooling"]
+        self.dimension = int(self.config["dimension"])
+
+        graph = ONNX_QUANTIZED_FILENAME if quantized else ONNX_MODEL_FILENAME
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            str(model_dir / graph), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / TOKENIZER_FILENAME))
+        self.tokenizer.enable_truncation(max_length=int(self.config["max_seq_length"]))
+        self.tokenizer.enable_padding(
+            pad_id=int(self.config["pad_token_id"]), pad_token=self.config["pad_token"]
+        )
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Run one batch through the graph and pool token embeddings."""
+        encodings = self.tokenizer.encode_batch(texts)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": attention_mask,
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        token_embeddings = self.session.run(
+            None, {name: feeds[name] for name in self.input_names}
+        )[0]
+
+        if self.pooling == POOLING_CLS:
+            return token_embeddings[:, 0]
+        mask = attention_mask[:, :, None].astype(np.float32)
+        if self.pooling == POOLING_MAX:
+            return np.where(mask > 0, token_embeddings, -1e9).max(axis=1)
+        return (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+    def encode(
+        self,
+        sentences: Texts,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+        batch_size: int = 32,
+        show_progress_bar: bool = False
+    ) -> np.ndarray:
+        """Encode texts (same arguments as SentenceTransformer.encode)."""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        # Batch texts of similar length together to limit padding
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            embeddings[rows] = self._encode_batch([texts[i] for i in rows])
+        if normalize_embeddings:
+            embeddings = _normalize(embeddings)
+        return embeddings[0] if single else embeddings
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+
+Embedder = Union[SentenceTransformerEmbedder, ONNXEmbedder]
+
+
+def load_embedder(
+    model_name: str,
+    backend: str = BACKEND_TORCH,
+    onnx_dir: Optional[Union[str, Path]] = None,
+    quantized: bool = False,
+    threads: int = 0
+) -> Embedder:
+    """
+    Load an embedding model.
+
+    Args:
+        model_name: Sentence-transformer model name
+        backend: Backend name (torch, onnx)
+        onnx_dir: Root directory of ONNX exports (onnx backend)
+        quantized: Use the int8-quantized graph (onnx backend)
+        threads: Intra-op threads (0 keeps the runtime default)
+
+    Returns:
+        Embedder
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    if backend == BACKEND_TORCH:
+        return SentenceTransformerEmbedder(model_name, threads=threads)
+    if backend == BACKEND_ONNX:
+        return ONNXEmbedder(onnx_model_dir(onnx_dir or ".", model_name), quantized=quantized, threads=threads)
+    raise ValueError(f"Unknown embedding backend '{backend}' (expected 'torch' or 'onnx')")
+
+
+def export_onnx(
+    model_name: str,
+    output_dir: Union[str, Path],
+    quantize: bool = True,
+    opset: int = 14
+) -> Path:
+    """
+    Export a sentence-transformer model to ONNX.
+
+    Writes the transformer graph (token embeddings output), its int8
+    dynamically-quantized copy if requested, the fast tokenizer and the
+    pooling configuration. Requires PyTorch, sentence-transformers and onnxruntime.
+
+    Args:
+        model_name: Sentence-transformer model name
+        output_dir: Output directory
+        quantize: Also write the int8-quantized graph
+        opset: ONNX opset version
+
+    Returns:
+        Output directory
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0]
+    pooling_module = model[1]
+    extra = [type(module).__name__ for module in list(model)[2:] if type(module).__name__ != "Normalize"]
+    if extra:
+        raise ValueError(f"Cannot export {model_name}: unsupported modules after pooling ({', '.join(extra)})")
+    if getattr(pooling_module, "pooling_mode_cls_token", False):
+        pooling = POOLING_CLS
+    elif getattr(pooling_module, "pooling_mode_max_tokens", False):
+        pooling = POOLING_MAX
+    else:
+        pooling = POOLING_MEAN
+
+    tokenizer = transformer.tokenizer
+    sample = tokenizer(["Combien de jours de congés ai-je ?"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+    class TokenEmbeddings(torch.nn.Module):
+        """Transformer returning its last hidden state, with named inputs."""
+
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, *inputs):
+            return self.auto_model(**dict(zip(input_names, inputs)))[0]
+
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["token_embeddings"] = {0: "batch", 1: "sequence"}
+    model_path = output_dir / ONNX_MODEL_FILENAME
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(transformer.auto_model).eval(),
+            tuple(sample[name] for name in input_names),
+            str(model_path),
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True
+        )
+    logger.info(f"Exported {model_name} to {model_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized_path = output_dir / ONNX_QUANTIZED_FILENAME
+        quantize_dynamic(str(model_path), str(quantized_path), weight_type=QuantType.QInt8)
+        logger.info(f"Wrote int8-quantized graph to {quantized_path}")
+
+    tokenizer.save_pretrained(str(output_dir))
+    config = {
+        "model_name": model_name,
+        "pooling": pooling,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "max_seq_length": model.get_max_seq_length(),
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+        "inputs": input_names,
+        "quantized": quantize,
+    }
+    with open(output_dir / ONNX_CONFIG_FILENAME, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    return output_dir
+
+
+def main(argv=None) -> int:
+    """Command line entry point."""
+    from .config import settings
+
+    parser = argparse.ArgumentParser(description="Embedding model backends")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export = subparsers.add_parser("export", help="Export a model to ONNX")
+    export.add_argument("--model", default=settings.rag_model_name, help="Embedding model")
+    export.add_argument("--onnx-dir", default=settings.rag_onnx_dir, help="Root directory of ONNX exports")
+    export.add_argument("--quantize", action="store_true", help="Also write the int8-quantized graph")
+    export.add_argument("--opset", type=int, default=14)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    export_onnx(
+        args.model,
+        onnx_model_dir(args.onnx_dir, args.model),
+        quantize=args.quantize,
+        opset=args.opset
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,343 @@
+"""
+Precomputed knowledge base embedding artifact.
+
+The artifact lives in a directory next to the knowledge base and is made of:
+- a ``.npy`` file holding the question embeddings (float32, one row per CSV row,
+  rows grouped by profile as by sort_by_profile), memory-mapped read-only when
+  loaded; the grouping lets the retrieval index slice each profile out of the
+  mapping instead of copying the matrix into a reordered one
+- a JSON metadata file describing how the embeddings were produced (CSV content
+  hash, embedding model identity, normalization, format version)
+
+RAGEngine.load maps the artifact in when the metadata matches the current CSV
+and model, and re-encodes (then rewrites the artifact) otherwise.
+
+Build the artifact offline from the backend directory with:
+    python -m app.kb_index build
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional, Union
+
+import numpy as np
+
+from .retrieval import profile_order
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Bump when the on-disk layout changes so older artifacts are rebuilt
+# (2: rows grouped by profile)
+INDEX_FORMAT_VERSION = 2
+METADATA_FILENAME = "kb_index.json"
+EMBEDDINGS_PREFIX = "kb_embeddings-"
+# Persisted vector indexes (see RAGEngine._index_options) share the artifact key
+VECTORS_PREFIX = "vectors-"
+
+PathLike = Union[str, Path]
+
+
+class StaleIndexError(RuntimeError):
+    """Raised when the embedding artifact is missing or stale and cannot be rebuilt."""
+
+
+def compute_csv_hash(csv_path: PathLike) -> str:
+    """
+    Compute the SHA-256 digest of the knowledge base file content.
+
+    Args:
+        csv_path: Path to knowledge base CSV file
+
+    Returns:
+        Hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(csv_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sort_by_profile(df: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Group the knowledge base rows by profile, in the row order of the artifact.
+
+    Args:
+        df: Knowledge base rows in CSV order
+
+    Returns:
+        The same rows grouped by profile (df itself when already grouped)
+    """
+    order = profile_order(df['profil'].astype(str).tolist())
+    if np.array_equal(order, np.arange(len(order))):
+        return df
+    return df.iloc[order].reset_index(drop=True)
+
+
+def artifact_key(csv_hash: str, model_name: str, normalize: bool) -> str:
+    """Short digest identifying one (CSV, model, normalization) combination."""
+    raw = f"{INDEX_FORMAT_VERSION}|{csv_hash}|{model_name}|{int(normalize)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def read_metadata(index_dir: PathLike) -> Optional[Dict]:
+    """
+    Read artifact metadata.
+
+    Args:
+        index_dir: Artifact directory
+
+    Returns:
+        Metadata dictionary or None if missing or unreadable
+    """
+    path = Path(index_dir) / METADATA_FILENAME
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Unreadable KB index metadata {path}: {str(e)}")
+        return None
+
+
+def load_index(
+    index_dir: PathLike,
+    csv_hash: str,
+    model_name: str,
+    normalize: bool
+) -> Optional[np.ndarray]:
+    """
+    Memory-map the embedding artifact if it matches the given inputs.
+
+    Args:
+        index_dir: Artifact directory
+        csv_hash: Content hash of the current knowledge base CSV
+        model_name: Embedding model identifier
+        normalize: Whether embeddings are expected to be L2-normalized
+
+    Returns:
+        Read-only memory-mapped embeddings, or None if the artifact is
+        missing or stale
+    """
+    metadata = read_metadata(index_dir)
+    if metadata is None:
+        logger.info(f"No KB index found in {index_dir}")
+        return None
+
+    expected = {
+        "format_version": INDEX_FORMAT_VERSION,
+        "csv_sha256": csv_hash,
+        "model_name": model_name,
+        "normalize": normalize,
+    }
+    for key, value in expected.items():
+        if metadata.get(key) != value:
+            logger.info(
+                f"KB index is stale ({key}: {metadata.get(key)!r} != {value!r})"
+            )
+            return None
+
+    path = Path(index_dir) / metadata["embeddings_file"]
+    try:
+        embeddings = np.load(path, mmap_mode="r")
+    except (OSError, ValueError) as e:
+        logger.warning(f"Cannot map KB embeddings {path}: {str(e)}")
+        return None
+
+    if embeddings.dtype != np.float32 or embeddings.shape != (metadata["rows"], metadata["dim"]):
+        logger.warning(f"KB embeddings {path} do not match their metadata")
+        return None
+
+    return embeddings
+
+
+def _atomic_write(path: Path, write) -> None:
+    """Write a file through a temporary sibling and rename it into place."""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def save_index(
+    index_dir: PathLike,
+    embeddings: np.ndarray,
+    csv_hash: str,
+    model_name: str,
+    normalize: bool
+) -> Path:
+    """
+    Write the embedding artifact and its metadata.
+
+    The embeddings file is written first under a content-specific name, then
+    the metadata is swapped in atomically, so a concurrent reader sees either
+    the previous artifact or the new one, never a mix of both.
+
+    Args:
+        index_dir: Artifact directory (created if needed)
+        embeddings: Question embeddings, one row per CSV row, in
+            sort_by_profile order
+        csv_hash: Content hash of the knowledge base CSV
+        model_name: Embedding model identifier
+        normalize: Whether embeddings are L2-normalized
+
+    Returns:
+        Path of the written embeddings file
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    key = artifact_key(csv_hash, model_name, normalize)
+    embeddings_file = f"{EMBEDDINGS_PREFIX}{key}.npy"
+    embeddings_path = index_dir / embeddings_file
+    _atomic_write(embeddings_path, lambda f: np.save(f, embeddings))
+
+    metadata = {
+        "format_version": INDEX_FORMAT_VERSION,
+        "csv_sha256": csv_hash,
+        "model_name": model_name,
+        "normalize": normalize,
+        "rows": int(embeddings.shape[0]),
+        "dim": int(embeddings.shape[1]),
+        "dtype": "float32",
+        "embeddings_file": embeddings_file,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+    }
+    _atomic_write(
+        index_dir / METADATA_FILENAME,
+        lambda f: f.write(json.dumps(metadata, indent=2).encode("utf-8"))
+    )
+
+    # Drop embeddings files and vector indexes from previous builds
+    stale = [p for p in index_dir.glob(f"{EMBEDDINGS_PREFIX}*.npy") if p.name != embeddings_file]
+    stale += [p for p in index_dir.glob(f"{VECTORS_PREFIX}*") if key not in p.name]
+    for old in stale:
+        try:
+            old.unlink()
+        except OSError as e:
+            logger.warning(f"Cannot remove old KB index file {old}: {str(e)}")
+
+    logger.info(
+        f"KB index written to {embeddings_path} "
+        f"({metadata['rows']} rows, dim {metadata['dim']})"
+    )
+    return embeddings_path
+
+
+def build_index(
+    csv_path: PathLike,
+    index_dir: PathLike,
+    model_name: str,
+    normalize: bool,
+    force: bool = False,
+    backend: str = "torch",
+    onnx_dir: Optional[PathLike] = None,
+    quantized: bool = False
+) -> Path:
+    """
+    Encode the knowledge base questions and write the artifact.
+
+    Args:
+        csv_path: Path to knowledge base CSV file
+        index_dir: Artifact directory
+        model_name: Sentence-transformer model name
+        normalize: Whether to L2-normalize embeddings
+        force: Rebuild even if the existing artifact is up to date
+        backend: Embedding backend (torch, onnx)
+        onnx_dir: Root directory of ONNX exports (onnx backend)
+        quantized: Use the int8-quantized graph (onnx backend)
+
+    Returns:
+        Path of the embeddings file
+    """
+    import pandas as pd
+    from .embeddings import embedder_identity, load_embedder
+
+    csv_hash = compute_csv_hash(csv_path)
+    model_id = embedder_identity(backend, model_name, quantized)
+    if not force and load_index(index_dir, csv_hash, model_id, normalize) is not None:
+        metadata = read_metadata(index_dir)
+        logger.info("KB index is up to date, nothing to do")
+        return Path(index_dir) / metadata["embeddings_file"]
+
+    df = sort_by_profile(pd.read_csv(csv_path))
+    logger.info(f"Encoding {len(df)} questions with {model_id}...")
+    model = load_embedder(model_name, backend=backend, onnx_dir=onnx_dir, quantized=quantized)
+    embeddings = model.encode(
+        df['question'].tolist(),
+        convert_to_numpy=True,
+        normalize_embeddings=normalize,
+        show_progress_bar=True
+    )
+    return save_index(index_dir, embeddings, csv_hash, model_id, normalize)
+
+
+def main(argv=None) -> int:
+    """Command line entry point."""
+    from .config import settings
+
+    parser = argparse.ArgumentParser(description="Knowledge base embedding index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Build the embedding artifact")
+    build.add_argument("--csv", default=settings.rag_csv_path, help="Knowledge base CSV")
+    build.add_argument("--index-dir", default=settings.rag_index_dir, help="Artifact directory")
+    build.add_argument("--model", default=settings.rag_model_name, help="Embedding model")
+    build.add_argument("--backend", default=settings.rag_embedding_backend, help="Embedding backend")
+    build.add_argument("--onnx-dir", default=settings.rag_onnx_dir, help="Root directory of ONNX exports")
+    build.add_argument("--quantized", action="store_true", default=settings.rag_onnx_quantized,
+                       help="Use the int8-quantized ONNX graph")
+    build.add_argument("--force", action="store_true", help="Rebuild even if up to date")
+
+    subparsers.add_parser("info", help="Show artifact metadata").add_argument(
+        "--index-dir", default=settings.rag_index_dir, help="Artifact directory"
+    )
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    if args.command == "build":
+        build_index(
+            args.csv,
+            args.index_dir,
+            args.model,
+            settings.rag_normalize_embeddings,
+            force=args.force,
+            backend=args.backend,
+            onnx_dir=args.onnx_dir,
+            quantized=args.quantized
+        )
+    else:
+        metadata = read_metadata(args.index_dir)
+        if metadata is None:
+            print(f"No KB index in {args.index_dir}")
+            return 1
+        print(json.dumps(metadata, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
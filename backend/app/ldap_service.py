@@ -2,27 +2,300 @@
 LDAP service for user authentication and profile retrieval.
 """
 
+import asyncio
 import logging
-from typing import Optional, Dict
-from ldap3 import Server, Connection, ALL, SUBTREE
-from ldap3.core.exceptions import LDAPException, LDAPBindError
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, TypeVar
+from ldap3 import Server, Connection, ALL, NONE, BASE, SUBTREE, SYNC
+from ldap3.core.exceptions import LDAPException, LDAPBindError, LDAPCommunicationError
 
+from .circuit_breaker import CircuitBreaker
 from .config import settings
+from .metrics import observe_breaker_transition
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+class LDAPPoolTimeoutError(LDAPException):
+    """Raised when no pooled connection becomes available in time."""
+
+
+class LDAPConnectionPool:
+    """
+    Bounded pool of reusable ldap3 connections.
+    
+    Connections are opened lazily, handed out to one caller at a time and put
+    back after use. A connection that fails with a communication error is
+    dropped; idle connections are probed before reuse once they have been idle
+    for a while, so a directory restart is absorbed by reconnecting.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        server: Server,
+        size: int,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        reuse: bool = True,
+        acquire_timeout: float = 5.0,
+        check_idle_seconds: float = 60.0,
+        client_strategy: str = SYNC,
+        receive_timeout: Optional[float] = None
+    ):
+        """
+        Initialize pool.
+        
+        Args:
+            name: Pool name, used in logs and statistics
+            server: ldap3 server
+            size: Maximum number of connections in use at the same time
+            user: DN bound on every connection (None opens unbound connections)
+            password: Password of the bound DN
+            reuse: Keep connections open between calls (False opens one per call)
+            acquire_timeout: Seconds to wait for a free connection
+            check_idle_seconds: Probe connections idle for longer than this before reuse
+            client_strategy: ldap3 client strategy (SYNC, or MOCK_SYNC for tests)
+            receive_timeout: Socket receive timeout in seconds
+        """
+        self.name = name
+        self.server = server
+        self.size = size
+        self.user = user
+        self.password = password
+        self.reuse = reuse
+        self.acquire_timeout = acquire_timeout
+        self.check_idle_seconds = check_idle_seconds
+        self.client_strategy = client_strategy
+        self.receive_timeout = receive_timeout
+        
+        self._idle: Deque[Tuple[Connection, float]] = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size) if reuse else None
+        self.in_use = 0
+        self.created = 0
+        self.reconnects = 0
+        self.discarded = 0
+        self.timeouts = 0
+    
+    def _open(self) -> Connection:
+        """Open a new connection, bound as the pool user if any."""
+        conn = Connection(
+            self.server,
+            user=self.user,
+            password=self.password,
+            client_strategy=self.client_strategy,
+            receive_timeout=self.receive_timeout
+        )
+        if self.user is None:
+            conn.open()
+        elif not conn.bind():
+            raise LDAPBindError(
+                f"Cannot bind LDAP {self.name} pool connection: {conn.result.get('description')}"
+            )
+        with self._lock:
+            self.created += 1
+        return conn
+    
+    def _discard(self, conn: Connection):
+        """Close a connection that must not be reused."""
+        with self._lock:
+            self.discarded += 1
+        try:
+            conn.unbind()
+        except LDAPException:
+            pass
+    
+    @staticmethod
+    def _is_alive(conn: Connection) -> bool:
+        """Probe a connection with a root DSE read."""
+        try:
+            conn.search("", "(objectClass=*)", search_scope=BASE, attributes=["1.1"])
+            return True
+        except LDAPException:
+            return False
+    
+    def _checkout(self) -> Connection:
+        """Take an idle connection, replacing it if it is dead, or open one."""
+        while True:
+            with self._lock:
+                item = self._idle.pop() if self._idle else None
+            if item is None:
+                return self._open()
+            
+            conn, last_used = item
+            idle_for = time.monotonic() - last_used
+            if not conn.closed and (idle_for < self.check_idle_seconds or self._is_alive(conn)):
+                return conn
+            
+            logger.info(f"LDAP {self.name} pool: dropping dead connection")
+            self._discard(conn)
+            with self._lock:
+                self.reconnects += 1
+    
+    def _drain_idle(self):
+        """Close all idle connections (e.g. after the server went away)."""
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn, _ in idle:
+            self._discard(conn)
+    
+    @contextmanager
+    def connection(self) -> Iterator[Connection]:
+        """
+        Borrow a connection for the duration of the block.
+        
+        Raises:
+            LDAPPoolTimeoutError: If no connection is available in time
+        """
+        if self._slots is not None and not self._slots.acquire(timeout=self.acquire_timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise LDAPPoolTimeoutError(
+                f"No {self.name} LDAP connection available after {self.acquire_timeout}s"
+            )
+        
+        conn = None
+        try:
+            conn = self._checkout()
+            with self._lock:
+                self.in_use += 1
+            try:
+                yield conn
+            finally:
+                with self._lock:
+                    self.in_use -= 1
+        except BaseException:
+            # The connection state is unknown after a failure, never reuse it
+            if conn is not None:
+                self._discard(conn)
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                if self.reuse:
+                    with self._lock:
+                        self._idle.append((conn, time.monotonic()))
+                else:
+                    conn.unbind()
+            if self._slots is not None:
+                self._slots.release()
+    
+    def run(self, operation: Callable[[Connection], T]) -> T:
+        """
+        Run an operation on a pooled connection.
+        
+        If the pooled connection turns out to be broken, idle connections are
+        dropped and the operation is retried once on a fresh connection.
+        """
+        try:
+            with self.connection() as conn:
+                return operation(conn)
+        except LDAPCommunicationError as e:
+            logger.warning(f"LDAP {self.name} pool: connection lost ({str(e)}), reconnecting")
+            with self._lock:
+                self.reconnects += 1
+            self._drain_idle()
+            with self.connection() as conn:
+                return operation(conn)
+    
+    def health_check(self) -> bool:
+        """Check that a pooled connection can reach the server."""
+        try:
+            with self.connection() as conn:
+                return self._is_alive(conn)
+        except LDAPException as e:
+            logger.error(f"LDAP {self.name} pool health check failed: {str(e)}")
+            return False
+    
+    def close(self):
+        """Close all idle connections."""
+        self._drain_idle()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Pool statistics."""
+        with self._lock:
+            return {
+                "name": self.name,
+                "size": self.size,
+                "idle": len(self._idle),
+                "in_use": self.in_use,
+                "created": self.created,
+                "reconnects": self.reconnects,
+                "discarded": self.discarded,
+                "timeouts": self.timeouts,
+            }
+
 
 class LDAPService:
-    """Service for LDAP operations."""
+    """
+    Service for LDAP operations.
+    
+    Directory errors are recorded by a circuit breaker; async callers check it
+    (see auth.require_ldap_available) so that requests fail fast while LDAP is down.
+    """
     
-    def __init__(self):
-        """Initialize LDAP server connection."""
-        self.server = Server(
+    def __init__(
+        self,
+        server: Optional[Server] = None,
+        client_strategy: str = SYNC,
+        pooled: Optional[bool] = None
+    ):
+        """
+        Initialize LDAP service.
+        
+        Connections are opened lazily, on first use.
+        
+        Args:
+            server: ldap3 server (defaults to the configured LDAP server)
+            client_strategy: ldap3 client strategy (MOCK_SYNC for tests and benchmarks)
+            pooled: Reuse connections between calls (defaults to settings.ldap_pool_enabled)
+        """
+        self.server = server or Server(
             settings.ldap_server_uri,
-            get_info=ALL,
-            connect_timeout=5
+            get_info=ALL if settings.ldap_get_server_info else NONE,
+            connect_timeout=settings.ldap_connect_timeout_seconds
         )
         self.base_dn = settings.ldap_base_dn
+        
+        reuse = settings.ldap_pool_enabled if pooled is None else pooled
+        pool_options = {
+            "reuse": reuse,
+            "acquire_timeout": settings.ldap_pool_acquire_timeout_seconds,
+            "check_idle_seconds": settings.ldap_pool_check_idle_seconds,
+            "client_strategy": client_strategy,
+            "receive_timeout": settings.ldap_receive_timeout_seconds,
+        }
+        # Persistent admin-bound connections for directory searches
+        self.admin_pool = LDAPConnectionPool(
+            "admin",
+            self.server,
+            size=settings.ldap_admin_pool_size,
+            user=settings.ldap_admin_dn,
+            password=settings.ldap_admin_password,
+            **pool_options
+        )
+        # Connections rebound as each user to verify credentials
+        self.bind_pool = LDAPConnectionPool(
+            "bind",
+            self.server,
+            size=settings.ldap_bind_pool_size,
+            **pool_options
+        )
+        self.breaker = CircuitBreaker(
+            "ldap",
+            failure_threshold=settings.ldap_breaker_failure_threshold,
+            open_seconds=settings.ldap_breaker_open_seconds,
+            probe=lambda: asyncio.to_thread(self.check_health),
+            enabled=settings.circuit_breakers_enabled
+        )
+        self.breaker.on_transition = observe_breaker_transition
     
     def authenticate_user(self, username: str, password: str) -> bool:
         """
@@ -38,21 +311,23 @@ class LDAPService:
         user_dn = f"uid={username},ou=People,{self.base_dn}"
         
         try:
-            conn = Connection(
-                self.server,
-                user=user_dn,
-                password=password,
-                auto_bind=True
+            bound = self.bind_pool.run(
+                lambda conn: conn.rebind(user=user_dn, password=password, read_server_info=False)
             )
-            conn.unbind()
+            self.breaker.record_success()
+            if not bound:
+                logger.warning(f"Authentication failed for user {username}: invalid credentials")
+                return False
             logger.info(f"User {username} authenticated successfully")
             return True
             
         except LDAPBindError as e:
+            self.breaker.record_success()
             logger.warning(f"Authentication failed for user {username}: {str(e)}")
             return False
             
         except LDAPException as e:
+            self.breaker.record_failure()
             logger.error(f"LDAP error during authentication for {username}: {str(e)}")
             return False
     
@@ -67,45 +342,74 @@ class LDAPService:
             Dictionary with user profile data or None if not found
         """
         try:
-            # Bind with admin credentials to search
-            conn = Connection(
-                self.server,
-                user=settings.ldap_admin_dn,
-                password=settings.ldap_admin_password,
-                auto_bind=True
-            )
-            
-            # Search for user
-            search_filter = f"(uid={username})"
-            conn.search(
-                search_base=f"ou=People,{self.base_dn}",
-                search_filter=search_filter,
-                search_scope=SUBTREE,
-                attributes=['cn', 'mail', 'employeeType', 'departmentNumber']
-            )
-            
-            if not conn.entries:
-                logger.warning(f"User {username} not found in LDAP")
-                conn.unbind()
-                return None
-            
-            entry = conn.entries[0]
-            
-            profile = {
-                'username': username,
-                'full_name': str(entry.cn.value) if entry.cn else username,
-                'email': str(entry.mail.value) if entry.mail else f"{username}@safran.local",
-                'employee_type': str(entry.employeeType.value) if entry.employeeType else 'Unknown',
-                'department': str(entry.departmentNumber.value) if entry.departmentNumber else 'General'
-            }
-            
-            conn.unbind()
-            logger.info(f"Retrieved profile for user {username}")
-            return profile
-            
+            return self.lookup_user_profile(username)
         except LDAPException as e:
             logger.error(f"LDAP error retrieving profile for {username}: {str(e)}")
             return None
+    
+    def lookup_user_profile(self, username: str) -> Optional[Dict[str, str]]:
+        """
+        Retrieve user profile from LDAP, letting directory errors propagate.
+        
+        Unlike get_user_profile, a None result here always means the user does
+        not exist, which lets callers cache it.
+        
+        Args:
+            username: LDAP username (uid)
+            
+        Returns:
+            Dictionary with user profile data or None if not found
+            
+        Raises:
+            LDAPException: If the directory cannot be queried
+        """
+        try:
+            profile = self.admin_pool.run(lambda conn: self._search_profile(conn, username))
+        except LDAPException:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return profile
+    
+    def _search_profile(self, conn: Connection, username: str) -> Optional[Dict[str, str]]:
+        """Search the user entry on an admin-bound connection."""
+        search_filter = f"(uid={username})"
+        conn.search(
+            search_base=f"ou=People,{self.base_dn}",
+            search_filter=search_filter,
+            search_scope=SUBTREE,
+            attributes=['cn', 'mail', 'employeeType', 'departmentNumber']
+        )
+        
+        if not conn.entries:
+            logger.warning(f"User {username} not found in LDAP")
+            return None
+        
+        entry = conn.entries[0]
+        
+        profile = {
+            'username': username,
+            'full_name': str(entry.cn.value) if entry.cn else username,
+            'email': str(entry.mail.value) if entry.mail else f"{username}@safran.local",
+            'employee_type': str(entry.employeeType.value) if entry.employeeType else 'Unknown',
+            'department': str(entry.departmentNumber.value) if entry.departmentNumber else 'General'
+        }
+        
+        logger.info(f"Retrieved profile for user {username}")
+        return profile
+    
+    def check_health(self) -> bool:
+        """Check if the LDAP server is reachable with the admin credentials."""
+        return self.admin_pool.health_check()
+    
+    def pool_stats(self) -> List[Dict[str, Any]]:
+        """Statistics of the admin and bind connection pools."""
+        return [self.admin_pool.stats(), self.bind_pool.stats()]
+    
+    def close(self):
+        """Close all pooled connections."""
+        self.admin_pool.close()
+        self.bind_pool.close()
 
 
 # Global LDAP service instance
@@ -1,135 +1,609 @@
 """
 Ollama LLM Service for intelligent chatbot responses.
 """
-import requests
-from typing import Optional
+import httpx
+import json
+import numpy as np
+import time
+from contextlib import nullcontext
+from typing import Any, AsyncIterator, Dict, NamedTuple, Optional, Sequence, Tuple
 import logging
-import re
+from app.admission import PRIORITY_INTERACTIVE, AdmissionController, AdmissionRejected
+from app.circuit_breaker import CircuitBreaker, CircuitOpenError
 from app.config import settings
+from app.metrics import (
+    OLLAMA_IN_FLIGHT,
+    observe_admission,
+    observe_breaker_transition,
+    observe_coalescing,
+    observe_rejection
+)
+from app.response_cache import ResponseCache
+from app.sessions import ChatSession, ChatTurn
+from app.singleflight import SingleFlight
+from app.small_talk import is_conversational, is_greeting  # noqa: F401 (re-exported)
 
 logger = logging.getLogger(__name__)
 
 
-# Greeting and conversational patterns
-GREETING_PATTERNS = [
-    r'\b(bonjour|salut|hello|hey|bonsoir|coucou)\b',
-    r'\b(qui es-tu|qui êtes-vous|c\'est quoi ton nom|quel est ton nom)\b',
-    r'\b(comment (tu )?t\'appelles?|comment (vous )?vous appelez)\b',
-]
+# User-facing error messages
+ERROR_TECHNICAL = "Désolé, je rencontre un problème technique. Veuillez réessayer."
+ERROR_TIMEOUT = "Désolé, la réponse prend trop de temps. Veuillez réessayer."
+ERROR_UNAVAILABLE = "Désolé, le service de chat est temporairement indisponible."
+ERROR_GENERIC = "Désolé, une erreur s'est produite. Veuillez réessayer."
 
-CONVERSATIONAL_PATTERNS = [
-    r'\b(comment (vas-tu|allez-vous|ça va|ca va))\b',
-    r'\b(ça va|ca va)\??$',
-    r'\b(tu vas bien|vous allez bien)\b',
-]
+# Bump when the prompt templates below change, to invalidate cached answers
+PROMPT_TEMPLATE_VERSION = 1
 
+# Generation options shared by all calls
+GENERATION_OPTIONS = {
+    "temperature": 0.3,  # Very low for strict adherence to context
+    "top_p": 0.8,  # Reduced for more focused responses
+    "num_predict": 100  # Shorter responses to avoid elaboration
+}
 
-def is_greeting(message: str) -> bool:
-    """
-    Check if the message is a greeting or self-introduction question.
-    
-    Args:
-        message: User's message
-        
-    Returns:
-        True if it's a greeting, False otherwise
-    """
-    message_lower = message.lower().strip()
-    
-    for pattern in GREETING_PATTERNS:
-        if re.search(pattern, message_lower):
-            logger.info(f"Detected greeting: {message}")
-            return True
-    
-    return False
+
+class OllamaError(Exception):
+    """Raised when a streamed generation fails; the message is user-facing."""
+
+
+class Generation(NamedTuple):
+    """Outcome of a generation request."""
+    answer: str
+    # False when answer is a user-facing error message
+    ok: bool = True
+    # Served from the response cache, without calling Ollama
+    cached: bool = False
+    # Context token array and prompt tokens evaluated, as returned by Ollama
+    context: Optional[Sequence[int]] = None
+    prompt_eval_count: Optional[int] = None
 
 
-def is_conversational(message: str) -> bool:
+class OllamaService:
     """
-    Check if the message is a conversational question (not HR-related).
+    Service for interacting with Ollama LLM.
     
-    Args:
-        message: User's message
-        
-    Returns:
-        True if it's conversational, False otherwise
+    A single instance is shared for the application lifetime so that all
+    calls go through one pooled, keep-alive ``httpx.AsyncClient``. Concurrent
+    generations of an identical prompt share one upstream call, and upstream
+    calls go through an admission controller bounding how many run at once.
+    A circuit breaker fails calls immediately while Ollama is down.
+    Follow-up questions of a chat session continue from the context Ollama
+    returned for the previous generation (see app.sessions).
     """
-    message_lower = message.lower().strip()
     
-    for pattern in CONVERSATIONAL_PATTERNS:
-        if re.search(pattern, message_lower):
-            logger.info(f"Detected conversational question: {message}")
-            return True
+    def __init__(self, base_url: Optional[str] = None, model: Optional[str] = None):
+        self.base_url = base_url or settings.ollama_base_url
+        self.model = model or settings.ollama_model
+        self._client: Optional[httpx.AsyncClient] = None
+        self.response_cache = (
+            ResponseCache(self.model, GENERATION_OPTIONS, PROMPT_TEMPLATE_VERSION)
+            if settings.llm_cache_enabled else None
+        )
+        self.coalescing = SingleFlight("ollama") if settings.llm_coalescing_enabled else None
+        if self.coalescing is not None:
+            self.coalescing.on_call = observe_coalescing
+        self.admission = (
+            AdmissionController(
+                "ollama",
+                max_concurrency=settings.llm_max_concurrency,
+                max_queue=settings.llm_max_queue
+            )
+            if settings.llm_admission_enabled else None
+        )
+        if self.admission is not None:
+            self.admission.on_admit = observe_admission
+            self.admission.on_reject = observe_rejection
+        self.breaker = CircuitBreaker(
+            "ollama",
+            failure_threshold=settings.ollama_breaker_failure_threshold,
+            open_seconds=settings.ollama_breaker_open_seconds,
+            probe=self.check_health,
+            enabled=settings.circuit_breakers_enabled
+        )
+        self.breaker.on_transition = observe_breaker_transition
+        logger.info(f"Initializing Ollama service: {self.base_url} with model {self.model}")
     
-    return False
-
-
-class OllamaService:
-    """Service for interacting with Ollama LLM."""
+    async def start(self):
+        """Create the shared HTTP client (called from the application lifespan)."""
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=httpx.Limits(
+                max_connections=settings.ollama_max_connections,
+                max_keepalive_connections=settings.ollama_max_keepalive_connections,
+                keepalive_expiry=settings.ollama_keepalive_expiry_seconds
+            ),
+            timeout=httpx.Timeout(
+                settings.ollama_timeout_seconds,
+                connect=settings.ollama_connect_timeout_seconds
+            )
+        )
+        logger.info(
+            f"Ollama client started (max {settings.ollama_max_connections} connections, "
+            f"{settings.ollama_max_keepalive_connections} keep-alive)"
+        )
     
-    def __init__(self):
-        self.base_url = settings.ollama_base_url
-        self.model = settings.ollama_model
-        logger.info(f"Initializing Ollama service: {self.base_url} with model {self.model}")
+    async def close(self):
+        """Close the shared HTTP client and its pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("Ollama client closed")
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTP client, raising if the service was not started."""
+        if self._client is None:
+            raise RuntimeError("Ollama service not started")
+        return self._client
+    
+    async def get_cached_response(
+        self,
+        question: str,
+        context: Optional[str] = None,
+        profile: str = "Unknown",
+        query_embedding: Optional[np.ndarray] = None
+    ) -> Optional[str]:
+        """
+        Look up a previously generated answer in the response cache.
+        
+        Args:
+            question: User's question
+            context: RAG context if available
+            profile: User's profile
+            query_embedding: L2-normalized question embedding (enables semantic matching)
+            
+        Returns:
+            Cached answer or None
+        """
+        if self.response_cache is None:
+            return None
+        prompt = self._build_prompt(question, context, profile)
+        return await self.response_cache.get(prompt, profile, context, query_embedding)
     
-    def generate_response(
+    async def generate_response(
         self,
         question: str,
         context: Optional[str] = None,
-        profile: str = "Unknown"
+        profile: str = "Unknown",
+        query_embedding: Optional[np.ndarray] = None,
+        user: str = "anonymous",
+        deadline: Optional[float] = None,
+        priority: int = PRIORITY_INTERACTIVE
     ) -> str:
         """
         Generate an intelligent response using Ollama LLM.
         
+        Answers are served from the response cache when possible, and
+        successful generations are added to it. Concurrent calls with the
+        same prompt wait for a single upstream generation.
+        
         Args:
             question: User's question
             context: RAG context if available (answer + domain from knowledge base)
             profile: User's profile (CDI, CDD, CADRE, etc.)
+            query_embedding: L2-normalized question embedding (enables semantic caching)
+            user: User the generation is scheduled for by admission control
+            deadline: time.monotonic() value by which the answer is due
+                (default: LLM_REQUEST_DEADLINE_SECONDS from now)
+            priority: Admission priority (lower is served first)
             
         Returns:
-            Generated response from Ollama
+            Generated response from Ollama (ERROR_UNAVAILABLE right away while
+            the circuit breaker is open)
+            
+        Raises:
+            AdmissionRejected: If the generation cannot start before the deadline
         """
-        # Build the prompt based on whether we have RAG context
-        if context:
-            prompt = self._build_prompt_with_context(question, context, profile)
-        else:
-            prompt = self._build_prompt_without_context(question, profile)
+        prompt = self._build_prompt(question, context, profile)
+        admission = self._admission_slot(user, deadline, priority)
+        generation = await self._respond(question, prompt, profile, context, query_embedding, admission)
+        return generation.answer
+    
+    async def generate_turn(
+        self,
+        session: ChatSession,
+        question: str,
+        profile: str = "Unknown",
+        query_embedding: Optional[np.ndarray] = None,
+        user: str = "anonymous",
+        deadline: Optional[float] = None,
+        priority: int = PRIORITY_INTERACTIVE
+    ) -> ChatTurn:
+        """
+        Answer a question without RAG context as the next turn of a chat session.
+        
+        Until a turn of the session has been generated, the question is
+        answered like generate_response (response cache and coalescing
+        included): template, knowledge base and cached answers do not start a
+        conversation. Later turns depend on the conversation, so they bypass
+        both: when the previous generation returned its context, only the
+        short follow-up prompt is sent with it; otherwise the full prompt is
+        sent with the recent turns as history. Turns of one session are
+        answered one at a time.
+        
+        Args:
+            session: Chat session of the user
+            question: User's question
+            profile: User's profile (CDI, CDD, CADRE, etc.)
+            query_embedding: L2-normalized question embedding (semantic caching
+                before the conversation starts)
+            user: User the generation is scheduled for by admission control
+            deadline: time.monotonic() value by which the answer is due
+            priority: Admission priority (lower is served first)
+            
+        Returns:
+            The turn, with the prompt tokens Ollama evaluated; it is recorded
+            in the session unless the generation failed
+            
+        Raises:
+            AdmissionRejected: If the generation cannot start before the deadline
+        """
+        admission = self._admission_slot(user, deadline, priority)
+        async with session.lock:
+            prompt, session_context = self._session_prompt(session, question, profile)
+            shared = not session.generated
+            generation = await self._respond(
+                question, prompt, profile, None, query_embedding if shared else None, admission,
+                session_context=session_context, shared=shared
+            )
+            if not generation.ok:
+                return ChatTurn(question, generation.answer)
+            if generation.cached:
+                return session.add_answer(question, generation.answer)
+            return session.add_generation(
+                question, generation.answer, generation.context, generation.prompt_eval_count,
+                continued=session_context is not None
+            )
+    
+    async def _respond(
+        self,
+        question: str,
+        prompt: str,
+        profile: str,
+        context: Optional[str],
+        query_embedding: Optional[np.ndarray],
+        admission,
+        session_context: Optional[Sequence[int]] = None,
+        shared: bool = True
+    ) -> Generation:
+        """
+        Answer a prompt from the response cache, a generation in flight or Ollama.
+        
+        Args:
+            session_context: Context token array the generation continues from
+            shared: Whether the answer may be shared with other calls (response
+                cache and coalescing); False for answers depending on a session
+        """
+        if shared and self.response_cache is not None:
+            cached = await self.response_cache.get(prompt, profile, context, query_embedding)
+            if cached is not None:
+                return Generation(cached, cached=True)
         
-        # Call Ollama API
         try:
-            logger.info(f"Calling Ollama for question: {question[:50]}...")
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.3,  # Very low for strict adherence to context
-                        "top_p": 0.8,  # Reduced for more focused responses
-                        "num_predict": 100  # Shorter responses to avoid elaboration
-                    }
-                },
-                timeout=30
+            await self.breaker.check()
+        except CircuitOpenError:
+            return Generation(ERROR_UNAVAILABLE, ok=False)
+        
+        def generate():
+            return self._generate(
+                question, prompt, profile, context, query_embedding, admission, session_context, shared
             )
+        
+        if not shared or self.coalescing is None:
+            return await generate()
+        return await self.coalescing.do(self._coalescing_key(prompt), generate)
+    
+    async def _generate(
+        self,
+        question: str,
+        prompt: str,
+        profile: str,
+        context: Optional[str],
+        query_embedding: Optional[np.ndarray],
+        admission,
+        session_context: Optional[Sequence[int]] = None,
+        cache: bool = True
+    ) -> Generation:
+        """Call Ollama once and cache the answer (errors are returned as user-facing messages)."""
+        # Call Ollama API
+        try:
+            async with admission:
+                logger.info(f"Calling Ollama for question: {question[:50]}...")
+                with OLLAMA_IN_FLIGHT.track_inprogress():
+                    response = await self.client.post(
+                        "/api/generate",
+                        json=self._build_payload(prompt, stream=False, context=session_context)
+                    )
             
+            # A 4xx is a rejected request, neither a failure nor a sign of health
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            elif response.is_success:
+                self.breaker.record_success()
             if response.status_code == 200:
-                answer = response.json()["response"].strip()
+                body = response.json()
+                answer = body["response"].strip()
                 logger.info(f"Ollama response generated successfully")
-                return answer
+                if cache and self.response_cache is not None:
+                    await self.response_cache.set(prompt, profile, answer, context, query_embedding)
+                return Generation(
+                    answer,
+                    context=body.get("context"),
+                    prompt_eval_count=body.get("prompt_eval_count")
+                )
             else:
                 logger.error(f"Ollama API error: {response.status_code} - {response.text}")
-                return "Désolé, je rencontre un problème technique. Veuillez réessayer."
+                return Generation(ERROR_TECHNICAL, ok=False)
                 
-        except requests.exceptions.Timeout:
+        except AdmissionRejected:
+            raise
+        except httpx.TimeoutException:
             logger.error("Ollama request timeout")
-            return "Désolé, la réponse prend trop de temps. Veuillez réessayer."
-        except requests.exceptions.ConnectionError:
+            self.breaker.record_failure()
+            return Generation(ERROR_TIMEOUT, ok=False)
+        except httpx.TransportError:
             logger.error("Cannot connect to Ollama service")
-            return "Désolé, le service de chat est temporairement indisponible."
+            self.breaker.record_failure()
+            return Generation(ERROR_UNAVAILABLE, ok=False)
         except Exception as e:
             logger.error(f"Ollama exception: {str(e)}")
-            return "Désolé, une erreur s'est produite. Veuillez réessayer."
+            return Generation(ERROR_GENERIC, ok=False)
+    
+    async def stream_response(
+        self,
+        question: str,
+        context: Optional[str] = None,
+        profile: str = "Unknown",
+        query_embedding: Optional[np.ndarray] = None,
+        user: str = "anonymous",
+        deadline: Optional[float] = None,
+        priority: int = PRIORITY_INTERACTIVE
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response from Ollama token by token.
+        
+        Concurrent streams of the same prompt subscribe to one upstream
+        generation; a subscriber joining late first receives the tokens
+        already produced. Closing the generator (e.g. when the HTTP client
+        disconnects and the consuming task is cancelled) unsubscribes it; the
+        upstream connection is closed, which makes Ollama abort the generation,
+        once no subscriber is left.
+        
+        Args:
+            question: User's question
+            context: RAG context if available (answer + domain from knowledge base)
+            profile: User's profile (CDI, CDD, CADRE, etc.)
+            query_embedding: L2-normalized question embedding (for the response cache)
+            
+        Yields:
+            Response fragments as Ollama produces them
+            
+        Raises:
+            OllamaError: If the generation fails (message is user-facing)
+        """
+        prompt = self._build_prompt(question, context, profile)
+        admission = self._admission_slot(user, deadline, priority)
+        tokens = self._shared_stream(question, prompt, profile, context, query_embedding, admission)
+        try:
+            async for token in tokens:
+                yield token
+        finally:
+            await tokens.aclose()
+    
+    async def stream_turn(
+        self,
+        session: ChatSession,
+        question: str,
+        profile: str = "Unknown",
+        query_embedding: Optional[np.ndarray] = None,
+        user: str = "anonymous",
+        deadline: Optional[float] = None,
+        priority: int = PRIORITY_INTERACTIVE
+    ) -> AsyncIterator[str]:
+        """
+        Stream the answer to the next turn of a chat session.
+        
+        Same prompts as generate_turn; until a turn of the session has been
+        generated, the stream may be shared with an identical generation in
+        flight. The session lock is only held while the prompt is built: the
+        turn is recorded once the stream has completed (without the context
+        when it was shared: the next turn then sends the full prompt), so
+        turns of one user streamed at the same time continue from the same
+        context.
+        
+        Yields:
+            Response fragments as Ollama produces them
+            
+        Raises:
+            OllamaError: If the generation fails (message is user-facing)
+        """
+        admission = self._admission_slot(user, deadline, priority)
+        # Wait for a non-streamed turn in progress, whose context this one continues
+        async with session.lock:
+            prompt, session_context = self._session_prompt(session, question, profile)
+            shared = not session.generated
+        
+        outcome: Dict[str, Any] = {}
+        if shared:
+            tokens = self._shared_stream(
+                question, prompt, profile, None, query_embedding, admission, outcome=outcome
+            )
+        else:
+            tokens = self._stream(
+                question, prompt, profile, None, None, admission,
+                session_context=session_context, cache=False, outcome=outcome
+            )
+        received = []
+        try:
+            async for token in tokens:
+                received.append(token)
+                yield token
+        finally:
+            await tokens.aclose()
+        
+        answer = "".join(received).strip()
+        if "prompt_eval_count" in outcome:
+            session.add_generation(
+                question, answer, outcome.get("context"), outcome["prompt_eval_count"],
+                continued=session_context is not None
+            )
+        else:
+            session.add_answer(question, answer)
+    
+    def _shared_stream(
+        self,
+        question: str,
+        prompt: str,
+        profile: str,
+        context: Optional[str],
+        query_embedding: Optional[np.ndarray],
+        admission,
+        outcome: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """Stream a generation, subscribing to an identical one in flight when coalescing is enabled."""
+        def upstream():
+            return self._stream(
+                question, prompt, profile, context, query_embedding, admission, outcome=outcome
+            )
+        
+        if self.coalescing is None:
+            return upstream()
+        return self.coalescing.stream(self._coalescing_key(prompt), upstream)
+    
+    async def _stream(
+        self,
+        question: str,
+        prompt: str,
+        profile: str,
+        context: Optional[str],
+        query_embedding: Optional[np.ndarray],
+        admission,
+        session_context: Optional[Sequence[int]] = None,
+        cache: bool = True,
+        outcome: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream one generation from Ollama and cache the complete answer.
+        
+        Fails with ERROR_UNAVAILABLE without calling Ollama while the breaker
+        is open. The context and prompt token count of the final chunk are
+        stored in outcome, if given.
+        """
+        try:
+            await self.breaker.check()
+        except CircuitOpenError:
+            raise OllamaError(ERROR_UNAVAILABLE)
+        
+        tokens = []
+        completed = False
+        
+        async with admission:
+            OLLAMA_IN_FLIGHT.inc()
+            try:
+                logger.info(f"Streaming Ollama response for question: {question[:50]}...")
+                async with self.client.stream(
+                    "POST",
+                    "/api/generate",
+                    json=self._build_payload(prompt, stream=True, context=session_context)
+                ) as response:
+                    if response.status_code >= 500:
+                        self.breaker.record_failure()
+                    elif response.is_success:
+                        self.breaker.record_success()
+                    if response.status_code != 200:
+                        body = await response.aread()
+                        logger.error(
+                            f"Ollama API error: {response.status_code} - "
+                            f"{body.decode('utf-8', 'replace')}"
+                        )
+                        raise OllamaError(ERROR_TECHNICAL)
+                
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get("error"):
+                            logger.error(f"Ollama stream error: {chunk['error']}")
+                            raise OllamaError(ERROR_TECHNICAL)
+                        token = chunk.get("response", "")
+                        if token:
+                            tokens.append(token)
+                            yield token
+                        if chunk.get("done"):
+                            completed = True
+                            if outcome is not None:
+                                outcome["context"] = chunk.get("context")
+                                outcome["prompt_eval_count"] = chunk.get("prompt_eval_count")
+                            break
+                logger.info("Ollama stream completed successfully")
+                if completed and cache and self.response_cache is not None:
+                    answer = "".join(tokens).strip()
+                    await self.response_cache.set(prompt, profile, answer, context, query_embedding)
+                
+            except httpx.TimeoutException:
+                logger.error("Ollama request timeout")
+                self.breaker.record_failure()
+                raise OllamaError(ERROR_TIMEOUT)
+            except httpx.TransportError:
+                logger.error("Cannot connect to Ollama service")
+                self.breaker.record_failure()
+                raise OllamaError(ERROR_UNAVAILABLE)
+            except ValueError as e:
+                logger.error(f"Invalid Ollama stream chunk: {str(e)}")
+                raise OllamaError(ERROR_GENERIC)
+            finally:
+                OLLAMA_IN_FLIGHT.dec()
+    
+    def _build_prompt(self, question: str, context: Optional[str], profile: str) -> str:
+        """Build the prompt based on whether we have RAG context."""
+        if context:
+            return self._build_prompt_with_context(question, context, profile)
+        return self._build_prompt_without_context(question, profile)
+    
+    def _session_prompt(
+        self,
+        session: ChatSession,
+        question: str,
+        profile: str
+    ) -> Tuple[str, Optional[Sequence[int]]]:
+        """Prompt of the next turn of a session, and the context it continues from (if any)."""
+        if not session.generated:
+            return self._build_prompt_without_context(question, profile), None
+        if session.context is not None:
+            return self._build_followup_prompt(question, session.pending), session.context
+        return self._build_prompt_without_context(question, profile, session.turns), None
+    
+    def _admission_slot(self, user: str, deadline: Optional[float], priority: int):
+        """Async context holding an admission slot (a no-op when admission control is disabled)."""
+        if self.admission is None:
+            return nullcontext()
+        if deadline is None:
+            deadline = time.monotonic() + settings.llm_request_deadline_seconds
+        return self.admission.slot(user, deadline, priority)
+    
+    def _coalescing_key(self, prompt: str) -> Tuple[str, str, str]:
+        """Identity of a generation: model, options and prompt."""
+        return (self.model, json.dumps(GENERATION_OPTIONS, sort_keys=True), prompt)
+    
+    def _build_payload(
+        self,
+        prompt: str,
+        stream: bool,
+        context: Optional[Sequence[int]] = None
+    ) -> Dict:
+        """Build the /api/generate request body (continuing from context, if given)."""
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": GENERATION_OPTIONS
+        }
+        if context is not None:
+            payload["context"] = list(context)
+        return payload
     
     def _build_prompt_with_context(
         self,
@@ -152,12 +626,22 @@ Réponse : "Pour déclarer des heures supplémentaires, passez via le manager et
 
 Réponds maintenant :"""
     
-    def _build_prompt_without_context(self, question: str, profile: str) -> str:
-        """Build prompt when no RAG context is available."""
+    def _build_prompt_without_context(
+        self,
+        question: str,
+        profile: str,
+        history: Sequence[ChatTurn] = ()
+    ) -> str:
+        """Build prompt when no RAG context is available (with the previous turns of a session, if any)."""
+        exchanges = "".join(
+            f"- Utilisateur: {turn.question}\n  Assistant: {turn.answer}\n" for turn in history
+        )
+        if exchanges:
+            exchanges = f"Échanges précédents:\n{exchanges}"
         return f"""Tu es l'assistant RH virtuel de l'entreprise Safran. Tu n'as pas de nom personnel.
 
 Profil de l'utilisateur: {profile}
-Question de l'utilisateur: {question}
+{exchanges}Question de l'utilisateur: {question}
 
 Instructions:
 - Si c'est une salutation (bonjour, salut, etc.), réponds exactement: "Bonjour ! Je suis l'assistant RH virtuel de Safran. Comment puis-je vous aider ?"
@@ -167,11 +651,29 @@ Instructions:
 
 Réponse:"""
     
-    def check_health(self) -> bool:
+    def _build_followup_prompt(self, question: str, answered: Sequence[ChatTurn]) -> str:
+        """Build the prompt of a follow-up question, sent with the context of the previous generation."""
+        exchanges = "".join(f"- {turn.question} → {turn.answer}\n" for turn in answered)
+        if exchanges:
+            exchanges = f"Questions répondues entre-temps par la base RH:\n{exchanges}\n"
+        return f"""{exchanges}Question de l'utilisateur: {question}
+
+Applique les mêmes instructions que précédemment.
+
+Réponse:"""
+    
+    async def check_health(self) -> bool:
         """Check if Ollama service is available."""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            response = await self.client.get(
+                "/api/tags",
+                timeout=settings.ollama_health_timeout_seconds
+            )
             return response.status_code == 200
         except Exception as e:
             logger.error(f"Ollama health check failed: {e}")
             return False
+
+
+# Global Ollama service instance (HTTP client is opened in the application lifespan)
+ollama_service = OllamaService()
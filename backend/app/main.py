@@ -3,10 +3,20 @@ FastAPI main application.
 HR Chatbot API with LDAP authentication and RAG-powered Q&A.
 """
 
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+import json
 import logging
+import numpy as np
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Depends, HTTPException, status
+from typing import AsyncIterator, List, Optional, Tuple
+from fastapi import FastAPI, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 from .config import settings
 from .models import (
@@ -15,18 +25,59 @@ from .models import (
     RefreshTokenRequest,
     ChatRequest,
     ChatResponse,
+    ChatSessionResponse,
+    ChatSessionStatsResponse,
+    ChatTurnResponse,
+    BatchChatRequest,
+    BatchChatResponse,
     UserProfile,
-    HealthResponse
+    HealthResponse,
+    ReadinessResponse,
+    CacheStatsResponse,
+    CacheInvalidationResponse,
+    LDAPPoolStatsResponse,
+    KnowledgeBaseReloadResponse,
+    EmbeddingBatchStatsResponse,
+    LLMAdmissionStatsResponse,
+    CircuitBreakerStatsResponse
 )
 from .auth import (
     create_access_token,
     create_refresh_token,
     verify_refresh_token,
-    get_current_user
+    get_current_user,
+    load_user_profile,
+    require_admin,
+    require_ldap_available,
+    profile_cache
 )
 from .ldap_service import ldap_service
 from .rag import rag_engine
-from .llm_service import OllamaService
+from .readiness import readiness
+from .metrics import (
+    CONTENT_TYPE_LATEST,
+    ROUTE_GREETING,
+    ROUTE_LLM_FALLBACK,
+    ROUTE_PROFILE_DENIED,
+    ROUTE_RAG_HIT,
+    ROUTE_SMALL_TALK,
+    STAGE_GREETING,
+    STAGE_OLLAMA,
+    ChatMetricsMiddleware,
+    StatsCollector,
+    observe_cache_operation,
+    observe_embedding_batch,
+    observe_prompt_eval,
+    register_stats_collector,
+    render_metrics
+)
+from .admission import PRIORITY_BATCH, AdmissionRejected
+from .llm_service import (
+    ollama_service,
+    OllamaError
+)
+from .sessions import sessions
+from .small_talk import small_talk
 
 # Configure logging
 logging.basicConfig(
@@ -35,27 +86,118 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+IMPORT_MS = (time.perf_counter() - _import_started) * 1000
+
+STARTUP_MODE_BLOCKING = "blocking"
+
+
+async def load_rag_engine():
+    """Load and warm up the RAG engine in a worker thread, updating readiness."""
+    started = time.perf_counter()
+    readiness.set("rag", False, "chargement en cours")
+    try:
+        if rag_engine.index is None:
+            await asyncio.to_thread(rag_engine.load)
+        else:
+            # Preloaded by the master process (app.prefork): only the model may be missing
+            await asyncio.to_thread(rag_engine.load_model)
+        await asyncio.to_thread(rag_engine.warm_up, settings.rag_warmup_queries)
+    except Exception as e:
+        logger.error(f"Failed to initialize RAG engine: {str(e)}")
+        readiness.set("rag", False, f"échec du chargement : {str(e)}")
+        raise
+    readiness.set("rag", True, f"{len(rag_engine.index)} entrées")
+    
+    total_ms = (time.perf_counter() - started) * 1000
+    phases = ", ".join(f"{name}={ms:.0f} ms" for name, ms in rag_engine.load_timings.items())
+    logger.info(f"RAG engine initialized successfully in {total_ms:.0f} ms ({phases})")
+
+
+async def watch_knowledge_base(interval: float, watch_csv: bool = True):
+    """
+    Poll the knowledge base and hot-reload it when it changes.
+    
+    Args:
+        interval: Seconds between checks
+        watch_csv: Reload when the CSV changes; otherwise only follow the KB
+            index artifact rewritten by the reload of another worker
+    """
+    def changed() -> bool:
+        return (watch_csv and rag_engine.has_changed()) or rag_engine.index_changed()
+    
+    while True:
+        await asyncio.sleep(interval)
+        if not rag_engine.ready:
+            continue
+        try:
+            if await asyncio.to_thread(changed):
+                logger.info("Knowledge base change detected, reloading")
+                await asyncio.to_thread(rag_engine.reload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Keep serving the previous index and retry on the next change
+            logger.error(f"Knowledge base reload failed: {str(e)}")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
     # Startup
+    started = time.perf_counter()
     logger.info("Starting HR Chatbot API...")
     logger.info(f"Environment: {settings.environment}")
     logger.info(f"LDAP Server: {settings.ldap_server_uri}")
     
-    # Initialize RAG engine
-    try:
-        rag_engine.load()
-        logger.info("RAG engine initialized successfully")
-    except Exception as e:
-        logger.error(f"Failed to initialize RAG engine: {str(e)}")
-        raise
+    readiness.register("rag")
+    readiness.register("ldap", check=lambda: asyncio.to_thread(ldap_service.check_health))
+    # Knowledge base answers do not need Ollama, so it does not gate readiness
+    readiness.register("ollama", required=False, check=ollama_service.check_health)
+    
+    # Initialize RAG engine, before serving or in the background
+    loader = None
+    if settings.startup_mode == STARTUP_MODE_BLOCKING:
+        await load_rag_engine()
+    else:
+        loader = asyncio.create_task(load_rag_engine())
+        # Failures are logged and reported by /ready
+        loader.add_done_callback(lambda task: task.cancelled() or task.exception())
+    
+    # Encode concurrent questions in micro-batches
+    if settings.rag_batch_enabled:
+        rag_engine.batcher.start()
+    
+    # Open the shared Ollama HTTP client
+    await ollama_service.start()
+    readiness.start(settings.readiness_check_interval_seconds)
+    
+    watcher = None
+    if settings.rag_watch_interval_seconds > 0:
+        watcher = asyncio.create_task(watch_knowledge_base(settings.rag_watch_interval_seconds))
+    elif settings.web_workers > 1 and settings.rag_worker_sync_interval_seconds > 0:
+        # A reload runs in the worker that received it: the others follow its KB index
+        watcher = asyncio.create_task(
+            watch_knowledge_base(settings.rag_worker_sync_interval_seconds, watch_csv=False)
+        )
+    
+    logger.info(
+        f"Startup timings: imports={IMPORT_MS:.0f} ms, "
+        f"lifespan={(time.perf_counter() - started) * 1000:.0f} ms, "
+        f"RAG engine loading {'done' if loader is None else 'in background'}"
+    )
     
     yield
     
     # Shutdown
     logger.info("Shutting down HR Chatbot API...")
+    if loader is not None:
+        loader.cancel()
+    if watcher is not None:
+        watcher.cancel()
+    await readiness.stop()
+    await rag_engine.batcher.close()
+    await ollama_service.close()
+    ldap_service.close()
 
 
 # Create FastAPI app
@@ -75,6 +217,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# In-flight and end-to-end duration metrics of the chat endpoints
+app.add_middleware(
+    ChatMetricsMiddleware,
+    endpoints={"/api/chat": "chat", "/api/chat/stream": "chat_stream", "/api/chat/batch": "chat_batch"}
+)
+
+
+def _all_cache_stats() -> List[dict]:
+    """Statistics of all caches, and of the exact question table."""
+    stats = [profile_cache.stats(), rag_engine.query_cache.stats(), rag_engine.exact_match_stats()]
+    if ollama_service.response_cache is not None:
+        stats.extend(ollama_service.response_cache.stats())
+    return stats
+
+
+# Export existing statistics at scrape time
+rag_engine.batcher.on_batch = observe_embedding_batch
+profile_cache.backend.on_operation = observe_cache_operation
+rag_engine.query_cache.backend.on_operation = observe_cache_operation
+if ollama_service.response_cache is not None:
+    ollama_service.response_cache.exact.backend.on_operation = observe_cache_operation
+sessions.on_generation = observe_prompt_eval
+register_stats_collector(StatsCollector(
+    cache_stats=_all_cache_stats,
+    pool_stats=ldap_service.pool_stats,
+    batcher_stats=lambda: rag_engine.batcher.stats(),
+    readiness=readiness.snapshot,
+    coalescing_stats=lambda: [ollama_service.coalescing.stats()] if ollama_service.coalescing else [],
+    admission_stats=lambda: [ollama_service.admission.stats()] if ollama_service.admission else [],
+    breaker_stats=lambda: [ollama_service.breaker.stats(), ldap_service.breaker.stats()],
+    session_stats=sessions.stats
+))
+
 
 # ================================
 # Health Check Endpoint
@@ -82,18 +257,53 @@ app.add_middleware(
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Health check endpoint."""
+    """Liveness check endpoint: the process is up and serving HTTP."""
     return HealthResponse(
         status="healthy",
         environment=settings.environment
     )
 
 
+@app.get(
+    "/ready",
+    response_model=ReadinessResponse,
+    responses={503: {"model": ReadinessResponse}}
+)
+async def readiness_check():
+    """
+    Readiness check endpoint.
+    
+    Reports the RAG engine, LDAP and Ollama from the results of background
+    checks; answers 503 until all required components are ready.
+    """
+    ready = readiness.is_ready()
+    response = ReadinessResponse(
+        status="ready" if ready else "not_ready",
+        components=readiness.snapshot()
+    )
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=response.model_dump()
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics (aggregated over all workers when serving with gunicorn)."""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
 # ================================
 # Authentication Endpoints
 # ================================
 
-@app.post("/api/auth/login", response_model=TokenResponse)
+@app.post(
+    "/api/auth/login",
+    response_model=TokenResponse,
+    dependencies=[Depends(require_ldap_available)]
+)
 async def login(request: LoginRequest):
     """
     Authenticate user with LDAP and return JWT tokens.
@@ -105,19 +315,34 @@ async def login(request: LoginRequest):
         Access and refresh tokens
         
     Raises:
-        HTTPException: If authentication fails
+        HTTPException: If authentication fails, or 503 while the LDAP circuit
+            breaker is open
     """
     # Authenticate against LDAP
-    if not ldap_service.authenticate_user(request.username, request.password):
+    authenticated = await run_in_threadpool(
+        ldap_service.authenticate_user, request.username, request.password
+    )
+    if not authenticated:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Nom d'utilisateur ou mot de passe incorrect",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Fetch the profile once to embed it in the access token
+    profile = None
+    if settings.jwt_profile_claims_enabled:
+        profile = await run_in_threadpool(load_user_profile, request.username)
+        if profile is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Nom d'utilisateur ou mot de passe incorrect",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+    
     # Create tokens
     token_data = {"sub": request.username}
-    access_token = create_access_token(token_data)
+    access_token = create_access_token(token_data, profile=profile)
     refresh_token = create_refresh_token(token_data)
     
     logger.info(f"User {request.username} logged in successfully")
@@ -159,9 +384,21 @@ async def refresh_token(request: RefreshTokenRequest):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Re-fetch the profile so refreshed claims reflect the directory
+    profile = None
+    if settings.jwt_profile_claims_enabled:
+        await require_ldap_available()
+        profile = await run_in_threadpool(load_user_profile, username)
+        if profile is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token de rafraîchissement invalide",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+    
     # Create new tokens
     token_data = {"sub": username}
-    access_token = create_access_token(token_data)
+    access_token = create_access_token(token_data, profile=profile)
     new_refresh_token = create_refresh_token(token_data)
     
     logger.info(f"Tokens refreshed for user {username}")
@@ -194,7 +431,146 @@ async def get_profile(current_user: UserProfile = Depends(get_current_user)):
 # Chat Endpoint
 # ================================
 
-@app.post("/api/chat", response_model=ChatResponse)
+# Minimum similarity for a knowledge base answer to be returned directly
+RAG_THRESHOLD = 0.65  # Adjusted from 0.75 to better detect question variations
+
+PROFILE_DENIED_ANSWER = (
+    "Désolé, cette information n'est pas disponible pour votre profil. "
+    "Pour plus d'informations, veuillez contacter le service RH."
+)
+
+LLM_OVERLOADED_ANSWER = "Le service est très sollicité, veuillez réessayer dans quelques instants."
+
+
+async def require_rag_ready():
+    """Reject chat requests while the RAG engine is still loading."""
+    if not rag_engine.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Le service démarre, veuillez réessayer dans quelques instants.",
+            headers={"Retry-After": "5"},
+        )
+
+
+def _small_talk_response(
+    message: str,
+    current_user: UserProfile
+) -> Tuple[bool, Optional[ChatResponse]]:
+    """
+    Recognize greetings and small talk (answered without the knowledge base).
+    
+    In local mode, a message made only of small talk is answered from its
+    template; a greeting followed by a real question takes the normal route.
+    In llm mode, any recognized small talk is sent to Ollama alone.
+    
+    Returns:
+        Whether the message is small talk, and its template response (None
+        when Ollama must answer)
+    """
+    with STAGE_GREETING.time():
+        found = small_talk.match(message)
+    if found is None:
+        return False, None
+    if settings.small_talk_mode == "local":
+        if not found.complete:
+            return False, None
+        logger.info(f"Detected small talk ({found.intent}) - answering from template")
+        ROUTE_SMALL_TALK.inc()
+        return True, ChatResponse(
+            question=message,
+            answer=found.response,
+            profile=current_user.employee_type,
+            domain=None
+        )
+    logger.info("Detected greeting/conversational - using Ollama alone")
+    ROUTE_GREETING.inc()
+    return True, None
+
+
+def _rag_response(
+    message: str,
+    current_user: UserProfile,
+    rag_result: Tuple[Optional[str], Optional[str], float, bool]
+) -> Optional[ChatResponse]:
+    """
+    Turn a knowledge base search result into the response to send.
+    
+    Returns:
+        The RAG answer or profile denial, or None when Ollama must answer
+    """
+    rag_answer, domain, similarity, profile_allowed = rag_result
+    
+    # Check for profile mismatch
+    if not profile_allowed:
+        logger.warning(f"Access denied for user {current_user.username} (profile: {current_user.employee_type})")
+        ROUTE_PROFILE_DENIED.inc()
+        return ChatResponse(
+            question=message,
+            answer=PROFILE_DENIED_ANSWER,
+            profile=current_user.employee_type,
+            domain=None
+        )
+    
+    if rag_answer and similarity >= RAG_THRESHOLD:
+        # RAG found relevant answer - return it directly with minimal formatting
+        # This preserves the exact facts from the knowledge base
+        logger.info(f"Using RAG answer directly (similarity: {similarity:.3f})")
+        ROUTE_RAG_HIT.inc()
+        return ChatResponse(
+            question=message,
+            answer=rag_answer,
+            profile=current_user.employee_type,
+            domain=domain
+        )
+    
+    logger.info("No RAG match - using Ollama for general response")
+    ROUTE_LLM_FALLBACK.inc()
+    return None
+
+
+async def _answer_without_llm(message: str, current_user: UserProfile) -> Optional[ChatResponse]:
+    """
+    Resolve a chat message from the knowledge base when possible.
+    
+    Returns:
+        The response to send (RAG answer or profile denial), or None when the
+        message must be answered by Ollama (small talk in llm mode, or no match)
+    """
+    # Step 1: Check if it's a greeting or conversational question
+    is_small_talk, small_talk_response = _small_talk_response(message, current_user)
+    if is_small_talk:
+        return small_talk_response
+    
+    # Step 2: Search RAG knowledge base with adjusted threshold for better variation detection
+    rag_result = await rag_engine.asearch_knowledge(
+        question=message,
+        employee_type=current_user.employee_type,
+        threshold=RAG_THRESHOLD
+    )
+    return _rag_response(message, current_user, rag_result)
+
+
+def _llm_overloaded(error: AdmissionRejected) -> HTTPException:
+    """503 answer for a generation rejected by admission control."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=LLM_OVERLOADED_ANSWER,
+        headers={"Retry-After": error.retry_after_header},
+    )
+
+
+async def _query_embedding(message: str) -> Optional[np.ndarray]:
+    """Question embedding for semantic response caching (None if unavailable)."""
+    if not settings.llm_semantic_cache_enabled:
+        return None
+    try:
+        return await rag_engine.aencode_query(message)
+    except Exception as e:
+        logger.warning(f"Could not embed question for response cache: {str(e)}")
+        return None
+
+
+@app.post("/api/chat", response_model=ChatResponse, dependencies=[Depends(require_rag_ready)])
 async def chat(
     request: ChatRequest,
     current_user: UserProfile = Depends(get_current_user)
@@ -203,87 +579,453 @@ async def chat(
     Chat endpoint with Ollama LLM + RAG hybrid approach.
     
     Flow:
-    1. Check if it's a greeting or conversational question → Ollama alone
-    2. Search RAG knowledge base for relevant answer (threshold 0.75)
-    3. If relevant (similarity ≥ 0.75), use Ollama with RAG context
+    1. Check if it's a greeting or conversational question → template answer
+       (or Ollama alone when SMALL_TALK_MODE=llm)
+    2. Search RAG knowledge base for relevant answer (threshold 0.65)
+    3. If relevant and allowed for the user's profile, return the RAG answer directly
     4. If not relevant, use Ollama alone for general conversation
-    """
-    from .llm_service import is_greeting, is_conversational
     
+    With chat sessions, every answer is added to the user's session, and
+    Ollama answers a follow-up from the context of the previous generation
+    (prompt_eval_count reports the prompt tokens it evaluated).
+    
+    Ollama calls go through admission control: when a generation cannot
+    start before the request deadline, the answer is 503 with Retry-After.
+    """
+    deadline = time.monotonic() + settings.llm_request_deadline_seconds
     logger.info(
         f"Chat request from {current_user.username} "
         f"({current_user.employee_type}): {request.message}"
     )
+    session = sessions.get(current_user.username)
     
-    # Initialize Ollama service
-    ollama = OllamaService()
+    direct_response = await _answer_without_llm(request.message, current_user)
+    if direct_response is not None:
+        if session is not None:
+            session.add_answer(request.message, direct_response.answer)
+        return direct_response
     
-    # Step 1: Check if it's a greeting or conversational question
-    if is_greeting(request.message) or is_conversational(request.message):
-        logger.info("Detected greeting/conversational - using Ollama alone")
-        response = ollama.generate_response(
-            question=request.message,
-            context=None,
-            profile=current_user.employee_type
-        )
-        
-        return ChatResponse(
-            question=request.message,
-            answer=response,
-            profile=current_user.employee_type,
-            domain=None  # No domain for greetings
-        )
+    query_embedding = await _query_embedding(request.message)
+    prompt_eval_count = None
+    try:
+        with STAGE_OLLAMA.time():
+            if session is None:
+                response = await ollama_service.generate_response(
+                    question=request.message,
+                    context=None,
+                    profile=current_user.employee_type,
+                    query_embedding=query_embedding,
+                    user=current_user.username,
+                    deadline=deadline
+                )
+            else:
+                turn = await ollama_service.generate_turn(
+                    session,
+                    question=request.message,
+                    profile=current_user.employee_type,
+                    query_embedding=query_embedding,
+                    user=current_user.username,
+                    deadline=deadline
+                )
+                response, prompt_eval_count = turn.answer, turn.prompt_eval_count
+    except AdmissionRejected as e:
+        raise _llm_overloaded(e)
     
-    # Step 2: Search RAG knowledge base with adjusted threshold for better variation detection
-    rag_answer, domain, similarity, profile_allowed = rag_engine.search_knowledge(
+    return ChatResponse(
         question=request.message,
+        answer=response,
+        profile=current_user.employee_type,
+        domain=None,
+        prompt_eval_count=prompt_eval_count
+    )
+
+
+@app.post(
+    "/api/chat/batch",
+    response_model=BatchChatResponse,
+    dependencies=[Depends(require_rag_ready)]
+)
+async def chat_batch(
+    request: BatchChatRequest,
+    current_user: UserProfile = Depends(get_current_user)
+):
+    """
+    Answer several chat messages of the authenticated user in one request.
+    
+    Each message is routed as in /api/chat, but the user is authenticated
+    once, greeting detection runs over the whole list, the other questions are
+    encoded in one batch and compared with the knowledge base together, and
+    LLM fallbacks run concurrently (at most CHAT_BATCH_LLM_CONCURRENCY at a
+    time, at batch priority under admission control). A fallback rejected by
+    admission control is answered with an overload message instead of failing
+    the whole batch. Results come back in the order of the messages.
+    """
+    messages = request.messages
+    if len(messages) > settings.chat_batch_max_messages:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Au plus {settings.chat_batch_max_messages} messages par requête"
+        )
+    deadline = time.monotonic() + settings.llm_request_deadline_seconds
+    logger.info(
+        f"Batch chat request from {current_user.username} "
+        f"({current_user.employee_type}): {len(messages)} messages"
+    )
+    
+    responses: List[Optional[ChatResponse]] = [None] * len(messages)
+    searched = []
+    for i, message in enumerate(messages):
+        is_small_talk, responses[i] = _small_talk_response(message, current_user)
+        if not is_small_talk:
+            searched.append(i)
+    rag_results = await rag_engine.asearch_knowledge_batch(
+        [messages[i] for i in searched],
         employee_type=current_user.employee_type,
-        threshold=0.65  # Adjusted from 0.75 to better detect question variations
+        threshold=RAG_THRESHOLD
     )
+    for i, rag_result in zip(searched, rag_results):
+        responses[i] = _rag_response(messages[i], current_user, rag_result)
     
-    # Check for profile mismatch
-    if not profile_allowed:
-        logger.warning(f"Access denied for user {current_user.username} (profile: {current_user.employee_type})")
-        return ChatResponse(
-            question=request.message,
-            answer="Désolé, cette information n'est pas disponible pour votre profil. Pour plus d'informations, veuillez contacter le service RH.",
+    pending = [i for i, response in enumerate(responses) if response is None]
+    query_embeddings: List[Optional[np.ndarray]] = [None] * len(pending)
+    if pending and settings.llm_semantic_cache_enabled:
+        try:
+            query_embeddings = list(await rag_engine.aencode_queries([messages[i] for i in pending]))
+        except Exception as e:
+            logger.warning(f"Could not embed questions for response cache: {str(e)}")
+    
+    limit = asyncio.Semaphore(max(1, settings.chat_batch_llm_concurrency))
+    
+    async def fallback(i: int, query_embedding: Optional[np.ndarray]):
+        async with limit:
+            try:
+                with STAGE_OLLAMA.time():
+                    answer = await ollama_service.generate_response(
+                        question=messages[i],
+                        context=None,
+                        profile=current_user.employee_type,
+                        query_embedding=query_embedding,
+                        user=current_user.username,
+                        deadline=deadline,
+                        priority=PRIORITY_BATCH
+                    )
+            except AdmissionRejected:
+                answer = LLM_OVERLOADED_ANSWER
+        responses[i] = ChatResponse(
+            question=messages[i],
+            answer=answer,
             profile=current_user.employee_type,
             domain=None
         )
     
-    # Step 3: Generate response
-    if rag_answer and similarity >= 0.65:
-        # RAG found relevant answer - return it directly with minimal formatting
-        # This preserves the exact facts from the knowledge base
-        logger.info(f"Using RAG answer directly (similarity: {similarity:.3f})")
-        
-        # Return strict answer without prefix as requested
-        formatted_answer = rag_answer
-        
-        return ChatResponse(
+    await asyncio.gather(*(fallback(i, embedding) for i, embedding in zip(pending, query_embeddings)))
+    return BatchChatResponse(results=responses)
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/api/chat/stream", dependencies=[Depends(require_rag_ready)])
+async def chat_stream(
+    request: ChatRequest,
+    http_request: Request,
+    current_user: UserProfile = Depends(get_current_user)
+):
+    """
+    Streaming chat endpoint (Server-Sent Events).
+    
+    Same routing as /api/chat. Events:
+    - ``answer``: complete response (small talk template, RAG answer, profile denial or cached
+      LLM answer), sent once
+    - ``token``: one fragment of an Ollama answer, relayed as soon as it is produced
+    - ``done``: complete response once the Ollama stream has finished
+    - ``error``: the generation failed, with a user-facing message
+    
+    When the client disconnects, the streaming task is cancelled, which closes
+    the upstream Ollama connection and stops the generation.
+    
+    Admission control rejects a generation before its first token, so the
+    first token is awaited before the response starts: a rejected request is
+    answered 503 with Retry-After instead of an event stream.
+    
+    With chat sessions, answers are added to the user's session as in
+    /api/chat; once the user has had a generated answer, the LLM answer to a
+    follow-up is never served from the cache.
+    """
+    deadline = time.monotonic() + settings.llm_request_deadline_seconds
+    logger.info(
+        f"Streaming chat request from {current_user.username} "
+        f"({current_user.employee_type}): {request.message}"
+    )
+    session = sessions.get(current_user.username)
+    
+    direct_response = await _answer_without_llm(request.message, current_user)
+    query_embedding = None
+    if direct_response is None and (session is None or not session.generated):
+        query_embedding = await _query_embedding(request.message)
+        cached_answer = await ollama_service.get_cached_response(
             question=request.message,
-            answer=formatted_answer,
+            context=None,
             profile=current_user.employee_type,
-            domain=domain
+            query_embedding=query_embedding
         )
-    else:
-        # No RAG answer or low similarity - use Ollama for general response
-        logger.info("No RAG match - using Ollama for general response")
-        response = ollama.generate_response(
+        if cached_answer is not None:
+            direct_response = ChatResponse(
+                question=request.message,
+                answer=cached_answer,
+                profile=current_user.employee_type,
+                domain=None
+            )
+    
+    if direct_response is not None and session is not None:
+        session.add_answer(request.message, direct_response.answer)
+    
+    generation_started = time.perf_counter()
+    tokens: Optional[AsyncIterator[str]] = None
+    first_token: Optional[str] = None
+    first_error: Optional[OllamaError] = None
+    if direct_response is None and session is None:
+        tokens = ollama_service.stream_response(
             question=request.message,
             context=None,
-            profile=current_user.employee_type
+            profile=current_user.employee_type,
+            query_embedding=query_embedding,
+            user=current_user.username,
+            deadline=deadline
         )
-        domain = None
+    elif direct_response is None:
+        tokens = ollama_service.stream_turn(
+            session,
+            question=request.message,
+            profile=current_user.employee_type,
+            query_embedding=query_embedding,
+            user=current_user.username,
+            deadline=deadline
+        )
+    if tokens is not None:
+        try:
+            first_token = await anext(tokens, None)
+        except AdmissionRejected as e:
+            STAGE_OLLAMA.observe(time.perf_counter() - generation_started)
+            raise _llm_overloaded(e)
+        except OllamaError as e:
+            first_error = e
     
-    return ChatResponse(
-        question=request.message,
-        answer=response,
-        profile=current_user.employee_type,
-        domain=domain
+    async def event_stream():
+        if direct_response is not None:
+            yield _sse_event("answer", direct_response.model_dump())
+            return
+        
+        received = []
+        try:
+            if first_error is not None:
+                yield _sse_event("error", {"detail": str(first_error)})
+                return
+            
+            if await http_request.is_disconnected():
+                logger.info(f"Client {current_user.username} disconnected before the first token")
+                return
+            
+            if first_token is not None:
+                received.append(first_token)
+                yield _sse_event("token", {"token": first_token})
+                async for token in tokens:
+                    received.append(token)
+                    yield _sse_event("token", {"token": token})
+        except OllamaError as e:
+            yield _sse_event("error", {"detail": str(e)})
+            return
+        except asyncio.CancelledError:
+            logger.info(
+                f"Client {current_user.username} disconnected, "
+                f"upstream generation cancelled after {len(received)} tokens"
+            )
+            raise
+        finally:
+            await tokens.aclose()
+            STAGE_OLLAMA.observe(time.perf_counter() - generation_started)
+        
+        yield _sse_event("done", ChatResponse(
+            question=request.message,
+            answer="".join(received).strip(),
+            profile=current_user.employee_type,
+            domain=None
+        ).model_dump())
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering so tokens flush immediately
+        }
+    )
+
+
+@app.get("/api/chat/session", response_model=ChatSessionResponse)
+async def chat_session(current_user: UserProfile = Depends(get_current_user)):
+    """Get the recent turns of the user's chat session, with the prompt tokens of each generation."""
+    session = sessions.get(current_user.username, create=False)
+    if session is None:
+        return ChatSessionResponse(turns=[], context_tokens=0)
+    return ChatSessionResponse(
+        turns=[ChatTurnResponse(**turn._asdict()) for turn in session.turns],
+        context_tokens=session.context_tokens()
     )
 
 
+@app.delete("/api/chat/session", response_model=CacheInvalidationResponse)
+async def reset_chat_session(current_user: UserProfile = Depends(get_current_user)):
+    """End the user's chat session: the next question starts a new conversation."""
+    invalidated = int(sessions.reset(current_user.username))
+    return CacheInvalidationResponse(invalidated=invalidated)
+
+
+# ================================
+# Admin Endpoints
+# ================================
+
+@app.get(
+    "/api/admin/cache",
+    response_model=List[CacheStatsResponse],
+    dependencies=[Depends(require_admin)]
+)
+async def cache_stats():
+    """Get statistics of all caches."""
+    return [CacheStatsResponse(**cache_stats) for cache_stats in _all_cache_stats()]
+
+
+@app.get(
+    "/api/admin/cache/profiles",
+    response_model=CacheStatsResponse,
+    dependencies=[Depends(require_admin)]
+)
+async def profile_cache_stats():
+    """Get LDAP profile cache statistics."""
+    return CacheStatsResponse(**profile_cache.stats())
+
+
+@app.delete(
+    "/api/admin/cache/profiles",
+    response_model=CacheInvalidationResponse,
+    dependencies=[Depends(require_admin)]
+)
+async def invalidate_profile_cache():
+    """Invalidate the whole LDAP profile cache."""
+    invalidated = await profile_cache.aclear()
+    logger.info(f"Profile cache cleared ({invalidated} entries)")
+    return CacheInvalidationResponse(invalidated=invalidated)
+
+
+@app.delete(
+    "/api/admin/cache/profiles/{username}",
+    response_model=CacheInvalidationResponse,
+    dependencies=[Depends(require_admin)]
+)
+async def invalidate_user_profile(username: str):
+    """Invalidate the cached LDAP profile of one user."""
+    invalidated = int(await profile_cache.adelete(username))
+    logger.info(f"Profile cache invalidated for user {username}")
+    return CacheInvalidationResponse(invalidated=invalidated)
+
+
+@app.get(
+    "/api/admin/ldap/pools",
+    response_model=List[LDAPPoolStatsResponse],
+    dependencies=[Depends(require_admin)]
+)
+async def ldap_pool_stats():
+    """Get LDAP connection pool statistics."""
+    return [LDAPPoolStatsResponse(**stats) for stats in ldap_service.pool_stats()]
+
+
+@app.post(
+    "/api/admin/kb/reload",
+    response_model=KnowledgeBaseReloadResponse,
+    dependencies=[Depends(require_admin)]
+)
+async def reload_knowledge_base():
+    """
+    Hot-reload the knowledge base CSV.
+    
+    Only new or edited questions are re-encoded; chat requests keep being
+    answered from the previous index until the new one is swapped in.
+    
+    With several workers (WEB_WORKERS), the reload runs in the worker that
+    received the request, which rewrites the KB index artifact; the other
+    workers map it within RAG_WORKER_SYNC_INTERVAL_SECONDS. They cannot
+    follow when the index directory is not writable.
+    """
+    try:
+        stats = await run_in_threadpool(rag_engine.reload)
+    except (OSError, ValueError) as e:
+        logger.error(f"Knowledge base reload failed: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Rechargement de la base de connaissances impossible : {str(e)}"
+        )
+    return KnowledgeBaseReloadResponse(**stats)
+
+
+@app.get(
+    "/api/admin/rag/batching",
+    response_model=EmbeddingBatchStatsResponse,
+    dependencies=[Depends(require_admin)]
+)
+async def embedding_batch_stats():
+    """Get question encoding micro-batching statistics."""
+    return EmbeddingBatchStatsResponse(**rag_engine.batcher.stats())
+
+
+@app.get(
+    "/api/admin/llm/admission",
+    response_model=LLMAdmissionStatsResponse,
+    dependencies=[Depends(require_admin)]
+)
+async def llm_admission_stats():
+    """Get LLM admission control statistics (queue depth, wait times, rejections)."""
+    if ollama_service.admission is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Admission control disabled")
+    return LLMAdmissionStatsResponse(**ollama_service.admission.stats())
+
+
+@app.get(
+    "/api/admin/breakers",
+    response_model=List[CircuitBreakerStatsResponse],
+    dependencies=[Depends(require_admin)]
+)
+async def circuit_breaker_stats():
+    """Get the state of the Ollama and LDAP circuit breakers."""
+    return [
+        CircuitBreakerStatsResponse(**breaker.stats())
+        for breaker in (ollama_service.breaker, ldap_service.breaker)
+    ]
+
+
+@app.get(
+    "/api/admin/sessions",
+    response_model=ChatSessionStatsResponse,
+    dependencies=[Depends(require_admin)]
+)
+async def chat_session_stats():
+    """Get chat session statistics (sessions held, evictions, prompt tokens per generation mode)."""
+    return ChatSessionStatsResponse(**sessions.stats())
+
+
+@app.delete(
+    "/api/admin/sessions",
+    response_model=CacheInvalidationResponse,
+    dependencies=[Depends(require_admin)]
+)
+async def clear_chat_sessions():
+    """End all chat sessions."""
+    invalidated = sessions.clear()
+    logger.info(f"Chat sessions cleared ({invalidated} sessions)")
+    return CacheInvalidationResponse(invalidated=invalidated)
+
+
 # ================================
 # Root Endpoint
 # ================================
@@ -0,0 +1,372 @@
+"""
+Prometheus metrics.
+
+Hot-path instrumentation uses label children bound once at import time, so
+timing a stage costs a clock read and a bucket increment. Statistics kept
+elsewhere (caches, LDAP pools, embedding batcher, readiness) are not
+duplicated: StatsCollector reads them when /metrics is scraped.
+
+With several worker processes (gunicorn.conf.py sets PROMETHEUS_MULTIPROC_DIR
+before this module is imported), every worker writes its samples to files in
+that directory and /metrics aggregates them, whichever worker answers. The
+statistics read at scrape time are those of the answering worker, labelled
+with its process id.
+"""
+
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from .circuit_breaker import STATE_VALUES
+
+__all__ = ["CONTENT_TYPE_LATEST", "render_metrics"]
+
+# Directory of the per-process sample files, None when serving from one process
+MULTIPROCESS_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or None
+
+# Sub-millisecond stages (JWT, greeting regexes, similarity) up to long LLM calls
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+CHAT_STAGE_SECONDS = Histogram(
+    "hr_chat_stage_duration_seconds",
+    "Duration of each stage of chat request handling",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+STAGE_JWT = CHAT_STAGE_SECONDS.labels("jwt")
+STAGE_LDAP_PROFILE = CHAT_STAGE_SECONDS.labels("ldap_profile")
+STAGE_GREETING = CHAT_STAGE_SECONDS.labels("greeting")
+STAGE_ENCODE = CHAT_STAGE_SECONDS.labels("encode")
+STAGE_SIMILARITY = CHAT_STAGE_SECONDS.labels("similarity")
+STAGE_OLLAMA = CHAT_STAGE_SECONDS.labels("ollama")
+
+CHAT_REQUEST_SECONDS = Histogram(
+    "hr_chat_request_duration_seconds",
+    "End-to-end duration of chat requests (until the last byte for streams)",
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS
+)
+
+CHAT_ROUTE_TOTAL = Counter(
+    "hr_chat_route_total",
+    "Routing decision of chat requests",
+    ["route"]
+)
+ROUTE_GREETING = CHAT_ROUTE_TOTAL.labels("greeting")
+ROUTE_SMALL_TALK = CHAT_ROUTE_TOTAL.labels("small_talk")
+ROUTE_RAG_HIT = CHAT_ROUTE_TOTAL.labels("rag_hit")
+ROUTE_PROFILE_DENIED = CHAT_ROUTE_TOTAL.labels("profile_denied")
+ROUTE_LLM_FALLBACK = CHAT_ROUTE_TOTAL.labels("llm_fallback")
+
+CHAT_IN_FLIGHT = Gauge(
+    "hr_chat_requests_in_flight",
+    "Chat requests being handled",
+    ["endpoint"],
+    multiprocess_mode="livesum"
+)
+OLLAMA_IN_FLIGHT = Gauge(
+    "hr_ollama_requests_in_flight",
+    "Generation requests in progress on Ollama",
+    multiprocess_mode="livesum"
+)
+OLLAMA_COALESCING_TOTAL = Counter(
+    "hr_ollama_coalescing_total",
+    "Generation calls by single-flight role (followers share the generation of a leader)",
+    ["mode", "role"]
+)
+LLM_QUEUE_WAIT_SECONDS = Histogram(
+    "hr_llm_queue_wait_seconds",
+    "Time generations wait for an admission slot",
+    buckets=LATENCY_BUCKETS
+)
+LLM_REJECTED_TOTAL = Counter(
+    "hr_llm_rejected_total",
+    "Generations rejected by admission control",
+    ["reason"]
+)
+BREAKER_TRANSITIONS_TOTAL = Counter(
+    "hr_circuit_breaker_transitions_total",
+    "Circuit breaker state transitions",
+    ["breaker", "state"]
+)
+
+CACHE_BACKEND_SECONDS = Histogram(
+    "hr_cache_backend_duration_seconds",
+    "Duration of cache backend operations (one round trip for bulk operations on a shared store)",
+    ["cache", "backend", "operation"],
+    buckets=LATENCY_BUCKETS
+)
+
+LLM_PROMPT_EVAL_TOKENS = Histogram(
+    "hr_llm_prompt_eval_tokens",
+    "Prompt tokens evaluated per session generation (full prompt, or continued from the session context)",
+    ["mode"],
+    buckets=(8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+)
+
+EMBEDDING_BATCH_SIZE = Histogram(
+    "hr_embedding_batch_size",
+    "Questions encoded per micro-batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+EMBEDDING_QUEUE_WAIT_SECONDS = Histogram(
+    "hr_embedding_queue_wait_seconds",
+    "Time questions wait in the micro-batching queue",
+    buckets=LATENCY_BUCKETS
+)
+
+
+class ChatMetricsMiddleware:
+    """ASGI middleware tracking in-flight chat requests and their end-to-end duration."""
+
+    def __init__(self, app, endpoints: Dict[str, str]):
+        """
+        Args:
+            app: ASGI application
+            endpoints: Label of each tracked path
+        """
+        self.app = app
+        self.tracked = {
+            path: (CHAT_IN_FLIGHT.labels(label), CHAT_REQUEST_SECONDS.labels(label))
+            for path, label in endpoints.items()
+        }
+
+    async def __call__(self, scope, receive, send):
+        tracked = self.tracked.get(scope["path"]) if scope["type"] == "http" else None
+        if tracked is None:
+            await self.app(scope, receive, send)
+            return
+        in_flight, duration = tracked
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            in_flight.dec()
+            duration.observe(time.perf_counter() - started)
+
+
+def observe_embedding_batch(size: int, waits: List[float]):
+    """EmbeddingBatcher.on_batch callback."""
+    EMBEDDING_BATCH_SIZE.observe(size)
+    for wait in waits:
+        EMBEDDING_QUEUE_WAIT_SECONDS.observe(wait)
+
+
+def observe_cache_operation(cache: str, backend: str, operation: str, seconds: float):
+    """CacheBackend.on_operation callback."""
+    CACHE_BACKEND_SECONDS.labels(cache, backend, operation).observe(seconds)
+
+
+def observe_prompt_eval(mode: str, tokens: int):
+    """SessionStore.on_generation callback."""
+    LLM_PROMPT_EVAL_TOKENS.labels(mode).observe(tokens)
+
+
+def observe_coalescing(mode: str, role: str):
+    """SingleFlight.on_call callback."""
+    OLLAMA_COALESCING_TOTAL.labels(mode, role).inc()
+
+
+def observe_admission(waited: float):
+    """AdmissionController.on_admit callback."""
+    LLM_QUEUE_WAIT_SECONDS.observe(waited)
+
+
+def observe_rejection(reason: str):
+    """AdmissionController.on_reject callback."""
+    LLM_REJECTED_TOTAL.labels(reason).inc()
+
+
+def observe_breaker_transition(name: str, previous: str, state: str):
+    """CircuitBreaker.on_transition callback."""
+    BREAKER_TRANSITIONS_TOTAL.labels(name, state).inc()
+
+
+class StatsCollector(Collector):
+    """Export statistics dictionaries of the application at scrape time."""
+
+    def __init__(
+        self,
+        cache_stats: Callable[[], Iterable[Dict[str, Any]]],
+        pool_stats: Callable[[], Iterable[Dict[str, Any]]],
+        batcher_stats: Callable[[], Dict[str, Any]],
+        readiness: Callable[[], Dict[str, Dict[str, Any]]],
+        coalescing_stats: Callable[[], Iterable[Dict[str, Any]]],
+        admission_stats: Callable[[], Iterable[Dict[str, Any]]],
+        breaker_stats: Callable[[], Iterable[Dict[str, Any]]],
+        session_stats: Callable[[], Dict[str, Any]]
+    ):
+        """
+        Args:
+            cache_stats: Returns TTLCache.stats()-like dictionaries
+            pool_stats: Returns LDAPConnectionPool.stats() dictionaries
+            batcher_stats: Returns EmbeddingBatcher.stats()
+            readiness: Returns ReadinessMonitor.snapshot()
+            coalescing_stats: Returns SingleFlight.stats() dictionaries
+            admission_stats: Returns AdmissionController.stats() dictionaries
+            breaker_stats: Returns CircuitBreaker.stats() dictionaries
+            session_stats: Returns SessionStore.stats()
+        """
+        self.cache_stats = cache_stats
+        self.pool_stats = pool_stats
+        self.batcher_stats = batcher_stats
+        self.readiness = readiness
+        self.coalescing_stats = coalescing_stats
+        self.admission_stats = admission_stats
+        self.breaker_stats = breaker_stats
+        self.session_stats = session_stats
+
+    def collect(self):
+        cache_size = GaugeMetricFamily("hr_cache_entries", "Entries in a cache", labels=["cache"])
+        cache_lookups = CounterMetricFamily(
+            "hr_cache_lookups", "Cache lookups by result", labels=["cache", "result"]
+        )
+        cache_removals = CounterMetricFamily(
+            "hr_cache_removals", "Cache entries removed by reason", labels=["cache", "reason"]
+        )
+        cache_errors = CounterMetricFamily(
+            "hr_cache_backend_errors", "Failed cache backend operations", labels=["cache", "backend"]
+        )
+        for stats in self.cache_stats():
+            name = stats["name"]
+            cache_size.add_metric([name], stats["size"])
+            cache_lookups.add_metric([name, "hit"], stats["hits"])
+            cache_lookups.add_metric([name, "miss"], stats["misses"])
+            cache_removals.add_metric([name, "eviction"], stats["evictions"])
+            cache_removals.add_metric([name, "expiration"], stats["expirations"])
+            cache_errors.add_metric([name, stats.get("backend", "local")], stats.get("errors", 0))
+        yield cache_size
+        yield cache_lookups
+        yield cache_removals
+        yield cache_errors
+
+        pool_connections = GaugeMetricFamily(
+            "hr_ldap_pool_connections", "LDAP pool connections by state", labels=["pool", "state"]
+        )
+        pool_events = CounterMetricFamily(
+            "hr_ldap_pool_events", "LDAP pool events", labels=["pool", "event"]
+        )
+        for stats in self.pool_stats():
+            name = stats["name"]
+            pool_connections.add_metric([name, "idle"], stats["idle"])
+            pool_connections.add_metric([name, "in_use"], stats["in_use"])
+            for event in ("created", "reconnects", "discarded", "timeouts"):
+                pool_events.add_metric([name, event], stats[event])
+        yield pool_connections
+        yield pool_events
+
+        yield GaugeMetricFamily(
+            "hr_embedding_queue_pending", "Questions waiting in the micro-batching queue",
+            value=self.batcher_stats()["pending"]
+        )
+
+        component_ready = GaugeMetricFamily(
+            "hr_component_ready", "Readiness of a component (1 ready, 0 not ready)", labels=["component"]
+        )
+        for name, component in self.readiness().items():
+            component_ready.add_metric([name], 1.0 if component["ready"] else 0.0)
+        yield component_ready
+
+        coalescing_ratio = GaugeMetricFamily(
+            "hr_coalescing_ratio", "Share of calls served by a call already in flight", labels=["group"]
+        )
+        coalescing_in_flight = GaugeMetricFamily(
+            "hr_coalescing_in_flight", "Distinct calls in flight", labels=["group"]
+        )
+        for stats in self.coalescing_stats():
+            coalescing_ratio.add_metric([stats["name"]], stats["coalescing_ratio"])
+            coalescing_in_flight.add_metric([stats["name"]], stats["in_flight"])
+        yield coalescing_ratio
+        yield coalescing_in_flight
+
+        admission_active = GaugeMetricFamily(
+            "hr_admission_active", "Requests holding an admission slot", labels=["controller"]
+        )
+        admission_queued = GaugeMetricFamily(
+            "hr_admission_queue_depth", "Requests waiting for an admission slot", labels=["controller"]
+        )
+        for stats in self.admission_stats():
+            admission_active.add_metric([stats["name"]], stats["active"])
+            admission_queued.add_metric([stats["name"]], stats["queued"])
+        yield admission_active
+        yield admission_queued
+
+        breaker_state = GaugeMetricFamily(
+            "hr_circuit_breaker_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)",
+            labels=["breaker"]
+        )
+        breaker_rejected = CounterMetricFamily(
+            "hr_circuit_breaker_rejected", "Calls rejected by an open circuit breaker", labels=["breaker"]
+        )
+        for stats in self.breaker_stats():
+            breaker_state.add_metric([stats["name"]], STATE_VALUES[stats["state"]])
+            breaker_rejected.add_metric([stats["name"]], stats["rejected"])
+        yield breaker_state
+        yield breaker_rejected
+
+        sessions = self.session_stats()
+        yield GaugeMetricFamily("hr_chat_sessions", "Chat sessions held in memory", value=sessions["sessions"])
+        yield GaugeMetricFamily(
+            "hr_chat_session_context_tokens", "Ollama context tokens held by chat sessions",
+            value=sessions["context_tokens"]
+        )
+        session_evictions = CounterMetricFamily(
+            "hr_chat_session_evictions", "Chat sessions evicted by reason", labels=["reason"]
+        )
+        session_evictions.add_metric(["idle"], sessions["evicted_idle"])
+        session_evictions.add_metric(["capacity"], sessions["evicted_capacity"])
+        yield session_evictions
+
+
+class WorkerLabelCollector(Collector):
+    """Add a worker label (the process id) to the samples of another collector."""
+
+    def __init__(self, collector: Collector):
+        self.collector = collector
+
+    def collect(self):
+        worker = str(os.getpid())
+        for family in self.collector.collect():
+            family.samples = [
+                sample._replace(labels={**sample.labels, "worker": worker}) for sample in family.samples
+            ]
+            yield family
+
+
+# Collectors of the process exported next to the aggregated samples (multiprocess mode)
+_worker_collectors: List[Collector] = []
+
+
+def register_stats_collector(collector: StatsCollector):
+    """Register the statistics collector (exported by render_metrics)."""
+    if MULTIPROCESS_DIR is None:
+        REGISTRY.register(collector)
+    else:
+        _worker_collectors.append(WorkerLabelCollector(collector))
+
+
+def render_metrics() -> bytes:
+    """Prometheus text exposition of all metrics (aggregated over the workers in multiprocess mode)."""
+    if MULTIPROCESS_DIR is None:
+        return generate_latest()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    for collector in _worker_collectors:
+        registry.register(collector)
+    return generate_latest(registry)
+
+
+def worker_exited(pid: int):
+    """Drop the live gauges of an exited worker process (its counters are kept)."""
+    if MULTIPROCESS_DIR is not None:
+        multiprocess.mark_process_dead(pid)
@@ -3,7 +3,7 @@ Pydantic models for request/response validation.
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Annotated, Dict, List, Optional
 
 
 class LoginRequest(BaseModel):
@@ -35,6 +35,34 @@ class ChatResponse(BaseModel):
     answer: str
     profile: str
     domain: Optional[str] = None
+    # Prompt tokens Ollama evaluated for a generated answer (chat sessions only)
+    prompt_eval_count: Optional[int] = None
+
+
+class ChatTurnResponse(BaseModel):
+    """One turn of a chat session."""
+    question: str
+    answer: str
+    prompt_eval_count: Optional[int] = None
+    continued: bool
+
+
+class ChatSessionResponse(BaseModel):
+    """Recent turns of the user's chat session, oldest first."""
+    turns: List[ChatTurnResponse]
+    context_tokens: int
+
+
+class BatchChatRequest(BaseModel):
+    """Several chat messages answered for the same user."""
+    messages: List[Annotated[str, Field(min_length=1, max_length=500)]] = Field(
+        ..., min_length=1, description="User questions"
+    )
+
+
+class BatchChatResponse(BaseModel):
+    """Answers of a batch chat request, in the order of the messages."""
+    results: List[ChatResponse]
 
 
 class UserProfile(BaseModel):
@@ -50,3 +78,120 @@ class HealthResponse(BaseModel):
     """Health check response."""
     status: str
     environment: str
+
+
+class ComponentReadiness(BaseModel):
+    """Readiness of one component."""
+    ready: bool
+    required: bool
+    detail: Optional[str] = None
+    checked_at: Optional[str] = None
+
+
+class ReadinessResponse(BaseModel):
+    """Readiness probe response."""
+    status: str
+    components: Dict[str, ComponentReadiness]
+
+
+class CacheStatsResponse(BaseModel):
+    """Cache statistics."""
+    name: str
+    # Storage of the entries: local (in-process) or redis (shared by replicas)
+    backend: str = "local"
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    hit_rate: float
+    evictions: int
+    expirations: int
+    # Failed backend operations (served as misses)
+    errors: int = 0
+
+
+class CacheInvalidationResponse(BaseModel):
+    """Result of a cache invalidation."""
+    invalidated: int
+
+
+class LDAPPoolStatsResponse(BaseModel):
+    """LDAP connection pool statistics."""
+    name: str
+    size: int
+    idle: int
+    in_use: int
+    created: int
+    reconnects: int
+    discarded: int
+    timeouts: int
+
+
+class KnowledgeBaseReloadResponse(BaseModel):
+    """Result of a knowledge base reload."""
+    changed: bool
+    rows: int
+    added: int
+    edited: int
+    removed: int
+    reencoded: int
+    build_ms: float
+    swap_ms: float
+
+
+class EmbeddingBatchStatsResponse(BaseModel):
+    """Question encoding micro-batching statistics."""
+    running: bool
+    window_ms: float
+    max_batch_size: int
+    pending: int
+    batches: int
+    items: int
+    mean_batch_size: float
+    largest_batch: int
+    mean_wait_ms: float
+    p95_wait_ms: float
+
+
+class LLMAdmissionStatsResponse(BaseModel):
+    """LLM admission control statistics."""
+    name: str
+    max_concurrency: int
+    max_queue: int
+    active: int
+    queued: int
+    queued_users: int
+    admitted: int
+    rejected_queue_full: int
+    rejected_deadline: int
+    mean_wait_ms: float
+    p95_wait_ms: float
+    estimated_service_ms: float
+
+
+class CircuitBreakerStatsResponse(BaseModel):
+    """Circuit breaker state and statistics."""
+    name: str
+    enabled: bool
+    state: str
+    consecutive_failures: int
+    failure_threshold: int
+    failures: int
+    rejected: int
+    opened: int
+    retry_after_seconds: float
+
+
+class ChatSessionStatsResponse(BaseModel):
+    """Chat session statistics."""
+    name: str
+    sessions: int
+    max_sessions: int
+    created: int
+    evicted_idle: int
+    evicted_capacity: int
+    context_tokens: int
+    full_generations: int
+    full_mean_prompt_eval_tokens: float
+    continued_generations: int
+    continued_mean_prompt_eval_tokens: float
@@ -0,0 +1,73 @@
+"""
+Multi-process serving with read-only state shared between workers.
+
+Run several workers with gunicorn, from the backend directory:
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Every worker otherwise loads its own copy of the knowledge base, compiled
+retrieval index and embedding model. With WEB_PRELOAD_ENABLED, the master
+process loads them once and then forks the workers, which share those pages:
+- the precomputed embeddings are memory-mapped from the KB index artifact,
+  so every process maps the same page cache pages
+- PyTorch weights are moved to shared memory before forking, so no weight
+  page is ever copied
+- the compiled index and the other objects built by the master are shared
+  copy-on-write, and gc.freeze() keeps the garbage collector from writing to
+  them (and thereby copying their pages) in the workers
+
+No inference runs in the master: thread pools of PyTorch (OpenMP) and ONNX
+Runtime do not survive a fork. A stale KB index is therefore rebuilt in a
+subprocess, warm-up runs in each worker after the fork, and with the onnx
+backend (whose sessions cannot be forked) each worker loads the model itself.
+"""
+
+import gc
+import logging
+import os
+import subprocess
+import sys
+
+from . import kb_index
+from .config import settings
+from .embeddings import BACKEND_TORCH
+from .rag import rag_engine
+
+logger = logging.getLogger(__name__)
+
+
+def worker_threads(workers: int) -> int:
+    """Embedding threads per worker: RAG_EMBEDDING_THREADS, or the cores split between workers."""
+    if settings.rag_embedding_threads > 0:
+        return settings.rag_embedding_threads
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def preload():
+    """Load the shared read-only state in the master process, before forking workers."""
+    try:
+        rag_engine.load(load_model=False)
+    except kb_index.StaleIndexError:
+        logger.info("Building the KB index in a subprocess before preloading")
+        subprocess.run([sys.executable, "-m", "app.kb_index", "build"], check=True)
+        rag_engine.load(load_model=False)
+
+    if rag_engine.embedding_backend == BACKEND_TORCH:
+        rag_engine.load_model()
+        rag_engine.model.share_memory()
+
+    # Objects loaded so far are never collected: keep the collector off their pages
+    gc.collect()
+    gc.freeze()
+    logger.info(
+        f"Preloaded {len(rag_engine.index)} knowledge base entries"
+        f"{' and the embedding model' if rag_engine.model is not None else ''} before forking"
+    )
+
+
+def after_fork(workers: int):
+    """Per-worker setup, run in each worker right after the fork."""
+    threads = worker_threads(workers)
+    rag_engine.embedding_threads = threads
+    if rag_engine.model is not None and rag_engine.embedding_backend == BACKEND_TORCH:
+        rag_engine.model.set_threads(threads)
+    logger.info(f"Worker {os.getpid()} started with {threads} embedding threads")
@@ -1,121 +1,974 @@
 """
 RAG (Retrieval Augmented Generation) engine for HR knowledge base.
 Uses sentence-transformers for semantic search.
+
+pandas and the embedding runtime are imported when the engine is loaded, not
+when this module is imported, so the API can start serving before they are.
 """
 
+import asyncio
 import logging
-import pandas as pd
+import os
+import threading
+import time
+from collections import deque
 import numpy as np
 from pathlib import Path
-from typing import Optional, Tuple
-from sentence_transformers import SentenceTransformer, util
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from .cache import MISSING, TTLCache
+from .cache_backends import create_backend
+from .config import settings
+from . import kb_index
+from .embeddings import Embedder, embedder_identity, load_embedder
+from .metrics import STAGE_ENCODE, STAGE_SIMILARITY
+from .retrieval import KnowledgeIndex, normalize_question
+from .vector_index import BACKEND_HNSW, BACKEND_IVF
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+# Search modes
+# global: best match over all entries, denied if it belongs to another profile
+SEARCH_MODE_GLOBAL = "global"
+# partitioned: best match among the entries of the user's profile only
+SEARCH_MODE_PARTITIONED = "partitioned"
+
+# Columns the knowledge base CSV must provide
+REQUIRED_COLUMNS = ("question_id", "profil", "domaine", "question", "reponse")
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batching worker for query encoding.
+    
+    Concurrent callers enqueue their question and await a future; a single
+    worker task collects pending questions for up to window_ms (or until
+    max_batch_size are waiting), encodes them in one call in a worker thread,
+    and resolves each future with its embedding. Questions arriving while a
+    batch is being encoded form the next batch.
+    """
+    
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        window_ms: float = 5.0,
+        max_batch_size: int = 32
+    ):
+        """
+        Initialize batcher.
+        
+        Args:
+            encode: Blocking function encoding a list of texts into one row each
+            window_ms: How long to wait for more questions after the first one
+            max_batch_size: Maximum number of questions per encode call
+        """
+        self.encode_batch = encode
+        self.window_seconds = window_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.total_wait_seconds = 0.0
+        # Recent queue waits (seconds), for percentiles
+        self._recent_waits = deque(maxlen=10000)
+        # Optional callback(batch_size, queue_waits) invoked after each batch
+        self.on_batch: Optional[Callable[[int, List[float]], None]] = None
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self):
+        """Start the worker task (must be called from the event loop)."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+    
+    async def close(self):
+        """Stop the worker and fail the questions still queued."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        while not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Embedding batcher stopped"))
+    
+    async def encode(self, text: str) -> np.ndarray:
+        """
+        Encode one question as part of the next batch.
+        
+        Args:
+            text: Question to encode
+            
+        Returns:
+            Embedding row returned by the encode function
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((text, future, time.perf_counter()))
+        return await future
+    
+    async def _collect(self) -> List[Tuple[str, asyncio.Future, float]]:
+        """Wait for one question, then gather more until the window closes."""
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.window_seconds
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+    
+    async def _run(self):
+        """Worker loop."""
+        while True:
+            batch = await self._collect()
+            # Callers that gave up (request cancelled) are dropped
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+            
+            started = time.perf_counter()
+            waits = [started - enqueued for _, _, enqueued in batch]
+            # Identical questions in one batch are encoded once
+            texts = list(dict.fromkeys(text for text, _, _ in batch))
+            try:
+                embeddings = await asyncio.to_thread(self.encode_batch, texts)
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            rows = {text: embeddings[i] for i, text in enumerate(texts)}
+            for text, future, _ in batch:
+                if not future.done():
+                    future.set_result(rows[text])
+            
+            self.batches += 1
+            self.items += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            self.total_wait_seconds += sum(waits)
+            self._recent_waits.extend(waits)
+            if self.on_batch is not None:
+                self.on_batch(len(batch), waits)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Batching statistics."""
+        waits = np.fromiter(self._recent_waits, dtype=np.float64)
+        return {
+            "running": self.running,
+            "window_ms": self.window_seconds * 1000,
+            "max_batch_size": self.max_batch_size,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "mean_wait_ms": 1000 * self.total_wait_seconds / self.items if self.items else 0.0,
+            "p95_wait_ms": 1000 * float(np.percentile(waits, 95)) if len(waits) else 0.0,
+        }
+
 
 class RAGEngine:
     """RAG engine for semantic search in HR knowledge base."""
     
-    def __init__(self, csv_path: str = "data/knowledge_base.csv"):
+    def __init__(
+        self,
+        csv_path: Optional[str] = None,
+        index_dir: Optional[str] = None,
+        model_name: Optional[str] = None
+    ):
         """
         Initialize RAG engine.
         
         Args:
             csv_path: Path to knowledge base CSV file
+            index_dir: Directory of the precomputed embedding artifact
+            model_name: Embedding model name
         """
-        self.csv_path = Path(csv_path)
-        self.df: Optional[pd.DataFrame] = None
-        self.model: Optional[SentenceTransformer] = None
+        self.csv_path = Path(csv_path or settings.rag_csv_path)
+        self.index_dir = Path(index_dir or settings.rag_index_dir)
+        self.model_name = model_name or settings.rag_model_name
+        self.embedding_backend = settings.rag_embedding_backend
+        # Identifies the embedding function in the precomputed artifact
+        self.model_id = embedder_identity(
+            self.embedding_backend, self.model_name, settings.rag_onnx_quantized
+        )
+        self.normalize = settings.rag_normalize_embeddings
+        # Intra-op threads of the embedding runtime (0 keeps the runtime default)
+        self.embedding_threads = settings.rag_embedding_threads
+        self.df: Optional["pd.DataFrame"] = None
+        self.model: Optional[Embedder] = None
         self.embeddings: Optional[np.ndarray] = None
+        self.index: Optional[KnowledgeIndex] = None
+        self.search_mode = settings.rag_search_mode
+        # Similarity searches of the async path over at least this many rows run in a worker thread
+        self.search_offload_min_rows = settings.rag_search_offload_min_rows
+        # Query embeddings by normalized question; variants of a question
+        # share the embedding computed for the first one seen. Keys are
+        # namespaced by the model, so replicas share them only with the same model
+        self.query_cache = TTLCache(
+            name="query_embeddings",
+            max_size=settings.rag_query_cache_size,
+            backend=create_backend("query_embeddings", settings.rag_query_cache_size, self.model_id)
+        )
+        # Questions answered from the exact match table, and those that had to be encoded
+        self.exact_match_enabled = settings.rag_exact_match_enabled
+        self.exact_hits = 0
+        self.exact_misses = 0
+        self._exact_lock = threading.Lock()
+        # Identity of the CSV behind the live index, used to detect changes
+        self._csv_hash: Optional[str] = None
+        self._csv_stat: Optional[Tuple[int, int]] = None
+        # Serializes reloads; searches never take it
+        self._reload_lock = threading.Lock()
+        # Duration of each loading phase in milliseconds
+        self.load_timings: Dict[str, float] = {}
+        # Micro-batching of query encoding on the async path
+        self.batcher = EmbeddingBatcher(
+            self.encode_queries,
+            window_ms=settings.rag_batch_window_ms,
+            max_batch_size=settings.rag_batch_max_size
+        )
+        
+    def _csv_signature(self) -> Tuple[int, int]:
+        """Modification time and size of the knowledge base file."""
+        stat = os.stat(self.csv_path)
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _read_csv(self) -> "pd.DataFrame":
+        """Read the knowledge base CSV, checking its columns, with rows in KB index order."""
+        import pandas as pd
+        
+        df = pd.read_csv(self.csv_path)
+        missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+        if missing:
+            raise ValueError(f"Knowledge base {self.csv_path} is missing columns: {', '.join(missing)}")
+        return kb_index.sort_by_profile(df)
+    
+    @property
+    def ready(self) -> bool:
+        """Whether the engine is loaded and can answer searches."""
+        return self.index is not None and self.model is not None
+    
+    def _load_embedder(self) -> Embedder:
+        """Load the configured embedding model."""
+        logger.info(f"Loading embedding model {self.model_id}...")
+        started = time.perf_counter()
+        model = load_embedder(
+            self.model_name,
+            backend=self.embedding_backend,
+            onnx_dir=settings.rag_onnx_dir,
+            quantized=settings.rag_onnx_quantized,
+            threads=self.embedding_threads
+        )
+        self.load_timings["load_model"] = (time.perf_counter() - started) * 1000
+        logger.info("Model loaded successfully")
+        return model
+    
+    def load(self, load_model: bool = True):
+        """
+        Load knowledge base and initialize model.
         
-    def load(self):
-        """Load knowledge base and initialize model."""
+        Args:
+            load_model: Also load the embedding model. When False (preloading
+                before forking workers, see app.prefork), load_model() must be
+                called before searching, and the precomputed embeddings must
+                be up to date since nothing can encode them.
+                
+        Raises:
+            kb_index.StaleIndexError: If load_model is False and the embedding
+                artifact is missing or stale
+        """
+        timings = self.load_timings
+        timings.clear()
         try:
             # Load CSV
             logger.info(f"Loading knowledge base from {self.csv_path}")
-            self.df = pd.read_csv(self.csv_path)
-            logger.info(f"Loaded {len(self.df)} entries from knowledge base")
+            started = time.perf_counter()
+            csv_stat = self._csv_signature()
+            df = self._read_csv()
+            timings["read_csv"] = (time.perf_counter() - started) * 1000
+            logger.info(f"Loaded {len(df)} entries from knowledge base")
             
             # Load sentence transformer model
-            logger.info("Loading sentence-transformer model...")
-            self.model = SentenceTransformer('all-mpnet-base-v2')
-            logger.info("Model loaded successfully")
+            model = self._load_embedder() if load_model else None
+            
+            # Map the precomputed embeddings, re-encoding only if they are stale
+            started = time.perf_counter()
+            csv_hash = kb_index.compute_csv_hash(self.csv_path)
+            embeddings = kb_index.load_index(
+                self.index_dir, csv_hash, self.model_id, self.normalize
+            )
+            if embeddings is not None and len(embeddings) == len(df):
+                logger.info(f"Mapped precomputed embeddings from {self.index_dir}")
+            elif model is None:
+                raise kb_index.StaleIndexError(
+                    f"No up-to-date KB index in {self.index_dir} "
+                    f"(build it with: python -m app.kb_index build)"
+                )
+            else:
+                embeddings = self._encode_and_store(df, model, csv_hash)
+            timings["embeddings"] = (time.perf_counter() - started) * 1000
             
-            # Pre-compute embeddings for all questions
-            logger.info("Computing embeddings for knowledge base...")
-            questions = self.df['question'].tolist()
-            self.embeddings = self.model.encode(questions, convert_to_tensor=True)
-            logger.info("Embeddings computed successfully")
+            # Compile the retrieval index used on the request path
+            started = time.perf_counter()
+            index = KnowledgeIndex.from_dataframe(
+                df, embeddings, **self._index_options(csv_hash)
+            )
+            timings["compile_index"] = (time.perf_counter() - started) * 1000
+            
+            # Searches only start once the model and the index are both set
+            self.df, self.embeddings, self.model = df, embeddings, model
+            self.index = index
+            self._csv_hash = csv_hash
+            self._csv_stat = csv_stat
+            logger.info(
+                f"Retrieval index compiled: {len(self.index)} entries, "
+                f"{len(self.index.profile_names)} profiles, search mode '{self.search_mode}', "
+                f"vector backend '{self.index.vector_backend}'"
+            )
             
         except Exception as e:
             logger.error(f"Error loading RAG engine: {str(e)}")
             raise
     
+    def load_model(self):
+        """Load the embedding model of an engine loaded without it (no-op otherwise)."""
+        if self.model is None:
+            self.model = self._load_embedder()
+    
+    def warm_up(self, count: int = 8):
+        """
+        Run a few encodes so lazy runtime initialization (thread pools, graph
+        optimization, first-call allocations) happens before the first request.
+        
+        Args:
+            count: Number of knowledge base questions encoded
+        """
+        if not self.ready or count <= 0:
+            return
+        started = time.perf_counter()
+        questions = self.index.questions[:count]
+        for question in questions:
+            self.encode_queries([question])
+        self.encode_queries(questions)
+        self.load_timings["warm_up"] = (time.perf_counter() - started) * 1000
+    
+    def has_changed(self) -> bool:
+        """
+        Check whether the knowledge base file differs from the loaded one.
+        
+        The content is only hashed when the file modification time or size
+        changed since the last load.
+        """
+        try:
+            csv_stat = self._csv_signature()
+            if csv_stat == self._csv_stat:
+                return False
+            return kb_index.compute_csv_hash(self.csv_path) != self._csv_hash
+        except OSError as e:
+            logger.warning(f"Cannot check knowledge base {self.csv_path}: {str(e)}")
+            return False
+    
+    def index_changed(self) -> bool:
+        """
+        Check whether the KB index artifact was written for another version
+        of the knowledge base than the loaded one.
+        
+        With several worker processes, a reload runs in the worker that
+        received it; it rewrites the artifact, which the other workers watch
+        to reload (mapping it instead of encoding).
+        """
+        metadata = kb_index.read_metadata(self.index_dir)
+        if metadata is None or metadata.get("csv_sha256") in (None, self._csv_hash):
+            return False
+        return metadata.get("model_name") == self.model_id and metadata.get("normalize") == self.normalize
+    
+    def reload(self) -> Dict[str, Any]:
+        """
+        Reload the knowledge base without interrupting searches.
+        
+        Rows are matched to the live knowledge base by question_id: unchanged
+        questions keep their embedding and only new or edited questions are
+        encoded (none when another worker already wrote the KB index of the
+        new content, which is then mapped).
+        The new index is built aside and swapped in with a single reference
+        assignment, so in-flight searches finish on the previous index.
+        
+        Returns:
+            Reload statistics (rows, added, edited, removed, reencoded,
+            build_ms, swap_ms, changed)
+            
+        Raises:
+            RuntimeError: If the engine was never loaded
+            ValueError: If the new CSV is invalid (the live index is kept)
+        """
+        if self.index is None or self.model is None:
+            raise RuntimeError("RAG engine not initialized")
+        
+        with self._reload_lock:
+            started = time.perf_counter()
+            csv_stat = self._csv_signature()
+            csv_hash = kb_index.compute_csv_hash(self.csv_path)
+            old_index = self.index
+            if csv_hash == self._csv_hash:
+                self._csv_stat = csv_stat
+                return {
+                    "changed": False, "rows": len(old_index), "added": 0, "edited": 0,
+                    "removed": 0, "reencoded": 0, "build_ms": 0.0, "swap_ms": 0.0,
+                }
+            
+            df = self._read_csv()
+            questions = df['question'].astype(str).tolist()
+            question_ids = df['question_id'].tolist()
+            
+            # Reuse the embedding of every row whose question text is unchanged.
+            # Reused vectors are taken as stored (not from the index, which
+            # normalizes them), so the saved file matches its normalize flag.
+            old_questions = self.df['question'].astype(str).tolist()
+            old_rows = {qid: row for row, qid in enumerate(self.df['question_id'].tolist())}
+            to_encode, reused, reused_from = [], [], []
+            added = edited = 0
+            for i, (qid, question) in enumerate(zip(question_ids, questions)):
+                row = old_rows.get(qid)
+                if row is None:
+                    added += 1
+                    to_encode.append(i)
+                elif old_questions[row] != question:
+                    edited += 1
+                    to_encode.append(i)
+                else:
+                    reused.append(i)
+                    reused_from.append(row)
+            removed = len(set(old_rows) - set(question_ids))
+            
+            # Another worker (or the build command) may already have written the
+            # artifact of this knowledge base: map it instead of encoding again
+            embeddings = kb_index.load_index(self.index_dir, csv_hash, self.model_id, self.normalize)
+            if embeddings is not None and len(embeddings) == len(df):
+                logger.info(f"Mapped the up-to-date KB index from {self.index_dir}")
+                to_encode = []
+            else:
+                embeddings = np.empty((len(df), self.embeddings.shape[1]), dtype=np.float32)
+                embeddings[reused] = self.embeddings[reused_from]
+                if to_encode:
+                    logger.info(f"Encoding {len(to_encode)} new or edited knowledge base questions...")
+                    embeddings[to_encode] = self.model.encode(
+                        [questions[i] for i in to_encode],
+                        convert_to_numpy=True,
+                        normalize_embeddings=self.normalize
+                    ).astype(np.float32)
+                embeddings = self._store_embeddings(embeddings, csv_hash)
+            
+            index = KnowledgeIndex.from_dataframe(df, embeddings, **self._index_options(csv_hash))
+            build_ms = (time.perf_counter() - started) * 1000
+            
+            swap_started = time.perf_counter()
+            self.df, self.embeddings, self.index = df, embeddings, index
+            self._csv_hash, self._csv_stat = csv_hash, csv_stat
+            swap_ms = (time.perf_counter() - swap_started) * 1000
+        
+        stats = {
+            "changed": True,
+            "rows": len(index),
+            "added": added,
+            "edited": edited,
+            "removed": removed,
+            "reencoded": len(to_encode),
+            "build_ms": build_ms,
+            "swap_ms": swap_ms,
+        }
+        logger.info(
+            f"Knowledge base reloaded: {stats['rows']} entries, {added} added, {edited} edited, "
+            f"{removed} removed, {len(to_encode)} re-encoded in {build_ms:.1f} ms, "
+            f"swap {swap_ms:.3f} ms"
+        )
+        return stats
+    
+    def _index_options(self, csv_hash: str) -> Dict[str, Any]:
+        """Vector backend options of the compiled index, from settings."""
+        backend = settings.rag_vector_backend
+        if backend == BACKEND_IVF:
+            params = {"nlist": settings.rag_ivf_nlist, "nprobe": settings.rag_ivf_nprobe}
+        elif backend == BACKEND_HNSW:
+            params = {
+                "m": settings.rag_hnsw_m,
+                "ef_construction": settings.rag_hnsw_ef_construction,
+                "ef_search": settings.rag_hnsw_ef_search,
+            }
+        else:
+            params = {}
+        
+        # Persisted vector indexes are tied to the embeddings and build parameters
+        build_params = {k: v for k, v in params.items() if k not in ("nprobe", "ef_search")}
+        key = kb_index.artifact_key(csv_hash, self.model_id, self.normalize)
+        suffix = "-".join(f"{k}{v}" for k, v in sorted(build_params.items()))
+        return {
+            "vector_backend": backend,
+            "vector_params": params,
+            "ann_min_rows": settings.rag_ann_min_rows,
+            "partitioned": self.search_mode == SEARCH_MODE_PARTITIONED,
+            "cache_prefix": self.index_dir / f"{kb_index.VECTORS_PREFIX}{backend}-{key}{'-' + suffix if suffix else ''}",
+        }
+    
+    def _encode_and_store(self, df: "pd.DataFrame", model: Embedder, csv_hash: str) -> np.ndarray:
+        """
+        Encode all knowledge base questions and persist the artifact.
+        
+        Args:
+            df: Knowledge base rows
+            model: Embedding model
+            csv_hash: Content hash of the knowledge base CSV
+            
+        Returns:
+            Embeddings, memory-mapped from the artifact when it could be written
+        """
+        logger.info("Computing embeddings for knowledge base...")
+        questions = df['question'].tolist()
+        embeddings = model.encode(
+            questions,
+            convert_to_numpy=True,
+            normalize_embeddings=self.normalize
+        ).astype(np.float32)
+        logger.info("Embeddings computed successfully")
+        return self._store_embeddings(embeddings, csv_hash)
+    
+    def _store_embeddings(self, embeddings: np.ndarray, csv_hash: str) -> np.ndarray:
+        """
+        Persist the embedding artifact of the knowledge base.
+        
+        Returns:
+            Embeddings, memory-mapped from the artifact when it could be written
+            (so other worker processes mapping it share the pages)
+        """
+        try:
+            kb_index.save_index(
+                self.index_dir, embeddings, csv_hash, self.model_id, self.normalize
+            )
+        except OSError as e:
+            # Read-only filesystem: keep serving from memory
+            logger.warning(f"Could not persist KB index to {self.index_dir}: {str(e)}")
+            return embeddings
+        
+        mapped = kb_index.load_index(
+            self.index_dir, csv_hash, self.model_id, self.normalize
+        )
+        return mapped if mapped is not None else embeddings
+    
+    def encode_queries(self, questions: List[str]) -> np.ndarray:
+        """
+        Encode user questions in one model call (no caching).
+        
+        Args:
+            questions: User questions
+            
+        Returns:
+            L2-normalized float32 embeddings, one row per question
+        """
+        return self.model.encode(
+            questions,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ).astype(np.float32)
+    
+    def encode_query(self, question: str) -> np.ndarray:
+        """
+        Encode a user question, using the query embedding cache.
+        
+        Args:
+            question: User's question
+            
+        Returns:
+            L2-normalized float32 embedding (read-only)
+        """
+        key = normalize_question(question)
+        embedding = self.query_cache.get(key)
+        if embedding is not MISSING:
+            return embedding
+        
+        embedding = self.encode_queries([question])[0]
+        embedding.setflags(write=False)
+        self.query_cache.set(key, embedding)
+        return embedding
+    
+    async def aencode_query(self, question: str) -> np.ndarray:
+        """
+        Encode a user question without blocking the event loop.
+        
+        Cache misses go through the micro-batching worker when it is running,
+        otherwise they are encoded alone in a worker thread.
+        
+        Args:
+            question: User's question
+            
+        Returns:
+            L2-normalized float32 embedding (read-only)
+        """
+        key = normalize_question(question)
+        embedding = await self.query_cache.aget(key)
+        if embedding is not MISSING:
+            return embedding
+        
+        if self.batcher.running:
+            embedding = await self.batcher.encode(question)
+        else:
+            embedding = (await asyncio.to_thread(self.encode_queries, [question]))[0]
+        embedding.setflags(write=False)
+        await self.query_cache.aset(key, embedding)
+        return embedding
+    
+    def top_k(
+        self,
+        question: str,
+        k: int = 5,
+        employee_type: Optional[str] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the knowledge base entries most similar to a question.
+        
+        Args:
+            question: User's question
+            k: Number of results
+            employee_type: Restrict the search to this profile (None searches all entries)
+            
+        Returns:
+            Tuple of (cosine similarities, row ids in self.index), best first
+        """
+        index = self.index
+        profile = None
+        if employee_type is not None:
+            profile = index.profile_code(employee_type)
+            if profile is None:
+                return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        return index.top_k(self.encode_query(question), k, profile)
+    
     def search_knowledge(
         self,
         question: str,
         employee_type: str,
-        threshold: float = 0.75
+        threshold: float = 0.75,
+        query_embedding: Optional[np.ndarray] = None
     ) -> Tuple[Optional[str], Optional[str], float, bool]:
         """
         Search knowledge base for relevant answer.
         
+        A question equal to a knowledge base question up to case, accents,
+        spacing and punctuation is answered from the exact match table with
+        similarity 1.0, without being encoded.
+        
         Args:
             question: User's question
             employee_type: User's profile (CDI, CDD, CADRE, etc.)
             threshold: Minimum similarity score to consider answer relevant
+            query_embedding: Precomputed question embedding (encoded here if None)
             
         Returns:
             Tuple of (answer, domain, similarity_score, profile_allowed)
             - profile_allowed is True if the answer matches the user's profile
             - If profile mismatch, returns (None, None, score, False)
         """
-        if self.df is None or self.model is None or self.embeddings is None:
+        if self.index is None or self.model is None:
             logger.error("RAG engine not initialized")
             return None, None, 0.0, True
 
         try:
-            # Encode user question
-            question_embedding = self.model.encode(question, convert_to_tensor=True)
+            index = self.index
+            user_profile = index.profile_code(employee_type)
+            exact = self._exact_match(index, question, user_profile, employee_type, threshold)
+            if exact is not None:
+                return exact
+            if query_embedding is None:
+                query_embedding = self.encode_query(question)
+            return self._similarity_search(index, query_embedding, user_profile, employee_type, threshold)
             
+        except Exception as e:
+            logger.error(f"Error in RAG search: {str(e)}")
+            return None, None, 0.0, True
+    
+    def _exact_match(
+        self,
+        index: KnowledgeIndex,
+        question: str,
+        user_profile: Optional[int],
+        employee_type: str,
+        threshold: float
+    ) -> Optional[Tuple[Optional[str], Optional[str], float, bool]]:
+        """
+        Answer a question equal to a knowledge base question up to case,
+        accents, spacing and punctuation, with similarity 1.0.
+        
+        When several profiles share the question, the user's own entry is
+        used; in partitioned mode only the user's entries are candidates.
+        
+        Returns:
+            The search result, or None when the question must be encoded
+        """
+        if not self.exact_match_enabled:
+            return None
+        rows = index.exact_rows(question)
+        own_rows = [row for row in rows if index.profile_codes[row] == user_profile]
+        if self.search_mode == SEARCH_MODE_PARTITIONED:
+            rows = own_rows
+        with self._exact_lock:
+            if rows:
+                self.exact_hits += 1
+            else:
+                self.exact_misses += 1
+        if not rows:
+            return None
+        
+        logger.info("Exact match of a knowledge base question")
+        best_row = own_rows[0] if own_rows else rows[0]
+        return self._best_match(
+            index, np.ones(1, dtype=np.float32), np.array([best_row]), user_profile, employee_type, threshold
+        )
+    
+    def _similarity_search(
+        self,
+        index: KnowledgeIndex,
+        query_embedding: np.ndarray,
+        user_profile: Optional[int],
+        employee_type: str,
+        threshold: float
+    ) -> Tuple[Optional[str], Optional[str], float, bool]:
+        """Search the knowledge base by embedding similarity."""
+        if self.search_mode == SEARCH_MODE_PARTITIONED:
+            # Only the user's own entries are candidates
+            if user_profile is None:
+                logger.info(f"No knowledge base entries for profile '{employee_type}'")
+                return None, None, 0.0, True
+            scores, rows = index.top_k(query_embedding, 1, user_profile)
+        else:
             # Compute cosine similarities with ALL entries (global search)
-            similarities = util.cos_sim(question_embedding, self.embeddings)[0]
-            
-            # Get best match
-            best_match_idx = similarities.argmax().item()
-            best_similarity = similarities[best_match_idx].item()
-            
-            logger.info(f"Best global match similarity: {best_similarity:.3f}")
-            
-            # Check if similarity meets threshold
-            if best_similarity < threshold:
-                logger.info(f"Similarity {best_similarity:.3f} below threshold {threshold}")
-                return None, None, best_similarity, True
-            
-            # Get the best match entry
-            best_match = self.df.iloc[best_match_idx]
-            match_profile = str(best_match['profil'])
+            scores, rows = index.top_k(query_embedding, 1)
+        
+        return self._best_match(index, scores, rows, user_profile, employee_type, threshold)
+    
+    def exact_match_stats(self) -> Dict[str, Any]:
+        """Statistics of the exact match table (same fields as TTLCache.stats)."""
+        index = self.index
+        size = index.exact_keys if index is not None else 0
+        with self._exact_lock:
+            lookups = self.exact_hits + self.exact_misses
+            return {
+                "name": "exact_questions",
+                "size": size,
+                "max_size": size,
+                "hits": self.exact_hits,
+                "misses": self.exact_misses,
+                "hit_rate": self.exact_hits / lookups if lookups else 0.0,
+                "evictions": 0,
+                "expirations": 0,
+            }
+    
+    @staticmethod
+    def _best_match(
+        index: KnowledgeIndex,
+        scores: np.ndarray,
+        rows: np.ndarray,
+        user_profile: Optional[int],
+        employee_type: str,
+        threshold: float
+    ) -> Tuple[Optional[str], Optional[str], float, bool]:
+        """Apply the threshold and the profile check to the best search result."""
+        if len(rows) == 0:
+            return None, None, 0.0, True
+        
+        best_row = int(rows[0])
+        best_similarity = float(scores[0])
+        
+        logger.info(f"Best match similarity: {best_similarity:.3f}")
+        
+        # Check if similarity meets threshold
+        if best_similarity < threshold:
+            logger.info(f"Similarity {best_similarity:.3f} below threshold {threshold}")
+            return None, None, best_similarity, True
+        
+        # Check profile authorization
+        match_profile = int(index.profile_codes[best_row])
+        if match_profile != user_profile:
+            logger.warning(
+                f"Profile mismatch! Question is for '{index.profile_names[match_profile]}', "
+                f"user is '{employee_type}'"
+            )
+            return None, None, best_similarity, False
+        
+        # Profile matches, return answer
+        answer = index.answers[best_row]
+        domain = index.domain_names[index.domain_codes[best_row]]
+        
+        logger.info(f"Found authorized answer in domain '{domain}' for profile '{employee_type}'")
+        
+        return answer, domain, best_similarity, True
+    
+    def _similarity_search_batch(
+        self,
+        index: KnowledgeIndex,
+        query_embeddings: np.ndarray,
+        user_profile: Optional[int],
+        employee_type: str,
+        threshold: float
+    ) -> List[Tuple[Optional[str], Optional[str], float, bool]]:
+        """Search the knowledge base by embedding similarity for several questions."""
+        if self.search_mode == SEARCH_MODE_PARTITIONED:
+            if user_profile is None:
+                logger.info(f"No knowledge base entries for profile '{employee_type}'")
+                return [(None, None, 0.0, True)] * len(query_embeddings)
+            results = index.top_k_batch(query_embeddings, 1, user_profile)
+        else:
+            results = index.top_k_batch(query_embeddings, 1)
+        return [
+            self._best_match(index, scores, rows, user_profile, employee_type, threshold)
+            for scores, rows in results
+        ]
+    
+    async def aencode_queries(self, questions: List[str]) -> np.ndarray:
+        """
+        Encode several user questions without blocking the event loop.
+        
+        Questions found in the query embedding cache are not re-encoded; the
+        others (deduplicated) are encoded together in one model call.
+        
+        Args:
+            questions: User questions
             
-            # Check profile authorization
-            # Compare normalized profiles (case insensitive)
-            if match_profile.strip().lower() != employee_type.strip().lower():
-                logger.warning(
-                    f"Profile mismatch! Question is for '{match_profile}', "
-                    f"user is '{employee_type}'"
+        Returns:
+            L2-normalized float32 embeddings, one row per question
+        """
+        keys = [normalize_question(question) for question in questions]
+        questions_by_key = dict(zip(keys, questions))
+        embeddings: Dict[str, np.ndarray] = {}
+        misses: Dict[str, str] = {}
+        # One bulk lookup (a single round trip with a shared cache backend)
+        for key, embedding in zip(questions_by_key, await self.query_cache.aget_many(list(questions_by_key))):
+            if embedding is MISSING:
+                misses[key] = questions_by_key[key]
+            else:
+                embeddings[key] = embedding
+        
+        if misses:
+            encoded = await asyncio.to_thread(self.encode_queries, list(misses.values()))
+            for key, embedding in zip(misses, encoded):
+                embedding.setflags(write=False)
+                embeddings[key] = embedding
+            await self.query_cache.aset_many([(key, embeddings[key]) for key in misses])
+        
+        return np.stack([embeddings[key] for key in keys])
+    
+    async def _run_search(self, index: KnowledgeIndex, search: Callable, *args) -> Any:
+        """Run a similarity search, in a worker thread when the index is large enough to stall the loop."""
+        if len(index) >= self.search_offload_min_rows:
+            return await asyncio.to_thread(search, *args)
+        return search(*args)
+    
+    async def asearch_knowledge_batch(
+        self,
+        questions: List[str],
+        employee_type: str,
+        threshold: float = 0.75
+    ) -> List[Tuple[Optional[str], Optional[str], float, bool]]:
+        """
+        Search the knowledge base for several questions from the event loop.
+        
+        Same results as search_knowledge on each question; questions missing
+        from the exact match table are encoded in one batch and their
+        similarities computed together (a single matrix multiply with the
+        exact vector backend).
+        """
+        no_match = (None, None, 0.0, True)
+        if not questions:
+            return []
+        if self.index is None or self.model is None:
+            logger.error("RAG engine not initialized")
+            return [no_match] * len(questions)
+        
+        index = self.index
+        user_profile = index.profile_code(employee_type)
+        results = [
+            self._exact_match(index, question, user_profile, employee_type, threshold)
+            for question in questions
+        ]
+        searched = [i for i, result in enumerate(results) if result is None]
+        if not searched:
+            return results
+        
+        try:
+            query_embeddings = await self.aencode_queries([questions[i] for i in searched])
+        except Exception as e:
+            logger.error(f"Error encoding questions: {str(e)}")
+            query_embeddings = None
+        try:
+            if query_embeddings is not None:
+                similar = await self._run_search(
+                    index, self._similarity_search_batch,
+                    index, query_embeddings, user_profile, employee_type, threshold
                 )
-                return None, None, best_similarity, False
-            
-            # Profile matches, return answer
-            answer = str(best_match['reponse'])
-            domain = str(best_match['domaine'])
-            
-            logger.info(f"Found authorized answer in domain '{domain}' for profile '{match_profile}'")
-            
-            return answer, domain, best_similarity, True
-            
+            else:
+                similar = [no_match] * len(searched)
         except Exception as e:
-            logger.error(f"Error in RAG search: {str(e)}")
+            logger.error(f"Error in batch RAG search: {str(e)}")
+            similar = [no_match] * len(searched)
+        for i, result in zip(searched, similar):
+            results[i] = result
+        return results
+    
+    async def asearch_knowledge(
+        self,
+        question: str,
+        employee_type: str,
+        threshold: float = 0.75
+    ) -> Tuple[Optional[str], Optional[str], float, bool]:
+        """
+        Search knowledge base for relevant answer from the event loop.
+        
+        Same result as search_knowledge; a question missing from the exact
+        match table is encoded through the micro-batching worker instead of
+        blocking the event loop.
+        """
+        if self.index is None or self.model is None:
+            logger.error("RAG engine not initialized")
             return None, None, 0.0, True
+        
+        index = self.index
+        user_profile = index.profile_code(employee_type)
+        exact = self._exact_match(index, question, user_profile, employee_type, threshold)
+        if exact is not None:
+            return exact
+        
+        try:
+            with STAGE_ENCODE.time():
+                query_embedding = await self.aencode_query(question)
+        except Exception as e:
+            logger.error(f"Error encoding question: {str(e)}")
+            return None, None, 0.0, True
+        with STAGE_SIMILARITY.time():
+            try:
+                return await self._run_search(
+                    index, self._similarity_search,
+                    index, query_embedding, user_profile, employee_type, threshold
+                )
+            except Exception as e:
+                logger.error(f"Error in RAG search: {str(e)}")
+                return None, None, 0.0, True
 
 
 # Global RAG engine instance
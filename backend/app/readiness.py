@@ -0,0 +1,103 @@
+"""
+Readiness tracking for the API and its dependencies.
+
+Components either report their own state (the RAG engine while it loads in
+the background) or are probed periodically by a background task (LDAP,
+Ollama). The /ready endpoint only reads the cached results, so it stays
+cheap and never waits on a slow dependency.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+HealthCheck = Callable[[], Awaitable[bool]]
+
+
+class ReadinessMonitor:
+    """Cached readiness of named components."""
+
+    def __init__(self):
+        self._components: Dict[str, Dict[str, Any]] = {}
+        self._checks: Dict[str, HealthCheck] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, required: bool = True, check: Optional[HealthCheck] = None):
+        """
+        Declare a component.
+
+        Args:
+            name: Component name
+            required: Whether the API is not ready while this component is not
+            check: Async probe run periodically (None if the component reports its own state)
+        """
+        self._components[name] = {
+            "ready": False,
+            "required": required,
+            "detail": "en attente de la première vérification",
+            "checked_at": None,
+        }
+        if check is not None:
+            self._checks[name] = check
+
+    def set(self, name: str, ready: bool, detail: Optional[str] = None):
+        """Record the state of a component."""
+        component = self._components[name]
+        if component["ready"] != ready:
+            logger.info(f"Component '{name}' is now {'ready' if ready else 'not ready'}")
+        component["ready"] = ready
+        component["detail"] = detail
+        component["checked_at"] = datetime.utcnow().isoformat() + "Z"
+
+    def is_ready(self, name: Optional[str] = None) -> bool:
+        """Readiness of one component, or of all required components if name is None."""
+        if name is not None:
+            return self._components.get(name, {}).get("ready", False)
+        return all(c["ready"] for c in self._components.values() if c["required"])
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Copy of the state of all components."""
+        return {name: dict(component) for name, component in self._components.items()}
+
+    async def check(self, name: str):
+        """Run the probe of one component and record its result."""
+        started = time.perf_counter()
+        try:
+            ok = await self._checks[name]()
+            detail = None if ok else "vérification échouée"
+        except Exception as e:
+            ok, detail = False, str(e)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.set(name, ok, detail if detail else f"{elapsed_ms:.0f} ms")
+
+    async def check_all(self):
+        """Run all probes concurrently."""
+        await asyncio.gather(*(self.check(name) for name in self._checks))
+
+    async def _run(self, interval: float):
+        while True:
+            await self.check_all()
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float):
+        """Start probing in the background (must be called from the event loop)."""
+        if self._task is None and self._checks:
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self):
+        """Stop background probing."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global readiness monitor (components are registered in the application lifespan)
+readiness = ReadinessMonitor()
@@ -0,0 +1,126 @@
+"""
+Cache of Ollama answers for the LLM fallback path.
+
+Two layers:
+- exact: keyed by model, generation options, profile and the full prompt
+- semantic: reuses an answer given to a question whose embedding is within a
+  configurable cosine distance, for the same profile and context
+
+Every key includes a version derived from the model, the generation options
+and PROMPT_TEMPLATE_VERSION, so changing any of them invalidates the cache.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .cache import MISSING, SemanticCache, TTLCache
+from .cache_backends import create_backend
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(*parts: Any) -> str:
+    """Stable SHA-256 digest of JSON-serializable parts."""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Exact and semantic cache of LLM answers."""
+
+    def __init__(self, model: str, options: Dict[str, Any], prompt_template_version: int):
+        """
+        Initialize cache.
+
+        Args:
+            model: Ollama model name
+            options: Generation options sent to Ollama
+            prompt_template_version: Version of the prompt templates
+        """
+        self.version = _digest(model, options, prompt_template_version)[:16]
+        self.exact = TTLCache(
+            name="llm_responses_exact",
+            max_size=settings.llm_cache_max_size,
+            ttl_seconds=settings.llm_cache_ttl_seconds,
+            backend=create_backend("llm_responses_exact", settings.llm_cache_max_size)
+        )
+        self.semantic = SemanticCache(
+            name="llm_responses_semantic",
+            max_size=settings.llm_semantic_cache_max_size if settings.llm_semantic_cache_enabled else 0,
+            max_distance=settings.llm_semantic_cache_max_distance,
+            ttl_seconds=settings.llm_cache_ttl_seconds
+        )
+
+    def _exact_key(self, prompt: str, profile: str) -> str:
+        return f"{self.version}:{_digest(profile, prompt)}"
+
+    def _partition(self, profile: str, context: Optional[str]) -> str:
+        return f"{self.version}:{profile}:{_digest(context)}"
+
+    async def get(
+        self,
+        prompt: str,
+        profile: str,
+        context: Optional[str] = None,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> Optional[str]:
+        """
+        Look up a cached answer, exact layer first (without blocking the
+        event loop when the exact layer is shared).
+
+        Args:
+            prompt: Full prompt sent to the model
+            profile: User profile
+            context: RAG context included in the prompt, if any
+            query_embedding: L2-normalized embedding of the question (enables the semantic layer)
+
+        Returns:
+            Cached answer or None
+        """
+        answer = await self.exact.aget(self._exact_key(prompt, profile))
+        if answer is not MISSING:
+            logger.info("LLM response served from exact cache")
+            return answer
+
+        if query_embedding is not None:
+            answer = self.semantic.get(self._partition(profile, context), query_embedding)
+            if answer is not MISSING:
+                logger.info("LLM response served from semantic cache")
+                return answer
+
+        return None
+
+    async def set(
+        self,
+        prompt: str,
+        profile: str,
+        answer: str,
+        context: Optional[str] = None,
+        query_embedding: Optional[np.ndarray] = None
+    ):
+        """
+        Store an answer in both layers.
+
+        Args:
+            prompt: Full prompt sent to the model
+            profile: User profile
+            answer: Generated answer
+            context: RAG context included in the prompt, if any
+            query_embedding: L2-normalized embedding of the question
+        """
+        await self.exact.aset(self._exact_key(prompt, profile), answer)
+        if query_embedding is not None:
+            self.semantic.set(self._partition(profile, context), query_embedding, answer)
+
+    def clear(self) -> int:
+        """Remove all entries. Returns the number of entries removed."""
+        return self.exact.clear() + self.semantic.clear()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Statistics of both layers."""
+        return [self.exact.stats(), self.semantic.stats()]
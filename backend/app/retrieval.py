@@ -0,0 +1,282 @@
+"""
+Compiled retrieval index for the knowledge base.
+
+Built once at load time from the knowledge base rows and their embeddings, so
+the request path only touches NumPy arrays and plain lists (no DataFrame):
+- L2-normalized float32 embeddings, grouped by profile so each profile's rows
+  form a contiguous slice of one matrix
+- profiles and domains stored as integer codes
+- answers, questions and question ids in plain arrays
+- a vector index (exact or approximate) over all entries, and one per profile
+- a hash table from normalized question text to rows, for exact matches
+"""
+
+import logging
+import re
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .vector_index import BACKEND_EXACT, VectorIndex, create_index
+
+logger = logging.getLogger(__name__)
+
+# Punctuation ignored at the end of a question when normalizing
+TRAILING_PUNCTUATION = " ?!.,;:…"
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize_question(text: str) -> str:
+    """
+    Canonical form of a question, insensitive to case, accents, spacing
+    and trailing punctuation.
+
+    Args:
+        text: Raw question
+    
+    Returns:
+        Normalized question
+    """
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = " ".join(text.lower().split())
+    return text.rstrip(TRAILING_PUNCTUATION)
+
+
+def exact_match_key(text: str) -> str:
+    """Key of a question for exact matching: normalize_question, ignoring all punctuation."""
+    return " ".join(_NON_WORD.sub(" ", normalize_question(text)).split())
+
+
+def profile_key(profile: str) -> str:
+    """Normalized profile label used for comparisons (case insensitive)."""
+    return str(profile).strip().lower()
+
+
+def _encode_labels(labels: Sequence[str], key=lambda label: label) -> Tuple[List[str], np.ndarray]:
+    """Map labels to integer codes. Returns (names by code, codes)."""
+    names: List[str] = []
+    codes_by_key: Dict[str, int] = {}
+    codes = np.empty(len(labels), dtype=np.int32)
+    for i, label in enumerate(labels):
+        k = key(label)
+        code = codes_by_key.get(k)
+        if code is None:
+            code = codes_by_key[k] = len(names)
+            names.append(str(label))
+        codes[i] = code
+    return names, codes
+
+
+def profile_order(profiles: Sequence[str]) -> np.ndarray:
+    """
+    Row order grouping entries by profile, as compiled by KnowledgeIndex.
+
+    Profiles come in order of first appearance and rows keep their relative
+    order within a profile, so the order of already grouped rows is the
+    identity.
+
+    Args:
+        profiles: Profile of each entry
+
+    Returns:
+        Row indices in grouped order
+    """
+    _, codes = _encode_labels(profiles, key=profile_key)
+    return np.argsort(codes, kind="stable")
+
+
+class KnowledgeIndex:
+    """Array-backed, profile-partitioned retrieval index."""
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        profiles: Sequence[str],
+        domains: Sequence[str],
+        questions: Sequence[str],
+        answers: Sequence[str],
+        question_ids: Sequence[int],
+        vector_backend: str = BACKEND_EXACT,
+        vector_params: Optional[Dict[str, Any]] = None,
+        ann_min_rows: int = 0,
+        cache_prefix: Optional[Path] = None,
+        partitioned: bool = False
+    ):
+        """
+        Compile the index.
+
+        Args:
+            embeddings: Question embeddings, one row per knowledge base entry
+            profiles: Profile of each entry
+            domains: Domain of each entry
+            questions: Question of each entry
+            answers: Answer of each entry
+            question_ids: question_id of each entry
+            vector_backend: Vector index backend (exact, ivf, hnsw)
+            vector_params: Backend parameters
+            ann_min_rows: Use the exact backend for (partitions of) fewer rows
+            cache_prefix: Path prefix under which built vector indexes are persisted
+            partitioned: Build the vector index of every profile partition now
+                (searches restricted to a profile) instead of on first use
+        """
+        profile_names, profile_codes = _encode_labels(profiles, key=profile_key)
+
+        # Group rows by profile; row ids below refer to this compiled order.
+        # Rows read through kb_index.sort_by_profile are already grouped: their
+        # (memory-mapped) embeddings are then used in place instead of copied
+        order = np.argsort(profile_codes, kind="stable")
+        if np.array_equal(order, np.arange(len(order))):
+            matrix = np.asarray(embeddings, dtype=np.float32)
+        else:
+            matrix = np.asarray(embeddings, dtype=np.float32)[order]
+
+        norms = np.linalg.norm(matrix, axis=1)
+        if not np.allclose(norms, 1.0, atol=1e-3):
+            matrix = matrix / np.maximum(norms, 1e-12)[:, None]
+        self.embeddings = np.ascontiguousarray(matrix, dtype=np.float32)
+
+        self.profile_names = profile_names
+        self.profile_codes = profile_codes[order]
+        self.domain_names, domain_codes = _encode_labels([str(d) for d in domains])
+        self.domain_codes = domain_codes[order]
+        self.questions: List[str] = [str(questions[i]) for i in order]
+        self.answers: List[str] = [str(answers[i]) for i in order]
+        self.question_ids = np.asarray(question_ids)[order]
+
+        self._profile_lookup = {profile_key(name): code for code, name in enumerate(profile_names)}
+        # Rows of each question, by exact match key (several when profiles share a question)
+        self._exact_rows: Dict[str, Tuple[int, ...]] = {}
+        for row, question in enumerate(self.questions):
+            key = exact_match_key(question)
+            self._exact_rows[key] = self._exact_rows.get(key, ()) + (row,)
+        # Contiguous [start, end) slice of each profile in the compiled order
+        bounds = np.searchsorted(self.profile_codes, np.arange(len(profile_names) + 1))
+        self.partitions: Dict[int, Tuple[int, int]] = {
+            code: (int(bounds[code]), int(bounds[code + 1]))
+            for code in range(len(profile_names))
+        }
+
+        self.vector_backend = vector_backend
+        self._vector_params = vector_params or {}
+        self._ann_min_rows = ann_min_rows
+        self._cache_prefix = cache_prefix
+        self._global_index = self._build_vector_index(self.embeddings, "all")
+        self._partition_indexes: Dict[int, VectorIndex] = {}
+        if partitioned:
+            # Building an approximate index takes seconds on large partitions:
+            # do it while compiling (off the request path), not on a first query
+            for profile in self.partitions:
+                self._partition_index(profile)
+
+    @classmethod
+    def from_dataframe(cls, df, embeddings: np.ndarray, **options) -> "KnowledgeIndex":
+        """Compile the index from the knowledge base DataFrame and its embeddings."""
+        return cls(
+            embeddings=embeddings,
+            profiles=df['profil'].astype(str).tolist(),
+            domains=df['domaine'].astype(str).tolist(),
+            questions=df['question'].astype(str).tolist(),
+            answers=df['reponse'].astype(str).tolist(),
+            question_ids=df['question_id'].tolist(),
+            **options
+        )
+    
+    def _build_vector_index(self, vectors: np.ndarray, name: str) -> VectorIndex:
+        """Build (or load) the vector index of all entries or of one partition."""
+        cache_path = None
+        if self._cache_prefix is not None:
+            cache_path = self._cache_prefix.with_name(f"{self._cache_prefix.name}-{name}")
+        return create_index(
+            self.vector_backend,
+            vectors,
+            min_rows=self._ann_min_rows,
+            cache_path=cache_path,
+            **self._vector_params
+        )
+    
+    def _partition_index(self, profile: int) -> VectorIndex:
+        """Vector index of one profile partition, built on first use unless compiled partitioned."""
+        index = self._partition_indexes.get(profile)
+        if index is None:
+            start, end = self.partitions[profile]
+            index = self._build_vector_index(self.embeddings[start:end], f"p{profile}")
+            self._partition_indexes[profile] = index
+        return index
+
+    def __len__(self) -> int:
+        return len(self.answers)
+
+    @property
+    def exact_keys(self) -> int:
+        """Distinct questions in the exact match table."""
+        return len(self._exact_rows)
+
+    def exact_rows(self, question: str) -> Tuple[int, ...]:
+        """Rows whose question equals this one up to case, accents, spacing and punctuation."""
+        return self._exact_rows.get(exact_match_key(question), ())
+
+    def profile_code(self, employee_type: str) -> Optional[int]:
+        """Integer code of a profile, or None if no entry has this profile."""
+        return self._profile_lookup.get(profile_key(employee_type))
+
+    def top_k(
+        self,
+        query: np.ndarray,
+        k: int = 1,
+        profile: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the entries most similar to a query.
+
+        Args:
+            query: L2-normalized query embedding
+            k: Number of results
+            profile: Restrict the search to this profile code (None searches all entries)
+
+        Returns:
+            Tuple of (cosine similarities, row ids), best first
+        """
+        if profile is None:
+            return self._global_index.search(query, k)
+
+        start, end = self.partitions.get(profile, (0, 0))
+        if start == end:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        scores, rows = self._partition_index(profile).search(query, k)
+        return scores, rows + start
+
+    def top_k_batch(
+        self,
+        queries: np.ndarray,
+        k: int = 1,
+        profile: Optional[int] = None
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Find the entries most similar to each of several queries.
+
+        With the exact backend, all similarities are computed in one matrix
+        multiply.
+
+        Args:
+            queries: L2-normalized query embeddings, one per row
+            k: Number of results per query
+            profile: Restrict the search to this profile code (None searches all entries)
+
+        Returns:
+            One (cosine similarities, row ids) tuple per query, best first
+        """
+        if profile is None:
+            return self._global_index.search_batch(queries, k)
+
+        start, end = self.partitions.get(profile, (0, 0))
+        if start == end:
+            empty = (np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64))
+            return [empty for _ in range(len(queries))]
+        return [
+            (scores, rows + start)
+            for scores, rows in self._partition_index(profile).search_batch(queries, k)
+        ]
@@ -0,0 +1,247 @@
+"""
+Per-user chat sessions for LLM follow-up questions.
+
+A session keeps the recent turns of a user and the context token array that
+Ollama returns with each generation. The next LLM turn sends that array back
+with a short prompt holding only the new question (and the turns answered
+without the LLM since), instead of the full instruction prompt: the model
+continues the conversation without evaluating the instructions again.
+
+When the context is missing (the previous answer came from the response
+cache or from another process) or has grown past the token limit, the full
+prompt is rebuilt with the recent turns as history.
+
+A session only becomes a conversation with the LLM once a turn has been
+generated: until then (greetings, knowledge base and cached answers), LLM
+questions are answered like questions without a session, so they still
+share the response cache and generations in flight.
+
+Sessions live in process memory, bounded in count (least recently used are
+evicted) and dropped after an idle period. They are only touched from the
+event loop; the lock of a session serializes the non-streamed LLM turns of
+its user, so each continues from the context of the previous one. A
+streamed turn only holds it while its prompt is built, so a slow reader
+does not block the other requests of its user.
+"""
+
+import asyncio
+import time
+from array import array
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, NamedTuple, Optional, Sequence
+
+from .config import settings
+
+
+class ChatTurn(NamedTuple):
+    """One question and its answer."""
+    question: str
+    answer: str
+    # Prompt tokens Ollama evaluated (None when the answer was not generated)
+    prompt_eval_count: Optional[int] = None
+    # Generated from the session context with the short follow-up prompt
+    continued: bool = False
+
+
+class ChatSession:
+    """Recent turns and Ollama context of one user."""
+
+    def __init__(
+        self,
+        username: str,
+        max_turns: int,
+        max_context_tokens: int,
+        on_generation: Optional[Callable[[ChatTurn], None]] = None
+    ):
+        """
+        Args:
+            username: Owner of the session
+            max_turns: Turns kept (oldest are dropped)
+            max_context_tokens: Longest context kept; a longer one is dropped
+                and the next LLM turn starts again from the full prompt
+            on_generation: Called with each generated turn
+        """
+        self.username = username
+        self.on_generation = on_generation
+        self.max_context_tokens = max_context_tokens
+        self.turns: Deque[ChatTurn] = deque(maxlen=max_turns)
+        # Context of the last generation (int32 token ids), if it can be continued
+        self.context: Optional[array] = None
+        # Turns answered without the LLM since the context was returned
+        self.pending: Deque[ChatTurn] = deque(maxlen=max_turns)
+        # Whether a turn was generated: later LLM turns follow the conversation
+        self.generated = False
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+    def add_answer(self, question: str, answer: str) -> ChatTurn:
+        """Record a turn answered without a generation (template, knowledge base, cache)."""
+        turn = ChatTurn(question, answer)
+        self.turns.append(turn)
+        if self.context is not None:
+            self.pending.append(turn)
+        return turn
+
+    def add_generation(
+        self,
+        question: str,
+        answer: str,
+        context: Optional[Sequence[int]],
+        prompt_eval_count: Optional[int],
+        continued: bool
+    ) -> ChatTurn:
+        """
+        Record a generated turn and the context Ollama returned with it.
+
+        Args:
+            question: User's question
+            answer: Generated answer
+            context: Context token array of the generation (None if not returned)
+            prompt_eval_count: Prompt tokens Ollama evaluated
+            continued: Whether the generation continued from the session context
+
+        Returns:
+            The recorded turn
+        """
+        turn = ChatTurn(question, answer, prompt_eval_count, continued)
+        self.turns.append(turn)
+        self.pending.clear()
+        self.generated = True
+        if context is not None and len(context) <= self.max_context_tokens:
+            self.context = array("i", context)
+        else:
+            self.context = None
+        if self.on_generation is not None:
+            self.on_generation(turn)
+        return turn
+
+    def context_tokens(self) -> int:
+        """Tokens held in the context."""
+        return len(self.context) if self.context is not None else 0
+
+
+class SessionStore:
+    """Bounded set of chat sessions by username, evicted when idle."""
+
+    def __init__(
+        self,
+        name: str,
+        max_sessions: int,
+        idle_seconds: float,
+        max_turns: int,
+        max_context_tokens: int
+    ):
+        """
+        Args:
+            name: Store name, used in statistics
+            max_sessions: Sessions kept (least recently used are evicted)
+            idle_seconds: Sessions unused for this long are dropped
+            max_turns: Turns kept per session
+            max_context_tokens: Longest Ollama context kept per session
+        """
+        self.name = name
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.max_turns = max_turns
+        self.max_context_tokens = max_context_tokens
+        # Least recently used first
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self.created = 0
+        self.evicted_idle = 0
+        self.evicted_capacity = 0
+        self.generations = {"full": 0, "continued": 0}
+        self.prompt_eval_tokens = {"full": 0, "continued": 0}
+        # Optional callback(mode, prompt_eval_count) invoked for each generated turn
+        self.on_generation: Optional[Callable[[str, int], None]] = None
+
+    def _evict_idle(self, now: float):
+        """Drop the sessions idle for too long (the least recently used come first)."""
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_used < self.idle_seconds:
+                break
+            self._sessions.popitem(last=False)
+            self.evicted_idle += 1
+
+    def get(self, username: str, create: bool = True) -> Optional[ChatSession]:
+        """
+        Session of a user, marked as used.
+
+        Args:
+            username: User
+            create: Start a session if the user has none
+
+        Returns:
+            The session, or None if absent and create is False
+        """
+        now = time.monotonic()
+        self._evict_idle(now)
+        session = self._sessions.get(username)
+        if session is None:
+            if not create or self.max_sessions <= 0:
+                return None
+            session = ChatSession(
+                username, self.max_turns, self.max_context_tokens, on_generation=self._count_generation
+            )
+            self._sessions[username] = session
+            self.created += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted_capacity += 1
+        else:
+            self._sessions.move_to_end(username)
+        session.last_used = now
+        return session
+
+    def reset(self, username: str) -> bool:
+        """End the session of a user. Returns True if there was one."""
+        return self._sessions.pop(username, None) is not None
+
+    def clear(self) -> int:
+        """End all sessions. Returns the number of sessions removed."""
+        count = len(self._sessions)
+        self._sessions.clear()
+        return count
+
+    def _count_generation(self, turn: ChatTurn):
+        """Count the prompt tokens of a generated turn."""
+        if turn.prompt_eval_count is None:
+            return
+        mode = "continued" if turn.continued else "full"
+        self.generations[mode] += 1
+        self.prompt_eval_tokens[mode] += turn.prompt_eval_count
+        if self.on_generation is not None:
+            self.on_generation(mode, turn.prompt_eval_count)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        """Session statistics."""
+        self._evict_idle(time.monotonic())
+        stats: Dict[str, Any] = {
+            "name": self.name,
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "created": self.created,
+            "evicted_idle": self.evicted_idle,
+            "evicted_capacity": self.evicted_capacity,
+            "context_tokens": sum(s.context_tokens() for s in self._sessions.values()),
+        }
+        for mode in ("full", "continued"):
+            count = self.generations[mode]
+            stats[f"{mode}_generations"] = count
+            stats[f"{mode}_mean_prompt_eval_tokens"] = (
+                self.prompt_eval_tokens[mode] / count if count else 0.0
+            )
+        return stats
+
+
+# Global session store (LLM follow-ups of /api/chat and /api/chat/stream)
+sessions = SessionStore(
+    "chat",
+    max_sessions=settings.chat_session_max_sessions if settings.chat_sessions_enabled else 0,
+    idle_seconds=settings.chat_session_idle_seconds,
+    max_turns=settings.chat_session_max_turns,
+    max_context_tokens=settings.chat_session_max_context_tokens
+)
@@ -0,0 +1,179 @@
+"""
+Single-flight coalescing of identical concurrent calls.
+
+The first caller for a key (the leader) starts the call in its own task;
+callers arriving with the same key while it is in flight (followers) share
+its result instead of starting another one. Streams are broadcast: every
+subscriber receives the items produced so far, then follows the live stream.
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ROLE_LEADER = "leader"
+ROLE_FOLLOWER = "follower"
+
+
+class _Broadcast:
+    """Items of one in-flight stream, replayed to each subscriber."""
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.changed = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def notify(self):
+        """Wake up the subscribers waiting for the next item."""
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls and streams sharing a key.
+
+    Must be used from a single event loop. Results are not kept once the call
+    completes: a caller arriving afterwards starts a new call.
+    """
+
+    def __init__(self, name: str):
+        """
+        Initialize group.
+
+        Args:
+            name: Group name, used in statistics
+        """
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self._streams: Dict[Hashable, _Broadcast] = {}
+        self.leaders = 0
+        self.followers = 0
+        # Optional callback(mode, role) invoked for each call ("call" or "stream")
+        self.on_call: Optional[Callable[[str, str], None]] = None
+
+    def _record(self, mode: str, role: str):
+        if role == ROLE_LEADER:
+            self.leaders += 1
+        else:
+            self.followers += 1
+        if self.on_call is not None:
+            self.on_call(mode, role)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func, or wait for the identical call already in flight.
+
+        Cancelling a caller does not cancel the shared call, so the other
+        callers still get its result.
+
+        Args:
+            key: Identity of the call
+            func: Coroutine function starting the call
+
+        Returns:
+            Result of the shared call (its exception is raised to every caller)
+        """
+        future = self._calls.get(key)
+        if future is None:
+            self._record("call", ROLE_LEADER)
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._call_done(key, done))
+        else:
+            self._record("call", ROLE_FOLLOWER)
+        return await asyncio.shield(future)
+
+    def _call_done(self, key: Hashable, future: asyncio.Future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        # Mark the exception as retrieved when every caller was cancelled
+        if not future.cancelled():
+            future.exception()
+
+    async def stream(
+        self,
+        key: Hashable,
+        factory: Callable[[], AsyncIterator[Any]]
+    ) -> AsyncIterator[Any]:
+        """
+        Iterate over a stream shared by all concurrent subscribers of key.
+
+        The upstream stream runs in its own task and is cancelled (closing the
+        upstream iterator) when its last subscriber goes away.
+
+        Args:
+            key: Identity of the stream
+            factory: Returns the upstream async iterator
+
+        Yields:
+            Items of the shared stream, from the first one
+
+        Raises:
+            The exception that ended the upstream stream, if any
+        """
+        flight = self._streams.get(key)
+        if flight is None:
+            self._record("stream", ROLE_LEADER)
+            flight = _Broadcast()
+            self._streams[key] = flight
+            flight.task = asyncio.create_task(self._pump(key, flight, factory))
+        else:
+            self._record("stream", ROLE_FOLLOWER)
+
+        flight.subscribers += 1
+        try:
+            position = 0
+            while True:
+                while position < len(flight.items):
+                    yield flight.items[position]
+                    position += 1
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await flight.changed.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                # Nobody is listening any more: stop the upstream generation
+                if self._streams.get(key) is flight:
+                    del self._streams[key]
+                flight.task.cancel()
+
+    async def _pump(self, key: Hashable, flight: _Broadcast, factory: Callable[[], AsyncIterator[Any]]):
+        """Read the upstream stream into the broadcast."""
+        upstream = factory()
+        try:
+            async for item in upstream:
+                flight.items.append(item)
+                flight.notify()
+        except asyncio.CancelledError:
+            flight.error = RuntimeError(f"{self.name}: shared stream cancelled")
+            raise
+        except Exception as e:
+            flight.error = e
+        finally:
+            close = getattr(upstream, "aclose", None)
+            if close is not None:
+                await close()
+            flight.done = True
+            if self._streams.get(key) is flight:
+                del self._streams[key]
+            flight.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        """Group statistics."""
+        total = self.leaders + self.followers
+        return {
+            "name": self.name,
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "in_flight": len(self._calls) + len(self._streams),
+            "coalescing_ratio": self.followers / total if total else 0.0,
+        }
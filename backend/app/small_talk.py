@@ -0,0 +1,186 @@
+"""
+Greeting and small talk recognition with local template answers.
+
+Intents come from a template table: each one has regular expressions, a kind
+(greeting or conversational) and the answer to send. All patterns are
+compiled into a single alternation with one named group per intent, so a
+message is recognized with one regex scan instead of a loop over patterns.
+
+A message is complete small talk when little is left once the recognized
+phrases are removed ("Bonjour !", "Salut, ça va ?"); a greeting followed by a
+real question ("Bonjour, comment poser un congé ?") is not.
+"""
+
+import json
+import logging
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+KIND_GREETING = "greeting"
+KIND_CONVERSATIONAL = "conversational"
+
+# Built-in template table; when several intents match, the first one listed wins
+DEFAULT_TEMPLATES: List[Dict] = [
+    {
+        "intent": "identity",
+        "kind": KIND_GREETING,
+        "patterns": [
+            r"\b(qui es-tu|qui êtes-vous|c'est quoi ton nom|quel est ton nom)\b",
+            r"\b(comment (tu )?t'appelles?|comment (vous )?vous appelez)\b",
+        ],
+        "response": (
+            "Je suis l'assistant RH virtuel de Safran. Je réponds à vos questions sur les "
+            "congés, la paie, le temps de travail et les avantages. Comment puis-je vous aider ?"
+        ),
+    },
+    {
+        "intent": "how_are_you",
+        "kind": KIND_CONVERSATIONAL,
+        "patterns": [
+            r"\b(comment (vas-tu|allez-vous|ça va|ca va))\b",
+            r"\b(ça va|ca va)\??$",
+            r"\b(tu vas bien|vous allez bien)\b",
+        ],
+        "response": (
+            "Je vais bien, merci ! Je suis l'assistant RH virtuel de Safran. "
+            "Comment puis-je vous aider ?"
+        ),
+    },
+    {
+        "intent": "thanks",
+        "kind": KIND_CONVERSATIONAL,
+        "patterns": [
+            r"\b(merci( beaucoup| bien)?( pour (ton|votre) aide)?|je vous remercie|je te remercie)\b",
+        ],
+        "response": "Avec plaisir ! N'hésitez pas si vous avez d'autres questions RH.",
+    },
+    {
+        "intent": "goodbye",
+        "kind": KIND_CONVERSATIONAL,
+        "patterns": [r"\b(au revoir|bonne (journée|soirée)|à bientôt|bye)\b"],
+        "response": "Au revoir et bonne journée !",
+    },
+    {
+        "intent": "greeting",
+        "kind": KIND_GREETING,
+        "patterns": [r"\b(bonjour|salut|hello|hey|bonsoir|coucou)\b"],
+        "response": "Bonjour ! Je suis l'assistant RH virtuel de Safran. Comment puis-je vous aider ?",
+    },
+]
+
+# Words left over after removing recognized phrases, ignoring punctuation
+_WORDS = re.compile(r"[\w'-]+")
+
+
+class SmallTalkMatch(NamedTuple):
+    """A recognized small talk intent."""
+    intent: str
+    kind: str
+    response: str
+    # Nothing but small talk in the message (at most max_extra_words other words)
+    complete: bool
+
+
+class SmallTalkMatcher:
+    """Precompiled matcher over a template table."""
+
+    def __init__(self, templates: List[Dict], max_extra_words: int = 2):
+        """
+        Compile the table.
+
+        Args:
+            templates: Entries with intent, kind, patterns and response
+            max_extra_words: Other words allowed in complete small talk
+        """
+        self.templates = templates
+        self.max_extra_words = max_extra_words
+        alternatives = []
+        for i, template in enumerate(templates):
+            if template.get("kind", KIND_CONVERSATIONAL) not in (KIND_GREETING, KIND_CONVERSATIONAL):
+                raise ValueError(f"Unknown small talk kind for intent {template['intent']}")
+            patterns = "|".join(f"(?:{pattern})" for pattern in template["patterns"])
+            alternatives.append(f"(?P<t{i}>{patterns})")
+        self._pattern = re.compile("|".join(alternatives)) if alternatives else None
+
+    @classmethod
+    def from_file(cls, path: str, max_extra_words: int = 2) -> "SmallTalkMatcher":
+        """Load the template table from a JSON file (a list of entries)."""
+        with open(path, "r", encoding="utf-8") as f:
+            templates = json.load(f)
+        logger.info(f"Loaded {len(templates)} small talk intents from {path}")
+        return cls(templates, max_extra_words)
+
+    def match(self, message: str) -> Optional[SmallTalkMatch]:
+        """
+        Recognize small talk in a message.
+
+        Args:
+            message: User's message
+
+        Returns:
+            The highest-priority intent found, or None
+        """
+        if self._pattern is None:
+            return None
+        text = message.lower().strip()
+        best = None
+        covered = 0
+        for found in self._pattern.finditer(text):
+            template = int(found.lastgroup[1:])
+            best = template if best is None else min(best, template)
+            covered += len(_WORDS.findall(found.group()))
+        if best is None:
+            return None
+
+        template = self.templates[best]
+        extra_words = len(_WORDS.findall(text)) - covered
+        return SmallTalkMatch(
+            intent=template["intent"],
+            kind=template.get("kind", KIND_CONVERSATIONAL),
+            response=template["response"],
+            complete=extra_words <= self.max_extra_words
+        )
+
+
+def _load_matcher() -> SmallTalkMatcher:
+    if settings.small_talk_templates_path:
+        return SmallTalkMatcher.from_file(
+            settings.small_talk_templates_path, settings.small_talk_max_extra_words
+        )
+    return SmallTalkMatcher(DEFAULT_TEMPLATES, settings.small_talk_max_extra_words)
+
+
+# Global matcher (template table from settings)
+small_talk = _load_matcher()
+
+
+def is_greeting(message: str) -> bool:
+    """
+    Check if the message is a greeting or self-introduction question.
+
+    Args:
+        message: User's message
+
+    Returns:
+        True if it's a greeting, False otherwise
+    """
+    found = small_talk.match(message)
+    return found is not None and found.kind == KIND_GREETING
+
+
+def is_conversational(message: str) -> bool:
+    """
+    Check if the message is a conversational question (not HR-related).
+
+    Args:
+        message: User's message
+
+    Returns:
+        True if it's conversational, False otherwise
+    """
+    found = small_talk.match(message)
+    return found is not None and found.kind == KIND_CONVERSATIONAL
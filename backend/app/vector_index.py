@@ -0,0 +1,345 @@
+"""
+Vector index backends for knowledge base retrieval.
+
+All backends search L2-normalized float32 vectors by inner product (cosine
+similarity) and return (scores, ids), best first:
+- exact: full NumPy scan, the reference implementation
+- ivf: inverted file index (spherical k-means coarse quantizer), pure NumPy;
+  only the vectors of the nprobe closest clusters are scanned
+- hnsw: hierarchical navigable small world graph (requires hnswlib)
+
+Built indexes can be saved next to the embedding artifact and loaded back
+instead of being rebuilt.
+"""
+
+import logging
+import math
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKEND_EXACT = "exact"
+BACKEND_IVF = "ivf"
+BACKEND_HNSW = "hnsw"
+
+SearchResult = Tuple[np.ndarray, np.ndarray]
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k == 1:
+        return np.array([int(scores.argmax())])
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class VectorIndex:
+    """Base class of vector index backends."""
+
+    backend = ""
+    file_suffix = ".npz"
+
+    def __init__(self, vectors: np.ndarray):
+        """
+        Args:
+            vectors: L2-normalized float32 vectors, one per row (kept by reference)
+        """
+        self.vectors = vectors
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def search(self, query: np.ndarray, k: int = 1) -> SearchResult:
+        """
+        Find the vectors most similar to a query.
+
+        Args:
+            query: L2-normalized query vector
+            k: Number of results
+
+        Returns:
+            Tuple of (cosine similarities, row ids), best first
+        """
+        raise NotImplementedError
+
+    def search_batch(self, queries: np.ndarray, k: int = 1) -> List[SearchResult]:
+        """
+        Find the vectors most similar to each of several queries.
+
+        Args:
+            queries: L2-normalized query vectors, one per row
+            k: Number of results per query
+
+        Returns:
+            One (cosine similarities, row ids) tuple per query, best first
+        """
+        return [self.search(query, k) for query in queries]
+
+    def save(self, path: Path):
+        """Persist the built index structure (vectors are not included)."""
+
+    @classmethod
+    def load(cls, path: Path, vectors: np.ndarray) -> Optional["VectorIndex"]:
+        """Load a persisted index for the given vectors, or None if unusable."""
+        return None
+
+
+class ExactIndex(VectorIndex):
+    """Brute-force scan over all vectors."""
+
+    backend = BACKEND_EXACT
+
+    def search(self, query: np.ndarray, k: int = 1) -> SearchResult:
+        if len(self.vectors) == 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        scores = self.vectors @ query
+        best = top_k_indices(scores, k)
+        return scores[best], best
+
+    def search_batch(self, queries: np.ndarray, k: int = 1) -> List[SearchResult]:
+        if len(self.vectors) == 0:
+            return [(np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)) for _ in queries]
+        # One matrix multiply for all queries
+        scores = queries @ self.vectors.T
+        if k == 1:
+            best = scores.argmax(axis=1)
+            return [
+                (scores[i, best[i]:best[i] + 1], best[i:i + 1])
+                for i in range(len(queries))
+            ]
+        results = []
+        for row in scores:
+            best = top_k_indices(row, k)
+            results.append((row[best], best))
+        return results
+
+
+class IVFIndex(VectorIndex):
+    """Inverted file index with a spherical k-means coarse quantizer."""
+
+    backend = BACKEND_IVF
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        nlist: int = 0,
+        nprobe: int = 16,
+        iterations: int = 10,
+        seed: int = 0,
+        _structure: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+    ):
+        """
+        Build the index.
+
+        Args:
+            vectors: L2-normalized float32 vectors
+            nlist: Number of clusters (0 picks about 4 * sqrt(n))
+            nprobe: Number of clusters scanned per query
+            iterations: k-means iterations
+            seed: Random seed for centroid initialization
+        """
+        super().__init__(vectors)
+        self.nprobe = nprobe
+        if _structure is not None:
+            self.centroids, self.list_ids, self.offsets = _structure
+            return
+
+        n = len(vectors)
+        nlist = nlist or int(4 * math.sqrt(max(n, 1)))
+        nlist = max(1, min(nlist, n))
+        self.centroids = self._train(vectors, nlist, iterations, seed)
+        assignments = self._assign(vectors, self.centroids)
+        # Row ids grouped by cluster; cluster c spans list_ids[offsets[c]:offsets[c + 1]]
+        self.list_ids = np.argsort(assignments, kind="stable").astype(np.int64)
+        self.offsets = np.searchsorted(assignments[self.list_ids], np.arange(nlist + 1)).astype(np.int64)
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+        """Closest centroid of each vector, computed in chunks to bound memory."""
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), chunk):
+            block = np.asarray(vectors[start:start + chunk])
+            assignments[start:start + chunk] = (block @ centroids.T).argmax(axis=1)
+        return assignments
+
+    @classmethod
+    def _train(cls, vectors: np.ndarray, nlist: int, iterations: int, seed: int) -> np.ndarray:
+        """Spherical k-means on a sample of the vectors."""
+        rng = np.random.default_rng(seed)
+        n = len(vectors)
+        sample_size = min(n, nlist * 256)
+        sample = np.asarray(vectors[np.sort(rng.choice(n, sample_size, replace=False))])
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignments = cls._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=nlist)
+            empty = counts == 0
+            if empty.any():
+                # Re-seed empty clusters with random sample points
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = (sums / np.maximum(norms, 1e-12)).astype(np.float32)
+        return centroids
+
+    def search(self, query: np.ndarray, k: int = 1) -> SearchResult:
+        nprobe = min(self.nprobe, len(self.centroids))
+        clusters = top_k_indices(self.centroids @ query, nprobe)
+        candidates = np.concatenate([
+            self.list_ids[self.offsets[c]:self.offsets[c + 1]] for c in clusters
+        ])
+        if len(candidates) == 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        scores = self.vectors[candidates] @ query
+        best = top_k_indices(scores, k)
+        return scores[best], candidates[best]
+
+    def save(self, path: Path):
+        with open(path, "wb") as f:
+            np.savez(f, centroids=self.centroids, list_ids=self.list_ids, offsets=self.offsets)
+
+    @classmethod
+    def load(cls, path: Path, vectors: np.ndarray, nprobe: int = 16, **_) -> Optional["IVFIndex"]:
+        try:
+            with np.load(path) as data:
+                structure = (data["centroids"], data["list_ids"], data["offsets"])
+        except (OSError, KeyError, ValueError):
+            return None
+        if len(structure[1]) != len(vectors) or structure[0].shape[1] != vectors.shape[1]:
+            return None
+        return cls(vectors, nprobe=nprobe, _structure=structure)
+
+
+class HNSWIndex(VectorIndex):
+    """HNSW graph index backed by hnswlib."""
+
+    backend = BACKEND_HNSW
+    file_suffix = ".hnsw"
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        m: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        _graph=None
+    ):
+        """
+        Build the index.
+
+        Args:
+            vectors: L2-normalized float32 vectors
+            m: Graph degree
+            ef_construction: Candidate list size while building
+            ef_search: Candidate list size while searching
+
+        Raises:
+            ImportError: If hnswlib is not installed
+        """
+        super().__init__(vectors)
+        self.ef_search = ef_search
+        if _graph is not None:
+            self.graph = _graph
+        else:
+            hnswlib = self._import_hnswlib()
+            self.graph = hnswlib.Index(space="ip", dim=vectors.shape[1])
+            self.graph.init_index(max_elements=len(vectors), ef_construction=ef_construction, M=m)
+            self.graph.add_items(np.asarray(vectors), np.arange(len(vectors)))
+        self.graph.set_ef(max(ef_search, 1))
+
+    @staticmethod
+    def _import_hnswlib():
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise ImportError(
+                "The 'hnsw' vector backend requires hnswlib (pip install hnswlib)"
+            ) from e
+        return hnswlib
+
+    def search(self, query: np.ndarray, k: int = 1) -> SearchResult:
+        k = min(k, len(self.vectors))
+        if k <= 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        self.graph.set_ef(max(self.ef_search, k))
+        labels, distances = self.graph.knn_query(query, k=k)
+        # hnswlib "ip" distance is 1 - inner product
+        return (1.0 - distances[0]).astype(np.float32), labels[0].astype(np.int64)
+
+    def save(self, path: Path):
+        self.graph.save_index(str(path))
+
+    @classmethod
+    def load(cls, path: Path, vectors: np.ndarray, ef_search: int = 64, **_) -> Optional["HNSWIndex"]:
+        hnswlib = cls._import_hnswlib()
+        graph = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        try:
+            graph.load_index(str(path), max_elements=len(vectors))
+        except (OSError, RuntimeError):
+            return None
+        if graph.get_current_count() != len(vectors):
+            return None
+        return cls(vectors, ef_search=ef_search, _graph=graph)
+
+
+BACKENDS = {
+    BACKEND_EXACT: ExactIndex,
+    BACKEND_IVF: IVFIndex,
+    BACKEND_HNSW: HNSWIndex,
+}
+
+
+def create_index(
+    backend: str,
+    vectors: np.ndarray,
+    min_rows: int = 0,
+    cache_path: Optional[Path] = None,
+    **params
+) -> VectorIndex:
+    """
+    Build (or load) a vector index.
+
+    Args:
+        backend: Backend name (exact, ivf, hnsw)
+        vectors: L2-normalized float32 vectors
+        min_rows: Use the exact backend below this many vectors
+        cache_path: Persisted index location, without suffix; loaded if valid,
+            written after a build otherwise
+        **params: Backend parameters
+
+    Returns:
+        Vector index
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown vector backend '{backend}' (expected one of {sorted(BACKENDS)})")
+    if backend == BACKEND_EXACT or len(vectors) < max(min_rows, 1):
+        return ExactIndex(vectors)
+
+    index_cls = BACKENDS[backend]
+    path = cache_path.with_name(cache_path.name + index_cls.file_suffix) if cache_path else None
+    if path is not None and path.exists():
+        index = index_cls.load(path, vectors, **params)
+        if index is not None:
+            logger.info(f"Loaded {backend} vector index from {path}")
+            return index
+
+    index = index_cls(vectors, **params)
+    logger.info(f"Built {backend} vector index over {len(vectors)} vectors")
+    if path is not None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            index.save(path)
+        except OSError as e:
+            logger.warning(f"Could not persist {backend} vector index to {path}: {str(e)}")
+    return index
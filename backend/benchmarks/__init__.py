@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for the HR Chatbot backend.
+
+Run from the backend directory, e.g.:
+    python -m benchmarks.ldap_pool_bench
+"""
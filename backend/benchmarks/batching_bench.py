@@ -0,0 +1,98 @@
+"""
+Question encoding throughput with and without micro-batching.
+
+Drives RAGEngine.aencode_query from many concurrent asyncio clients, as the
+chat endpoints do, with the query embedding cache disabled so every call
+reaches the model:
+- off: each question is encoded alone in a worker thread
+- on: questions go through the EmbeddingBatcher (one encode call per batch)
+
+Usage (from the backend directory):
+    python -m benchmarks.batching_bench --concurrency 1 8 32 --windows 2 5 10
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.cache import TTLCache
+from app.rag import EmbeddingBatcher, RAGEngine
+from .common import print_table, summarize, write_results
+
+
+def make_questions(count: int):
+    """Distinct questions, so nothing is served from a cache."""
+    topics = ["congés payés", "mutuelle", "télétravail", "heures supplémentaires", "formation"]
+    return [f"Question {i} sur {topics[i % len(topics)]} ?" for i in range(count)]
+
+
+async def run_clients(engine: RAGEngine, questions, concurrency: int):
+    """Encode all questions from `concurrency` concurrent clients."""
+    latencies = []
+    pending = iter(questions)
+
+    async def client():
+        for question in pending:
+            t0 = time.perf_counter()
+            await engine.aencode_query(question)
+            latencies.append(time.perf_counter() - t0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def bench(engine: RAGEngine, args):
+    rows = []
+    for concurrency in args.concurrency:
+        questions = make_questions(args.requests)
+        rows.append({
+            "concurrency": concurrency,
+            "batching": "off",
+            "window_ms": 0.0,
+            "mean_batch": 1.0,
+            **await run_clients(engine, questions, concurrency),
+        })
+        for window_ms in args.windows:
+            engine.batcher = EmbeddingBatcher(
+                engine.encode_queries, window_ms=window_ms, max_batch_size=args.max_batch_size
+            )
+            engine.batcher.start()
+            result = await run_clients(engine, questions, concurrency)
+            stats = engine.batcher.stats()
+            await engine.batcher.close()
+            rows.append({
+                "concurrency": concurrency,
+                "batching": "on",
+                "window_ms": window_ms,
+                "mean_batch": stats["mean_batch_size"],
+                "mean_wait_ms": stats["mean_wait_ms"],
+                **result,
+            })
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--windows", type=float, nargs="+", default=[2.0, 5.0, 10.0],
+                        help="Batching windows to test, in milliseconds")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=256, help="Questions per run")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    engine = RAGEngine()
+    engine.load()
+    engine.query_cache = TTLCache(name="query_embeddings", max_size=0)
+    # Warm up the model outside of the measurements
+    engine.encode_queries(make_questions(8))
+
+    rows = asyncio.run(bench(engine, args))
+    print_table(rows, ["concurrency", "batching", "window_ms", "mean_batch", "rps", "p50_ms", "p95_ms", "p99_ms"])
+    write_results(args.output, "batching", vars(args), rows)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,153 @@
+"""
+Cache backends: operation latency, value size and hit rate across replicas.
+
+- serialization: size and encode/decode time of a question embedding with
+  pack_value, compared with pickle and a JSON list
+- operations: latency of get, set, and bulk get/set of --batch embeddings on
+  the local backend and on the shared one (MGET and a single pipeline)
+- replicas: hit rate of --replicas caches fed round-robin (as behind nginx)
+  with questions drawn from a Zipf distribution, each replica with its own
+  local cache or all of them sharing the store
+
+The shared store is the fake Redis-protocol server (benchmarks.fake_kv) with
+--rtt-ms of simulated network delay, or a real server given with --url.
+Requires the redis package.
+
+Usage (from the backend directory):
+    python -m benchmarks.cache_bench --rtt-ms 0.5 --batch 32 --replicas 4
+"""
+
+import argparse
+import json
+import pickle
+import time
+
+import numpy as np
+
+from app.cache import TTLCache
+from app.cache_backends import MISSING, LocalBackend, RedisBackend, pack_value, unpack_value
+from .common import print_table, summarize, write_results
+from .fake_kv import FakeKVServer
+
+
+def timed_calls(name: str, backend: str, func, iterations: int) -> dict:
+    """Time `iterations` calls of func(i)."""
+    latencies = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        func(i)
+        latencies.append(time.perf_counter() - t0)
+    return {"operation": name, "backend": backend, **summarize(latencies, time.perf_counter() - start)}
+
+
+def serialization_rows(vector: np.ndarray, iterations: int) -> list:
+    formats = {
+        "pack_value": (pack_value, unpack_value),
+        "pickle": (pickle.dumps, pickle.loads),
+        "json": (lambda v: json.dumps(v.tolist()).encode("utf-8"),
+                 lambda data: np.asarray(json.loads(data), dtype=np.float32)),
+    }
+    rows = []
+    for name, (encode, decode) in formats.items():
+        data = encode(vector)
+        encoding = timed_calls("encode", name, lambda i: encode(vector), iterations)
+        decoding = timed_calls("decode", name, lambda i: decode(data), iterations)
+        rows.append({
+            "format": name,
+            "bytes": len(data),
+            "encode_us": 1000 * encoding["mean_ms"],
+            "decode_us": 1000 * decoding["mean_ms"],
+        })
+    return rows
+
+
+def operation_rows(backend, vectors: np.ndarray, batch: int, iterations: int) -> list:
+    keys = [f"q{i}" for i in range(len(vectors))]
+    backend.set_many(list(zip(keys, vectors)), None)
+    count = len(keys)
+
+    def batch_keys(i):
+        first = (i * batch) % (count - batch)
+        return keys[first:first + batch]
+
+    return [
+        timed_calls("get", backend.kind, lambda i: backend.get(keys[i % count]), iterations),
+        timed_calls("set", backend.kind, lambda i: backend.set(keys[i % count], vectors[i % count], None), iterations),
+        timed_calls(f"get_many[{batch}]", backend.kind, lambda i: backend.get_many(batch_keys(i)), iterations),
+        timed_calls(
+            f"set_many[{batch}]", backend.kind,
+            lambda i: backend.set_many([(key, vectors[0]) for key in batch_keys(i)], None), iterations
+        ),
+    ]
+
+
+def replica_hit_rate(make_backend, replicas: int, questions: int, requests: int, seed: int = 42) -> float:
+    """Hit rate of round-robin replicas caching Zipf-distributed questions."""
+    rng = np.random.default_rng(seed)
+    stream = (rng.zipf(1.2, size=requests) - 1) % questions
+    vector = np.zeros(8, dtype=np.float32)
+    caches = [TTLCache("bench", max_size=questions, backend=make_backend(r)) for r in range(replicas)]
+    for i, question in enumerate(stream):
+        cache = caches[i % replicas]
+        key = f"q{question}"
+        if cache.get(key) is MISSING:
+            cache.set(key, vector)
+    hits = sum(cache.hits for cache in caches)
+    return hits / requests
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Redis-protocol server to use instead of the fake one")
+    parser.add_argument("--rtt-ms", type=float, default=0.5, help="Round-trip delay of the fake server")
+    parser.add_argument("--dim", type=int, default=768, help="Embedding dimension")
+    parser.add_argument("--batch", type=int, default=32, help="Keys per bulk operation")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--replicas", type=int, default=4)
+    parser.add_argument("--questions", type=int, default=2000, help="Distinct questions of the replica run")
+    parser.add_argument("--requests", type=int, default=20000, help="Requests of the replica run")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    import redis
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((max(256, 4 * args.batch), args.dim)).astype(np.float32)
+
+    serialization = serialization_rows(vectors[0], args.iterations)
+    print_table(serialization, ["format", "bytes", "encode_us", "decode_us"])
+
+    fake = None if args.url else FakeKVServer(rtt_ms=args.rtt_ms).start()
+    try:
+        client = redis.Redis.from_url(args.url or fake.url)
+        client.ping()
+        operations = operation_rows(LocalBackend("bench", len(vectors)), vectors, args.batch, args.iterations)
+        operations += operation_rows(RedisBackend("bench", client, "bench:ops:"), vectors, args.batch, args.iterations)
+        print()
+        print_table(operations, ["operation", "backend", "mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+
+        replicas = [
+            {"backend": "local", "replicas": args.replicas, "hit_rate": replica_hit_rate(
+                lambda r: LocalBackend("bench", args.questions), args.replicas, args.questions, args.requests
+            )},
+            {"backend": "redis", "replicas": args.replicas, "hit_rate": replica_hit_rate(
+                lambda r: RedisBackend("bench", redis.Redis.from_url(args.url or fake.url), "bench:replicas:"),
+                args.replicas, args.questions, args.requests
+            )},
+        ]
+        print()
+        print_table(replicas, ["backend", "replicas", "hit_rate"])
+        RedisBackend("bench", client, "bench:").clear()
+    finally:
+        if fake is not None:
+            fake.stop()
+
+    write_results(args.output, "cache", vars(args), {
+        "serialization": serialization, "operations": operations, "replicas": replicas
+    })
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,162 @@
+"""
+Shared helpers for benchmarks: latency summaries, tables and JSON results.
+"""
+
+import json
+import platform
+import socket
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of a sequence (0 for an empty sequence)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies: Sequence[float], elapsed: float) -> Dict[str, float]:
+    """
+    Summarize per-operation latencies.
+
+    Args:
+        latencies: Latencies in seconds
+        elapsed: Wall-clock duration of the run in seconds
+
+    Returns:
+        Count, throughput and latency percentiles in milliseconds
+    """
+    count = len(latencies)
+    return {
+        "count": count,
+        "rps": count / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": 1000 * sum(latencies) / count if count else 0.0,
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p95_ms": 1000 * percentile(latencies, 95),
+        "p99_ms": 1000 * percentile(latencies, 99),
+        "max_ms": 1000 * max(latencies) if count else 0.0,
+    }
+
+
+def rss_mb() -> float:
+    """Resident set size of the current process in MB (peak RSS if /proc is unavailable)."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+
+
+def timed(func, *args, **kwargs):
+    """Call a function and return (result, elapsed seconds)."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def print_table(rows: List[Dict[str, Any]], columns: Optional[List[str]] = None):
+    """Print a list of result dictionaries as an aligned table."""
+    if not rows:
+        return
+    columns = columns or list(rows[0].keys())
+
+    def fmt(value):
+        return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+    widths = [max(len(c), *(len(fmt(r.get(c, ""))) for r in rows)) for c in columns]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(fmt(row.get(c, "")).ljust(w) for c, w in zip(columns, widths)))
+
+
+def write_results(path: Optional[str], name: str, config: Dict[str, Any], results: Any):
+    """
+    Write benchmark results as JSON so runs can be compared.
+
+    Args:
+        path: Output file (nothing is written if None)
+        name: Benchmark name
+        config: Parameters of the run
+        results: Benchmark results
+    """
+    if not path:
+        return
+    payload = {
+        "benchmark": name,
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": config,
+        "results": results,
+    }
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+    print(f"\nResults written to {path}")
+
+
+def free_port() -> int:
+    """A free TCP port on the loopback interface."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class ServerThread:
+    """Run an ASGI application with uvicorn in a background thread."""
+
+    def __init__(self, app, port: Optional[int] = None, host: str = "127.0.0.1"):
+        """
+        Args:
+            app: ASGI application (its lifespan runs on start)
+            port: Port to listen on (a free one if None)
+            host: Interface to bind
+        """
+        import uvicorn
+
+        self.host = host
+        self.port = port or free_port()
+        self.server = uvicorn.Server(uvicorn.Config(
+            app, host=host, port=self.port, log_level="warning", lifespan="on"
+        ))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self, timeout: float = 300.0) -> "ServerThread":
+        """Start serving and wait until the application has started."""
+        self.thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError("Server thread exited during startup")
+            if time.monotonic() > deadline:
+                raise TimeoutError("Server did not start in time")
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        """Shut the server down and wait for its thread."""
+        self.server.should_exit = True
+        self.thread.join(timeout=30)
+
+    def __enter__(self) -> "ServerThread":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,157 @@
+"""
+Embedding backend benchmark: latency, memory and retrieval agreement.
+
+Each candidate ("backend:model", backend being torch, onnx or onnx-int8) is
+measured in its own subprocess so RSS reflects that model alone:
+- load time and RSS after loading and warming up
+- single-question encode latency (the per-request cost on the chat path)
+- batch throughput when encoding the knowledge base questions
+- top-1 agreement with the reference (first) candidate: for query variants of
+  the knowledge base questions, the share whose best-matching entry is the
+  same as with the reference, plus the reference's own top-1 accuracy
+
+ONNX candidates need an export first (python -m app.embeddings export --quantize).
+
+Usage (from the backend directory):
+    python -m benchmarks.embedding_bench \\
+        --candidates torch:all-mpnet-base-v2 onnx:all-mpnet-base-v2 onnx-int8:all-mpnet-base-v2 \\
+                     torch:paraphrase-multilingual-MiniLM-L12-v2
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+from app.embeddings import BACKEND_ONNX, load_embedder
+from app.rag import normalize_question
+from .common import print_table, rss_mb, summarize, write_results
+
+
+def query_variants(questions):
+    """Paraphrase-like variants of the knowledge base questions, with their source row."""
+    queries, targets = [], []
+    for row, question in enumerate(questions):
+        words = question.rstrip(" ?").split()
+        variants = [normalize_question(question)]
+        if len(words) > 3:
+            variants.append(" ".join(words[:-1]))
+            variants.append("Dites-moi " + " ".join(words[1:]).lower())
+        for variant in variants:
+            queries.append(variant)
+            targets.append(row)
+    return queries, np.array(targets)
+
+
+def run_worker(candidate: str, csv_path: str, output_dir: str, repeats: int) -> int:
+    """Measure one candidate and write its stats and embeddings to output_dir."""
+    backend, model_name = candidate.split(":", 1)
+    quantized = backend == "onnx-int8"
+    baseline_mb = rss_mb()
+
+    start = time.perf_counter()
+    model = load_embedder(
+        model_name,
+        backend=BACKEND_ONNX if backend.startswith("onnx") else backend,
+        onnx_dir=settings.rag_onnx_dir,
+        quantized=quantized,
+        threads=settings.rag_embedding_threads
+    )
+    questions = pd.read_csv(csv_path)['question'].astype(str).tolist()
+    queries, _ = query_variants(questions)
+    model.encode(queries[:8], normalize_embeddings=True)
+    load_ms = 1000 * (time.perf_counter() - start)
+
+    latencies = []
+    loop_start = time.perf_counter()
+    for _ in range(repeats):
+        for query in queries:
+            t0 = time.perf_counter()
+            model.encode(query, normalize_embeddings=True)
+            latencies.append(time.perf_counter() - t0)
+    single = summarize(latencies, time.perf_counter() - loop_start)
+
+    batch_start = time.perf_counter()
+    kb_embeddings = model.encode(questions, normalize_embeddings=True)
+    batch_seconds = time.perf_counter() - batch_start
+    query_embeddings = model.encode(queries, normalize_embeddings=True)
+
+    out = Path(output_dir)
+    np.save(out / "kb.npy", np.asarray(kb_embeddings, dtype=np.float32))
+    np.save(out / "queries.npy", np.asarray(query_embeddings, dtype=np.float32))
+    with open(out / "stats.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "load_ms": load_ms,
+            "rss_mb": rss_mb(),
+            "model_rss_mb": rss_mb() - baseline_mb,
+            "encode_p50_ms": single["p50_ms"],
+            "encode_p95_ms": single["p95_ms"],
+            "encode_p99_ms": single["p99_ms"],
+            "kb_rows_per_s": len(questions) / batch_seconds if batch_seconds > 0 else 0.0,
+        }, f)
+    return 0
+
+
+def measure(candidate: str, args) -> dict:
+    """Run the worker subprocess for one candidate and load its results."""
+    with tempfile.TemporaryDirectory() as tmp:
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.embedding_bench", "--worker", candidate,
+             "--csv", args.csv, "--worker-dir", tmp, "--repeats", str(args.repeats)],
+            check=True
+        )
+        with open(Path(tmp) / "stats.json", "r", encoding="utf-8") as f:
+            stats = json.load(f)
+        stats["kb"] = np.load(Path(tmp) / "kb.npy")
+        stats["queries"] = np.load(Path(tmp) / "queries.npy")
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", nargs="+",
+                        default=[f"torch:{settings.rag_model_name}", f"onnx:{settings.rag_model_name}",
+                                 f"onnx-int8:{settings.rag_model_name}"],
+                        help="backend:model pairs; the first one is the reference")
+    parser.add_argument("--csv", default=settings.rag_csv_path, help="Knowledge base CSV")
+    parser.add_argument("--repeats", type=int, default=5, help="Passes over the queries for latency")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        return run_worker(args.worker, args.csv, args.worker_dir, args.repeats)
+
+    questions = pd.read_csv(args.csv)['question'].astype(str).tolist()
+    _, targets = query_variants(questions)
+
+    rows = []
+    reference_top1 = None
+    for candidate in args.candidates:
+        stats = measure(candidate, args)
+        top1 = (stats.pop("queries") @ stats.pop("kb").T).argmax(axis=1)
+        if reference_top1 is None:
+            reference_top1 = top1
+        rows.append({
+            "candidate": candidate,
+            **stats,
+            "top1_agreement": float((top1 == reference_top1).mean()),
+            "top1_accuracy": float((top1 == targets).mean()),
+        })
+
+    print_table(rows, ["candidate", "load_ms", "model_rss_mb", "encode_p50_ms", "encode_p95_ms",
+                       "kb_rows_per_s", "top1_agreement", "top1_accuracy"])
+    write_results(args.output, "embedding", vars(args), rows)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
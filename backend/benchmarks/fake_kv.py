@@ -0,0 +1,250 @@
+"""
+Fake Redis-protocol key-value server for cache tests and benchmarks.
+
+Implements the commands the shared cache backend uses (GET, SET with EX/PX,
+MGET, DEL/UNLINK, SCAN MATCH, PING and the connection handshake) in memory,
+with an optional round-trip delay: commands arriving together (a pipeline or
+an MGET) pay it once, like a real network round trip.
+
+Run standalone (from the backend directory), then set
+CACHE_BACKEND=redis and CACHE_REDIS_URL=redis://127.0.0.1:6379/0:
+    python -m benchmarks.fake_kv --port 6379 --rtt-ms 0.5
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .common import free_port
+
+OK = b"+OK\r\n"
+NIL = b"$-1\r\n"
+
+
+def _bulk(value: Optional[bytes]) -> bytes:
+    if value is None:
+        return NIL
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def _integer(value: int) -> bytes:
+    return b":%d\r\n" % value
+
+
+def _array(items: List[bytes]) -> bytes:
+    return b"*%d\r\n" % len(items) + b"".join(items)
+
+
+def _error(message: str) -> bytes:
+    return f"-ERR {message}\r\n".encode("utf-8")
+
+
+def parse_command(buffer: bytearray, pos: int) -> Optional[Tuple[List[bytes], int]]:
+    """
+    Parse one command (array of bulk strings) from buffer.
+
+    Returns:
+        Arguments and the position after the command, or None if incomplete
+    """
+    end = buffer.find(b"\r\n", pos)
+    if end < 0:
+        return None
+    if buffer[pos:pos + 1] != b"*":
+        # Inline command (e.g. typed in telnet)
+        return bytes(buffer[pos:end]).split(), end + 2
+    count = int(buffer[pos + 1:end])
+    pos = end + 2
+    args = []
+    for _ in range(count):
+        end = buffer.find(b"\r\n", pos)
+        if end < 0:
+            return None
+        size = int(buffer[pos + 1:end])
+        start = end + 2
+        if len(buffer) < start + size + 2:
+            return None
+        args.append(bytes(buffer[start:start + size]))
+        pos = start + size + 2
+    return args, pos
+
+
+class FakeKVStore:
+    """In-memory keys with optional expiry, and the commands acting on them."""
+
+    def __init__(self):
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.commands = 0
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def execute(self, args: List[bytes]) -> bytes:
+        """Reply to one command."""
+        self.commands += 1
+        if not args:
+            return _error("empty command")
+        name = args[0].upper()
+        if name == b"GET":
+            return _bulk(self._get(args[1]))
+        if name == b"MGET":
+            return _array([_bulk(self._get(key)) for key in args[1:]])
+        if name == b"SET":
+            expires_at = None
+            options = [arg.upper() for arg in args[3:]]
+            for i, option in enumerate(options):
+                if option == b"EX":
+                    expires_at = time.monotonic() + int(args[4 + i])
+                elif option == b"PX":
+                    expires_at = time.monotonic() + int(args[4 + i]) / 1000.0
+            self.data[args[1]] = (args[2], expires_at)
+            return OK
+        if name in (b"DEL", b"UNLINK"):
+            return _integer(sum(1 for key in args[1:] if self.data.pop(key, None) is not None))
+        if name == b"SCAN":
+            pattern = b"*"
+            for i, arg in enumerate(args[2:-1]):
+                if arg.upper() == b"MATCH":
+                    pattern = args[3 + i]
+            keys = [
+                key for key in list(self.data)
+                if fnmatch.fnmatchcase(key.decode("latin-1"), pattern.decode("latin-1"))
+                and self._get(key) is not None
+            ]
+            # Single pass: the cursor is always 0
+            return _array([_bulk(b"0"), _array([_bulk(key) for key in keys])])
+        if name == b"DBSIZE":
+            return _integer(len(self.data))
+        if name == b"FLUSHDB":
+            self.data.clear()
+            return OK
+        if name == b"PING":
+            return b"+PONG\r\n"
+        if name in (b"CLIENT", b"SELECT"):
+            return OK
+        return _error(f"unknown command '{name.decode('latin-1')}'")
+
+
+class FakeKVServer:
+    """Serve a FakeKVStore on a TCP port from a background thread."""
+
+    def __init__(self, port: Optional[int] = None, host: str = "127.0.0.1", rtt_ms: float = 0.0):
+        """
+        Args:
+            port: Port to listen on (a free one if None)
+            host: Interface to bind
+            rtt_ms: Delay added to each round trip
+        """
+        self.host = host
+        self.port = port or free_port()
+        self.rtt = rtt_ms / 1000.0
+        self.store = FakeKVStore()
+        self.round_trips = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections = set()
+        self._started = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"redis://{self.host}:{self.port}/0"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        buffer = bytearray()
+        self._connections.add(asyncio.current_task())
+        try:
+            while True:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    break
+                buffer += chunk
+                replies = []
+                pos = 0
+                while True:
+                    parsed = parse_command(buffer, pos)
+                    if parsed is None:
+                        break
+                    args, pos = parsed
+                    replies.append(self.store.execute(args))
+                del buffer[:pos]
+                if replies:
+                    self.round_trips += 1
+                    if self.rtt > 0:
+                        await asyncio.sleep(self.rtt)
+                    writer.write(b"".join(replies))
+                    await writer.drain()
+        except (ConnectionError, ValueError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(asyncio.current_task())
+            writer.close()
+
+    async def _serve(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self._started.set()
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            # Close the connections of clients still connected
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._serve())
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    def start(self, timeout: float = 10.0) -> "FakeKVServer":
+        """Start serving and wait until the port is open."""
+        self.thread.start()
+        if not self._started.wait(timeout):
+            raise TimeoutError("Fake key-value server did not start in time")
+        return self
+
+    def stop(self):
+        """Stop serving and wait for the thread."""
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+        self.thread.join(timeout=10)
+
+    def __enter__(self) -> "FakeKVServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--rtt-ms", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    server = FakeKVServer(args.port, args.host, args.rtt_ms).start()
+    print(f"Serving on {server.url} (Ctrl+C to stop)")
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
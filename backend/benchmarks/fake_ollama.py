@@ -0,0 +1,133 @@
+"""
+Fake Ollama HTTP server for load tests.
+
+Implements the endpoints the backend uses (/api/generate, streamed or not,
+optionally continuing from a context, and /api/tags) with a configurable
+time to first token and token rate, so LLM fallbacks cost roughly what they
+cost against a real model.
+
+Run standalone (from the backend directory):
+    python -m benchmarks.fake_ollama --port 11434 --first-token-ms 200 --tokens-per-second 30
+"""
+
+import argparse
+import asyncio
+import json
+import random
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+WORDS = [
+    "Pour", "cette", "question", "je", "vous", "invite", "à", "contacter", "le",
+    "service", "RH", "qui", "pourra", "vous", "renseigner", "précisément", ".",
+]
+
+
+def create_app(
+    first_token_ms: float = 200.0,
+    tokens_per_second: float = 30.0,
+    answer_tokens: int = 40,
+    jitter: float = 0.1
+) -> Starlette:
+    """
+    Build the fake Ollama application.
+
+    Args:
+        first_token_ms: Delay before the first token (prompt evaluation)
+        tokens_per_second: Generation speed after the first token
+        answer_tokens: Tokens per answer
+        jitter: Relative random variation applied to each delay
+    """
+    token_delay = 1.0 / tokens_per_second if tokens_per_second > 0 else 0.0
+    stats = {"generate": 0, "streamed": 0, "in_flight": 0, "max_in_flight": 0}
+
+    def delay(seconds: float) -> float:
+        return max(0.0, seconds * (1.0 + random.uniform(-jitter, jitter)))
+
+    def tokens():
+        return [WORDS[i % len(WORDS)] + " " for i in range(answer_tokens)]
+
+    async def generate(request: Request):
+        body = await request.json()
+        prompt_tokens = len(body.get("prompt", "").split())
+        # A continued generation returns the context it was given, extended
+        context = list(body.get("context") or [])
+        stats["generate"] += 1
+
+        if not body.get("stream", True):
+            stats["in_flight"] += 1
+            stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+            try:
+                await asyncio.sleep(delay(first_token_ms / 1000.0 + answer_tokens * token_delay))
+            finally:
+                stats["in_flight"] -= 1
+            return JSONResponse({
+                "model": body.get("model"),
+                "response": "".join(tokens()),
+                "done": True,
+                "context": context + list(range(prompt_tokens + answer_tokens)),
+                "prompt_eval_count": prompt_tokens,
+                "eval_count": answer_tokens,
+            })
+
+        async def stream():
+            stats["streamed"] += 1
+            stats["in_flight"] += 1
+            stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+            try:
+                await asyncio.sleep(delay(first_token_ms / 1000.0))
+                for token in tokens():
+                    yield json.dumps({"model": body.get("model"), "response": token, "done": False}) + "\n"
+                    await asyncio.sleep(delay(token_delay))
+                yield json.dumps({
+                    "model": body.get("model"),
+                    "response": "",
+                    "done": True,
+                    "context": context + list(range(prompt_tokens + answer_tokens)),
+                    "prompt_eval_count": prompt_tokens,
+                    "eval_count": answer_tokens,
+                }) + "\n"
+            finally:
+                stats["in_flight"] -= 1
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    async def tags(request: Request):
+        return JSONResponse({"models": [{"name": "fake"}]})
+
+    async def fake_stats(request: Request):
+        return JSONResponse(stats)
+
+    app = Starlette(routes=[
+        Route("/api/generate", generate, methods=["POST"]),
+        Route("/api/tags", tags),
+        Route("/stats", fake_stats),
+    ])
+    app.state.stats = stats
+    return app
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--first-token-ms", type=float, default=200.0)
+    parser.add_argument("--tokens-per-second", type=float, default=30.0)
+    parser.add_argument("--answer-tokens", type=int, default=40)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+    uvicorn.run(
+        create_app(args.first_token_ms, args.tokens_per_second, args.answer_tokens),
+        host=args.host,
+        port=args.port,
+        log_level="warning"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,84 @@
+"""
+LDAP connection pool benchmark.
+
+Compares login (user bind) and profile lookup (admin search) latency with and
+without connection pooling, at several concurrency levels, against the mock
+directory with simulated network latency.
+
+Usage (from the backend directory):
+    python -m benchmarks.ldap_pool_bench --concurrency 1 8 32 --connect-ms 3 --rtt-ms 1
+"""
+
+import argparse
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ldap3 import MOCK_SYNC
+
+from app.ldap_service import LDAPService
+from .common import print_table, summarize, write_results
+from .mock_ldap import build_mock_server, make_users, simulated_latency
+
+
+def run_workload(service: LDAPService, users, operation: str, concurrency: int, requests: int):
+    """Run one workload and return per-call latencies and elapsed time."""
+    rng = random.Random(42)
+    picks = [rng.choice(users) for _ in range(requests)]
+
+    def call(user):
+        start = time.perf_counter()
+        if operation == "login":
+            ok = service.authenticate_user(user["username"], user["password"])
+        else:
+            ok = service.lookup_user_profile(user["username"]) is not None
+        if not ok:
+            raise RuntimeError(f"{operation} failed for {user['username']}")
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(call, picks))
+    return latencies, time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50, help="Users in the mock directory")
+    parser.add_argument("--requests", type=int, default=2000, help="Calls per workload")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--connect-ms", type=float, default=3.0, help="Simulated connection setup cost")
+    parser.add_argument("--rtt-ms", type=float, default=1.0, help="Simulated round trip per operation")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR)
+    users = make_users(args.users)
+    server = build_mock_server(users)
+
+    rows = []
+    with simulated_latency(args.connect_ms, args.rtt_ms):
+        for pooled in (False, True):
+            service = LDAPService(server=server, client_strategy=MOCK_SYNC, pooled=pooled)
+            for operation in ("login", "profile"):
+                for concurrency in args.concurrency:
+                    latencies, elapsed = run_workload(
+                        service, users, operation, concurrency, args.requests
+                    )
+                    rows.append({
+                        "mode": "pooled" if pooled else "unpooled",
+                        "operation": operation,
+                        "concurrency": concurrency,
+                        **summarize(latencies, elapsed),
+                    })
+            rows[-1]["pools"] = service.pool_stats()
+            service.close()
+
+    print_table(rows, ["mode", "operation", "concurrency", "rps", "p50_ms", "p95_ms", "p99_ms"])
+    write_results(args.output, "ldap_pool", vars(args), rows)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
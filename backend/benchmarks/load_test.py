@@ -0,0 +1,298 @@
+"""
+End-to-end load test of the API.
+
+Starts the FastAPI application in-process against the mock LDAP directory
+(benchmarks.mock_ldap) and a fake Ollama server (benchmarks.fake_ollama),
+then drives it over HTTP:
+- closed-loop workloads (login, refresh, chat, chat_stream): `concurrency`
+  clients each send their next request as soon as the previous one answers
+- trace replay: requests from a trace file (benchmarks.trace) are sent at
+  their recorded offsets divided by --speed, whatever the response times
+
+Chat questions mix knowledge base questions, greetings and off-topic
+questions that fall back to the (fake) LLM. The RAG engine loads the real
+embedding model, as in production.
+
+Usage (from the backend directory):
+    python -m benchmarks.load_test --workloads login refresh chat --concurrency 1 16
+    python -m benchmarks.load_test --workloads trace --trace trace.jsonl --speed 4
+"""
+
+import argparse
+import asyncio
+import csv
+import itertools
+import logging
+import os
+import random
+import time
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from .common import ServerThread, free_port, print_table, summarize, write_results
+from .trace import load_trace
+
+GREETINGS = ["Bonjour", "Salut !", "Merci beaucoup", "Au revoir", "Qui es-tu ?"]
+OFF_TOPIC = [
+    "Quelle est la procédure pour changer de poste en interne ?",
+    "Comment fonctionne l'intéressement cette année ?",
+    "Puis-je cumuler un congé sabbatique et un congé de formation ?",
+    "Quels documents fournir pour un changement d'adresse ?",
+]
+
+
+def configure_environment(args, ollama_url: str):
+    """Point the application at the stand-ins (must run before app is imported)."""
+    os.environ["OLLAMA_BASE_URL"] = ollama_url
+    os.environ["STARTUP_MODE"] = "blocking"
+    if args.no_response_cache:
+        os.environ["LLM_CACHE_ENABLED"] = "false"
+
+
+def build_app(users):
+    """Import the application and swap its LDAP service for one backed by the mock directory."""
+    from ldap3 import MOCK_SYNC
+
+    from app import auth, ldap_service as ldap_module, main as app_main
+    from app.ldap_service import LDAPService
+    from .mock_ldap import build_mock_server
+
+    service = LDAPService(server=build_mock_server(users), client_strategy=MOCK_SYNC)
+    for module in (ldap_module, auth, app_main):
+        module.ldap_service = service
+    return app_main.app
+
+
+def chat_questions(csv_path: str, greeting_ratio: float, off_topic_ratio: float, count: int, seed: int = 42):
+    """Question mix for chat workloads."""
+    with open(csv_path, "r", encoding="utf-8") as f:
+        kb_questions = [row["question"] for row in csv.DictReader(f)]
+    rng = random.Random(seed)
+    questions = []
+    for _ in range(count):
+        draw = rng.random()
+        if draw < greeting_ratio:
+            questions.append(rng.choice(GREETINGS))
+        elif draw < greeting_ratio + off_topic_ratio:
+            questions.append(rng.choice(OFF_TOPIC))
+        else:
+            questions.append(rng.choice(kb_questions))
+    return questions
+
+
+async def login_all(client: httpx.AsyncClient, users) -> Dict[str, Dict[str, str]]:
+    """Tokens of every user (setup, not measured)."""
+    tokens = {}
+    for user in users:
+        response = await client.post(
+            "/api/auth/login", json={"username": user["username"], "password": user["password"]}
+        )
+        response.raise_for_status()
+        tokens[user["username"]] = response.json()
+    return tokens
+
+
+async def chat_stream(client: httpx.AsyncClient, token: str, message: str) -> int:
+    """Send a streaming chat request and read the whole stream."""
+    async with client.stream(
+        "POST", "/api/chat/stream", json={"message": message},
+        headers={"Authorization": f"Bearer {token}"}
+    ) as response:
+        await response.aread()
+        return response.status_code
+
+
+async def closed_loop(
+    request: Callable[[int], Awaitable[int]],
+    concurrency: int,
+    requests: int
+) -> Dict[str, float]:
+    """
+    Run `requests` requests from `concurrency` clients.
+
+    Args:
+        request: Sends request number i and returns the HTTP status
+        concurrency: Concurrent clients
+        requests: Total requests
+
+    Returns:
+        Throughput, latency percentiles and error count
+    """
+    latencies: List[float] = []
+    errors = 0
+    counter = itertools.count()
+
+    async def client():
+        nonlocal errors
+        while (i := next(counter)) < requests:
+            t0 = time.perf_counter()
+            try:
+                status = await request(i)
+            except httpx.HTTPError:
+                status = None
+            if status == 200:
+                latencies.append(time.perf_counter() - t0)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return {**summarize(latencies, time.perf_counter() - start), "errors": errors}
+
+
+async def replay_trace(client: httpx.AsyncClient, trace, speed: float, tokens_by_user) -> List[Dict]:
+    """
+    Replay a trace open-loop.
+
+    Requests are sent at their recorded offset divided by speed, whether or not
+    earlier requests have answered, so queueing shows up in the latencies.
+    """
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    max_lag = 0.0
+
+    async def send(entry):
+        token = tokens_by_user[entry["username"]]
+        endpoint = entry["endpoint"]
+        t0 = time.perf_counter()
+        try:
+            if endpoint == "chat_stream":
+                status = await chat_stream(client, token, entry["message"])
+            else:
+                status = (await client.post(
+                    "/api/chat", json={"message": entry["message"]},
+                    headers={"Authorization": f"Bearer {token}"}
+                )).status_code
+        except httpx.HTTPError:
+            status = None
+        if status == 200:
+            latencies.setdefault(endpoint, []).append(time.perf_counter() - t0)
+        else:
+            errors[endpoint] = errors.get(endpoint, 0) + 1
+
+    tasks = []
+    start = time.perf_counter()
+    for entry in trace:
+        target = entry["t"] / speed
+        now = time.perf_counter() - start
+        if target > now:
+            await asyncio.sleep(target - now)
+        max_lag = max(max_lag, time.perf_counter() - start - target)
+        tasks.append(asyncio.create_task(send(entry)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    return [
+        {
+            "workload": "trace",
+            "endpoint": endpoint,
+            "speed": speed,
+            **summarize(latencies.get(endpoint, []), elapsed),
+            "errors": errors.get(endpoint, 0),
+            "max_lag_ms": max_lag * 1000,
+        }
+        for endpoint in sorted(set(latencies) | set(errors))
+    ]
+
+
+async def run(base_url: str, users, args) -> List[Dict]:
+    from app.config import settings
+
+    rows = []
+    # No connection cap: trace replay must not queue on the client side
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=max(args.concurrency) * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        tokens = await login_all(client, users)
+        access = [tokens[u["username"]]["access_token"] for u in users]
+        refresh = [tokens[u["username"]]["refresh_token"] for u in users]
+        questions = chat_questions(
+            settings.rag_csv_path, args.greeting_ratio, args.off_topic_ratio, args.requests
+        )
+
+        async def login(i):
+            user = users[i % len(users)]
+            return (await client.post(
+                "/api/auth/login", json={"username": user["username"], "password": user["password"]}
+            )).status_code
+
+        async def refresh_request(i):
+            return (await client.post(
+                "/api/auth/refresh", json={"refresh_token": refresh[i % len(refresh)]}
+            )).status_code
+
+        async def chat(i):
+            return (await client.post(
+                "/api/chat", json={"message": questions[i]},
+                headers={"Authorization": f"Bearer {access[i % len(access)]}"}
+            )).status_code
+
+        async def stream(i):
+            return await chat_stream(client, access[i % len(access)], questions[i])
+
+        workloads = {"login": login, "refresh": refresh_request, "chat": chat, "chat_stream": stream}
+        for name in args.workloads:
+            if name == "trace":
+                continue
+            for concurrency in args.concurrency:
+                result = await closed_loop(workloads[name], concurrency, args.requests)
+                rows.append({"workload": name, "endpoint": name, "concurrency": concurrency, **result})
+
+        if "trace" in args.workloads:
+            trace = load_trace(args.trace)
+            # Trace users are mapped round-robin onto mock users
+            names = sorted({entry["username"] for entry in trace})
+            mapping = {name: users[i % len(users)]["username"] for i, name in enumerate(names)}
+            tokens_by_user = {name: tokens[mapping[name]]["access_token"] for name in names}
+            rows.extend(await replay_trace(client, trace, args.speed, tokens_by_user))
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workloads", nargs="+", default=["login", "refresh", "chat"],
+                        choices=["login", "refresh", "chat", "chat_stream", "trace"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=500, help="Requests per closed-loop workload")
+    parser.add_argument("--users", type=int, default=50, help="Users in the mock directory")
+    parser.add_argument("--trace", help="Trace file replayed by the trace workload")
+    parser.add_argument("--speed", type=float, default=1.0, help="Trace replay speed multiplier")
+    parser.add_argument("--greeting-ratio", type=float, default=0.1)
+    parser.add_argument("--off-topic-ratio", type=float, default=0.2,
+                        help="Share of chat questions answered by the LLM fallback")
+    parser.add_argument("--no-response-cache", action="store_true",
+                        help="Disable the LLM response cache so every fallback reaches Ollama")
+    parser.add_argument("--first-token-ms", type=float, default=200.0, help="Fake Ollama time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=30.0, help="Fake Ollama token rate")
+    parser.add_argument("--answer-tokens", type=int, default=40, help="Fake Ollama tokens per answer")
+    parser.add_argument("--timeout", type=float, default=120.0, help="HTTP timeout in seconds")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+    if "trace" in args.workloads and not args.trace:
+        parser.error("the trace workload requires --trace")
+
+    logging.basicConfig(level=logging.WARNING)
+
+    from .fake_ollama import create_app
+
+    fake_ollama = create_app(args.first_token_ms, args.tokens_per_second, args.answer_tokens)
+    ollama = ServerThread(fake_ollama, port=free_port())
+    configure_environment(args, ollama.url)
+    # Imports app.config, so only after the environment is set
+    from .mock_ldap import make_users
+    users = make_users(args.users)
+
+    with ollama, ServerThread(build_app(users)) as api:
+        rows = asyncio.run(run(api.url, users, args))
+        ollama_stats = dict(fake_ollama.state.stats)
+
+    columns = ["workload", "endpoint", "concurrency", "speed", "count", "rps",
+               "p50_ms", "p95_ms", "p99_ms", "max_ms", "errors"]
+    print_table(rows, [c for c in columns if any(c in row for row in rows)])
+    print(f"\nFake Ollama: {ollama_stats}")
+    write_results(args.output, "load_test", {**vars(args), "ollama": ollama_stats}, rows)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,213 @@
+"""
+Memory and throughput of multi-process serving.
+
+For each worker count from 1 to --max-workers, starts the API with gunicorn
+(gunicorn.conf.py) in a subprocess and measures, after a chat workload:
+- per-worker RSS, and USS (pages private to the worker), from /proc smaps_rollup
+- total PSS of the master and its workers: the memory the deployment really
+  uses, each shared page being split between the processes mapping it
+- chat throughput and latency, with `concurrency` clients per worker
+
+Every question is a knowledge base question with a unique suffix, so the query
+cache never answers and each request encodes its question: the CPU-bound part
+that more workers should scale. Running with and without preloading
+(--preload both) shows the memory that sharing saves.
+
+Requests carry access tokens with the profile claims (JWT_PROFILE_CLAIMS_ENABLED),
+so no LDAP directory is needed; LLM fallbacks go to the fake Ollama server.
+Linux only (/proc).
+
+Usage (from the backend directory):
+    python -m benchmarks.memory_bench --max-workers 4 --requests 400 --preload both
+"""
+
+import argparse
+import asyncio
+import csv
+import logging
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List
+
+import httpx
+
+from .common import ServerThread, free_port, print_table, write_results
+from .load_test import closed_loop
+
+PROFILE = {
+    "username": "bench",
+    "full_name": "Bench",
+    "email": "bench@safran.local",
+    "employee_type": "CDI",
+    "department": "IT",
+}
+STARTUP_COMPLETE = "Application startup complete"
+
+
+def read_memory(pid: int) -> Dict[str, float]:
+    """RSS, PSS and USS of a process in MB."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": values.get("Rss", 0.0),
+        "pss": values.get("Pss", 0.0),
+        "uss": values.get("Private_Clean", 0.0) + values.get("Private_Dirty", 0.0),
+    }
+
+
+def child_pids(pid: int) -> List[int]:
+    """Direct children of a process."""
+    with open(f"/proc/{pid}/task/{pid}/children", "r") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def unique_questions(csv_path: str, count: int, seed: int = 42) -> List[str]:
+    """Knowledge base questions made distinct so none is served by the query cache."""
+    with open(csv_path, "r", encoding="utf-8") as f:
+        kb_questions = [row["question"] for row in csv.DictReader(f)]
+    rng = random.Random(seed)
+    return [f"{rng.choice(kb_questions)} (réf. {i})" for i in range(count)]
+
+
+class GunicornServer:
+    """The API served by gunicorn in a subprocess."""
+
+    def __init__(self, workers: int, preload: bool, ollama_url: str):
+        self.workers = workers
+        self.port = free_port()
+        env = dict(
+            os.environ,
+            JWT_PROFILE_CLAIMS_ENABLED="true",
+            STARTUP_MODE="blocking",
+            WEB_PRELOAD_ENABLED="true" if preload else "false",
+            OLLAMA_BASE_URL=ollama_url,
+        )
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+             "--bind", f"127.0.0.1:{self.port}", "--workers", str(workers),
+             "--log-level", "info", "app.main:app"],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        self.started_workers = 0
+        self._reader = threading.Thread(target=self._read_log, daemon=True)
+        self._reader.start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def _read_log(self):
+        for line in self.process.stderr:
+            if STARTUP_COMPLETE in line:
+                self.started_workers += 1
+
+    def wait_ready(self, timeout: float):
+        """Wait until every worker has finished its startup (RAG engine loaded and warmed up)."""
+        deadline = time.monotonic() + timeout
+        while self.started_workers < self.workers:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with code {self.process.returncode}")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{self.started_workers}/{self.workers} workers started in time")
+            time.sleep(0.1)
+
+    def memory(self) -> Dict[str, float]:
+        """Memory of the master and its workers."""
+        master = read_memory(self.process.pid)
+        workers = [read_memory(pid) for pid in child_pids(self.process.pid)]
+        count = max(1, len(workers))
+        return {
+            "master_rss_mb": master["rss"],
+            "worker_rss_mb": sum(w["rss"] for w in workers) / count,
+            "worker_uss_mb": sum(w["uss"] for w in workers) / count,
+            "total_pss_mb": master["pss"] + sum(w["pss"] for w in workers),
+        }
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+async def drive(url: str, token: str, questions: List[str], concurrency: int, timeout: float) -> Dict:
+    """Warm up, then run the questions closed-loop."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits, headers=headers) as client:
+        def chat(batch: List[str]):
+            async def request(i):
+                return (await client.post("/api/chat", json={"message": batch[i]})).status_code
+            return request
+
+        warm_up = questions[:concurrency * 2]
+        measured = questions[len(warm_up):]
+        await closed_loop(chat(warm_up), concurrency, len(warm_up))
+        return await closed_loop(chat(measured), concurrency, len(measured))
+
+
+def measure(workers: int, preload: bool, ollama_url: str, token: str, questions: List[str], args) -> Dict:
+    """Serve with one worker count and preloading choice, drive load, then read memory."""
+    server = GunicornServer(workers, preload, ollama_url)
+    try:
+        server.wait_ready(args.startup_timeout)
+        result = asyncio.run(drive(
+            server.url, token, questions, args.concurrency * workers, args.timeout
+        ))
+        memory = server.memory()
+    finally:
+        server.stop()
+    return {"preload": preload, "workers": workers, **memory, **result}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--preload", choices=["on", "off", "both"], default="both")
+    parser.add_argument("--concurrency", type=int, default=4, help="Clients per worker")
+    parser.add_argument("--requests", type=int, default=400, help="Chat requests per run")
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="HTTP timeout in seconds")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    os.environ["JWT_PROFILE_CLAIMS_ENABLED"] = "true"
+    # Imports app.config, so only after the environment is set
+    from app.auth import create_access_token
+    from app.config import settings
+    from .fake_ollama import create_app
+
+    token = create_access_token({"sub": PROFILE["username"]}, profile=PROFILE)
+    preloads = {"on": [True], "off": [False], "both": [True, False]}[args.preload]
+
+    rows = []
+    with ServerThread(create_app(first_token_ms=50.0, tokens_per_second=200.0)) as ollama:
+        for preload in preloads:
+            for workers in range(1, args.max_workers + 1):
+                questions = unique_questions(
+                    settings.rag_csv_path, args.requests + args.concurrency * workers * 2, seed=workers
+                )
+                rows.append(measure(workers, preload, ollama.url, token, questions, args))
+
+    print_table(rows, ["preload", "workers", "worker_rss_mb", "worker_uss_mb", "master_rss_mb",
+                       "total_pss_mb", "rps", "p50_ms", "p95_ms", "errors"])
+    write_results(args.output, "memory", vars(args), rows)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
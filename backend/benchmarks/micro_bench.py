@@ -0,0 +1,108 @@
+"""
+Microbenchmarks of the per-request hot paths.
+
+- search_knowledge (exact): knowledge base questions with changed case and
+  punctuation, answered from the exact match table
+- search_knowledge (warm): question embedding served by the query cache,
+  so only the similarity search and profile check are measured
+- search_knowledge (cold): query cache cleared before each call, so the
+  question is encoded by the model
+- small_talk.match: greeting and small talk recognition on a message mix
+- verify_access_token: JWT decoding and signature check; profile_from_claims
+  is measured too when profile claims are enabled
+
+The RAG engine loads the configured knowledge base and embedding model.
+
+Usage (from the backend directory):
+    python -m benchmarks.micro_bench --iterations 2000
+"""
+
+import argparse
+import time
+
+from app.auth import create_access_token, profile_from_claims, verify_access_token
+from app.config import settings
+from app.main import RAG_THRESHOLD
+from app.rag import RAGEngine
+from app.small_talk import small_talk
+from .common import print_table, summarize, write_results
+
+MESSAGES = [
+    "Bonjour",
+    "Salut, comment ça va ?",
+    "Merci beaucoup pour ton aide",
+    "Comment poser un congé annuel ?",
+    "Quelle est la procédure pour déclarer des heures supplémentaires au manager ?",
+    "Ai-je droit aux tickets restaurant pendant le télétravail ?",
+]
+PROFILE = {
+    "username": "bench",
+    "full_name": "Bench",
+    "email": "bench@safran.local",
+    "employee_type": "CDI",
+    "department": "IT",
+}
+
+
+def bench(name: str, func, inputs, iterations: int) -> dict:
+    """Time `iterations` calls of func, cycling through inputs."""
+    latencies = []
+    count = len(inputs)
+    start = time.perf_counter()
+    for i in range(iterations):
+        value = inputs[i % count]
+        t0 = time.perf_counter()
+        func(value)
+        latencies.append(time.perf_counter() - t0)
+    result = summarize(latencies, time.perf_counter() - start)
+    return {"benchmark": name, **result, "mean_us": 1000 * result["mean_ms"]}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--cold-iterations", type=int, default=200,
+                        help="Iterations of the cold search (each one runs the model)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    rows = [
+        bench("small_talk.match", small_talk.match, MESSAGES, args.iterations),
+    ]
+
+    tokens = [create_access_token({"sub": f"user{i}"}, profile=PROFILE) for i in range(16)]
+    rows.append(bench("verify_access_token", verify_access_token, tokens, args.iterations))
+    if settings.jwt_profile_claims_enabled:
+        payloads = [verify_access_token(token) for token in tokens]
+        rows.append(bench("profile_from_claims", profile_from_claims, payloads, args.iterations))
+
+    engine = RAGEngine()
+    engine.load()
+    questions = engine.df["question"].tolist()
+    profiles = ["CDI", "CDD", "CADRE", "STAGIAIRE"]
+    cases = [(q, profiles[i % len(profiles)]) for i, q in enumerate(questions)]
+
+    def search(case):
+        engine.search_knowledge(case[0], case[1], RAG_THRESHOLD)
+
+    def cold_search(case):
+        engine.query_cache.clear()
+        search(case)
+
+    exact_cases = [(f"  {q.upper().rstrip(' ?')} ?!", profile) for q, profile in cases]
+    rows.append(bench("search_knowledge (exact)", search, exact_cases, args.iterations))
+
+    # The other searches measure the embedding path
+    engine.exact_match_enabled = False
+    for case in cases:
+        search(case)
+    rows.append(bench("search_knowledge (warm)", search, cases, args.iterations))
+    rows.append(bench("search_knowledge (cold)", cold_search, cases, args.cold_iterations))
+
+    print_table(rows, ["benchmark", "count", "mean_us", "p50_ms", "p95_ms", "p99_ms", "rps"])
+    write_results(args.output, "micro", vars(args), rows)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
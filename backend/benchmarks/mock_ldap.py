@@ -0,0 +1,100 @@
+"""
+In-process LDAP stand-in built on ldap3's MOCK_SYNC strategy.
+
+The mock directory holds the admin entry and synthetic users laid out like
+infra/ldap/bootstrap.ldif. Optional simulated latency makes connection setup
+and round trips cost time, as they do against a real server.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+from ldap3 import Server, Connection, MOCK_SYNC
+from ldap3.strategy.mockSync import MockSyncStrategy
+
+from app.config import settings
+
+EMPLOYEE_TYPES = ["CDI", "CDD", "CADRE", "NON-CADRE", "INTÉRIMAIRE", "STAGIAIRE"]
+USER_PASSWORD = "password"
+
+
+def make_users(count: int) -> List[Dict[str, str]]:
+    """Synthetic users, cycling through the employee types."""
+    return [
+        {
+            "username": f"user{i:05d}",
+            "password": USER_PASSWORD,
+            "employee_type": EMPLOYEE_TYPES[i % len(EMPLOYEE_TYPES)],
+        }
+        for i in range(count)
+    ]
+
+
+def build_mock_server(users: List[Dict[str, str]]) -> Server:
+    """
+    Create a mock LDAP server populated with the admin entry and users.
+
+    Connections must use client_strategy=MOCK_SYNC with the returned server;
+    they all share the same in-memory directory.
+    """
+    server = Server("mock-ldap")
+    setup = Connection(
+        server,
+        user=settings.ldap_admin_dn,
+        password=settings.ldap_admin_password,
+        client_strategy=MOCK_SYNC
+    )
+    setup.strategy.add_entry(settings.ldap_admin_dn, {
+        "objectClass": ["simpleSecurityObject", "organizationalRole"],
+        "cn": "admin",
+        "userPassword": settings.ldap_admin_password,
+    })
+    setup.strategy.add_entry(f"ou=People,{settings.ldap_base_dn}", {
+        "objectClass": ["organizationalUnit"],
+        "ou": "People",
+    })
+    for user in users:
+        username = user["username"]
+        setup.strategy.add_entry(f"uid={username},ou=People,{settings.ldap_base_dn}", {
+            "objectClass": ["inetOrgPerson"],
+            "uid": username,
+            "cn": username.capitalize(),
+            "sn": username,
+            "mail": f"{username}@safran.local",
+            "employeeType": user["employee_type"],
+            "departmentNumber": "IT",
+            "userPassword": user["password"],
+        })
+    return server
+
+
+@contextmanager
+def simulated_latency(connect_ms: float = 0.0, rtt_ms: float = 0.0):
+    """
+    Add latency to mock connections.
+
+    Args:
+        connect_ms: Cost of opening a connection (TCP handshake)
+        rtt_ms: Cost of each LDAP operation (network round trip)
+    """
+    original_start_listen = MockSyncStrategy._start_listen
+    original_send = MockSyncStrategy.send
+
+    def start_listen(self):
+        if connect_ms:
+            time.sleep(connect_ms / 1000.0)
+        return original_start_listen(self)
+
+    def send(self, *args, **kwargs):
+        if rtt_ms:
+            time.sleep(rtt_ms / 1000.0)
+        return original_send(self, *args, **kwargs)
+
+    MockSyncStrategy._start_listen = start_listen
+    MockSyncStrategy.send = send
+    try:
+        yield
+    finally:
+        MockSyncStrategy._start_listen = original_start_listen
+        MockSyncStrategy.send = original_send
@@ -0,0 +1,160 @@
+"""
+Retrieval microbenchmark: compiled KnowledgeIndex vs. the previous search.
+
+The previous implementation computed cosine similarities against all rows
+(normalizing both sides on every call), took the global argmax, then read the
+matching row with DataFrame.iloc and compared profile strings. The compiled
+index scans pre-normalized arrays and resolves profiles as integer codes.
+Query encoding is excluded: both sides receive the same random query vectors.
+The compiled_batch variant searches --batch-size queries per call with
+KnowledgeIndex.top_k_batch (one matrix multiply per batch, as /api/chat/batch
+does); its latencies are per batch and its rps counts queries.
+
+Usage (from the backend directory):
+    python -m benchmarks.rag_search_bench --sizes 1000 10000 100000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.retrieval import KnowledgeIndex
+from .common import print_table, summarize, write_results
+
+PROFILES = ["CDI", "CDD", "CADRE", "NON-CADRE", "INTÉRIMAIRE", "STAGIAIRE"]
+DOMAINS = ["Congés", "Avantages", "Temps de travail", "Paie", "Formation"]
+
+
+def synthetic_kb(size: int, dim: int, seed: int = 0):
+    """Random knowledge base DataFrame and embeddings."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "question_id": np.arange(size),
+        "profil": rng.choice(PROFILES, size),
+        "domaine": rng.choice(DOMAINS, size),
+        "question": [f"question {i}" for i in range(size)],
+        "reponse": [f"réponse {i}" for i in range(size)],
+    })
+    embeddings = rng.standard_normal((size, dim)).astype(np.float32)
+    return df, embeddings
+
+
+def legacy_search(df, embeddings, query, employee_type, threshold):
+    """Previous search_knowledge logic (cos_sim + global argmax + iloc)."""
+    similarities = (embeddings @ query) / (
+        np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query)
+    )
+    best_idx = int(similarities.argmax())
+    best_similarity = float(similarities[best_idx])
+    if best_similarity < threshold:
+        return None, None, best_similarity, True
+    best_match = df.iloc[best_idx]
+    if str(best_match['profil']).strip().lower() != employee_type.strip().lower():
+        return None, None, best_similarity, False
+    return str(best_match['reponse']), str(best_match['domaine']), best_similarity, True
+
+
+def compiled_search(index, query, employee_type, threshold, partitioned):
+    """Compiled index search, mirroring RAGEngine.search_knowledge."""
+    user_profile = index.profile_code(employee_type)
+    scores, rows = index.top_k(query, 1, user_profile if partitioned else None)
+    best_row, best_similarity = int(rows[0]), float(scores[0])
+    if best_similarity < threshold:
+        return None, None, best_similarity, True
+    if index.profile_codes[best_row] != user_profile:
+        return None, None, best_similarity, False
+    return (
+        index.answers[best_row],
+        index.domain_names[index.domain_codes[best_row]],
+        best_similarity,
+        True
+    )
+
+
+def bench(func, queries, profiles):
+    latencies = []
+    start = time.perf_counter()
+    for query, profile in zip(queries, profiles):
+        t0 = time.perf_counter()
+        func(query, profile)
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def bench_batch(index, queries, batch_size):
+    """Search queries in batches; latencies are per batch, throughput per query."""
+    latencies = []
+    start = time.perf_counter()
+    for i in range(0, len(queries), batch_size):
+        t0 = time.perf_counter()
+        index.top_k_batch(queries[i:i + batch_size], 1)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    return {**summarize(latencies, elapsed), "rps": len(queries) / elapsed if elapsed > 0 else 0.0}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=32, help="Queries per call of the batch variant")
+    parser.add_argument("--threshold", type=float, default=0.0,
+                        help="Similarity threshold (0 exercises the row lookup on every query)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(1)
+    rows = []
+    for size in args.sizes:
+        df, embeddings = synthetic_kb(size, args.dim)
+        start = time.perf_counter()
+        index = KnowledgeIndex.from_dataframe(df, embeddings)
+        compile_ms = 1000 * (time.perf_counter() - start)
+
+        # Queries close to random KB rows, like paraphrased questions
+        targets = rng.integers(0, size, args.queries)
+        queries = embeddings[targets] + 0.3 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        profiles = rng.choice(PROFILES, args.queries)
+
+        # Same decisions in global mode
+        for query, profile in zip(queries[:50], profiles[:50]):
+            old = legacy_search(df, embeddings, query, profile, args.threshold)
+            new = compiled_search(index, query, profile, args.threshold, partitioned=False)
+            assert old[0] == new[0] and old[3] == new[3], "compiled index disagrees with legacy search"
+
+        variants = {
+            "legacy": lambda q, p: legacy_search(df, embeddings, q, p, args.threshold),
+            "compiled_global": lambda q, p: compiled_search(index, q, p, args.threshold, False),
+            "compiled_partitioned": lambda q, p: compiled_search(index, q, p, args.threshold, True),
+            f"compiled_top{args.top_k}": lambda q, p: index.top_k(q, args.top_k),
+        }
+        for name, func in variants.items():
+            rows.append({
+                "size": size,
+                "variant": name,
+                "compile_ms": compile_ms,
+                **bench(func, queries, profiles),
+            })
+
+        batch_rows = [int(rows[0]) for _, rows in index.top_k_batch(queries[:50], 1)]
+        single_rows = [int(index.top_k(query, 1)[1][0]) for query in queries[:50]]
+        assert batch_rows == single_rows, "batch search disagrees with single search"
+        rows.append({
+            "size": size,
+            "variant": f"compiled_batch{args.batch_size}",
+            "compile_ms": compile_ms,
+            **bench_batch(index, queries, args.batch_size),
+        })
+
+    print_table(rows, ["size", "variant", "rps", "mean_ms", "p50_ms", "p99_ms"])
+    write_results(args.output, "rag_search", vars(args), rows)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
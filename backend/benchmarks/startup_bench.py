@@ -0,0 +1,93 @@
+"""
+Startup time benchmark.
+
+Starts the API with uvicorn in a subprocess for each startup mode and measures:
+- import_ms: time to import app.main alone (measured in a separate process)
+- serving_ms: from process launch until /health answers (HTTP server up)
+- rag_ready_ms: until /ready reports the RAG engine as ready (chat can be served)
+
+LDAP and Ollama readiness are not waited for, so the benchmark runs without them.
+
+Usage (from the backend directory):
+    python -m benchmarks.startup_bench --modes blocking background --runs 3
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from .common import free_port, print_table, write_results
+
+
+def import_time_ms() -> float:
+    """Time to import app.main in a fresh interpreter."""
+    code = (
+        "import time; t = time.perf_counter(); import app.main; "
+        "print((time.perf_counter() - t) * 1000)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_startup(mode: str, timeout: float) -> dict:
+    """Launch the API once and time when it serves and when the RAG engine is ready."""
+    port = free_port()
+    env = dict(os.environ, STARTUP_MODE=mode)
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    result = {"mode": mode, "serving_ms": None, "rag_ready_ms": None}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1.0) as client:
+            while time.perf_counter() - started < timeout:
+                if process.poll() is not None:
+                    raise RuntimeError(f"API exited with code {process.returncode}")
+                try:
+                    if result["serving_ms"] is None and client.get("/health").status_code == 200:
+                        result["serving_ms"] = (time.perf_counter() - started) * 1000
+                    if result["serving_ms"] is not None:
+                        components = client.get("/ready").json()["components"]
+                        if components["rag"]["ready"]:
+                            result["rag_ready_ms"] = (time.perf_counter() - started) * 1000
+                            break
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.02)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["blocking", "background"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=300.0, help="Give up on a run after this many seconds")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    import_ms = import_time_ms()
+    rows = []
+    for mode in args.modes:
+        for run in range(args.runs):
+            rows.append({"run": run + 1, "import_ms": import_ms, **measure_startup(mode, args.timeout)})
+
+    print_table(rows, ["mode", "run", "import_ms", "serving_ms", "rag_ready_ms"])
+    write_results(args.output, "startup", vars(args), rows)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
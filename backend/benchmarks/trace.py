@@ -0,0 +1,79 @@
+"""
+Question traces for load-test replay.
+
+A trace is a JSON Lines file with one request per line:
+    {"t": 12.5, "username": "alice", "message": "Comment poser un congé ?", "endpoint": "chat"}
+where t is the offset in seconds from the start of the trace and endpoint is
+"chat" (default) or "chat_stream".
+
+Traces can be extracted from the API log, which records every chat request:
+    python -m benchmarks.trace backend.log -o trace.jsonl
+"""
+
+import argparse
+import json
+import re
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+LOG_PATTERN = re.compile(
+    r"^(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - app\.main - INFO - "
+    r"(?P<kind>Streaming chat|Chat) request from (?P<username>\S+) \([^)]*\): (?P<message>.*)$"
+)
+
+
+def load_trace(path: str) -> List[Dict]:
+    """Read a trace file, sorted by offset."""
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entry = json.loads(line)
+                entry.setdefault("endpoint", "chat")
+                entries.append(entry)
+    return sorted(entries, key=lambda entry: entry["t"])
+
+
+def trace_from_log(lines: Iterable[str]) -> List[Dict]:
+    """Extract chat requests from API log lines."""
+    entries = []
+    start = None
+    for line in lines:
+        match = LOG_PATTERN.match(line.rstrip("\n"))
+        if match is None:
+            continue
+        timestamp = datetime.strptime(match["timestamp"], "%Y-%m-%d %H:%M:%S,%f")
+        start = start or timestamp
+        entries.append({
+            "t": round((timestamp - start).total_seconds(), 3),
+            "username": match["username"],
+            "message": match["message"],
+            "endpoint": "chat_stream" if match["kind"] == "Streaming chat" else "chat",
+        })
+    return entries
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", help="API log file")
+    parser.add_argument("-o", "--output", help="Trace file to write (standard output if omitted)")
+    args = parser.parse_args(argv)
+
+    with open(args.log, "r", encoding="utf-8", errors="replace") as f:
+        entries = trace_from_log(f)
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for entry in entries:
+            out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    finally:
+        if args.output:
+            out.close()
+    print(f"{len(entries)} requests extracted", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,105 @@
+"""
+Vector index backend benchmark: recall@1 and latency against the exact scan.
+
+Builds a synthetic clustered knowledge base (normalized Gaussian mixture, like
+groups of paraphrased questions), queries it with perturbed copies of its
+rows, and reports for each backend: build time, persisted index load time,
+recall@1 with respect to the exact backend, and per-query latency.
+
+Usage (from the backend directory):
+    python -m benchmarks.vector_index_bench --size 200000 --dim 768
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.vector_index import (
+    BACKEND_EXACT,
+    BACKEND_HNSW,
+    BACKEND_IVF,
+    create_index,
+)
+from .common import print_table, summarize, write_results
+
+
+def synthetic_vectors(size: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """Normalized Gaussian mixture."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, size)]
+    vectors += 0.6 * rng.standard_normal((size, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=2000, help="Topics in the synthetic KB")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[32, 64, 128])
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    print(f"Generating {args.size} x {args.dim} vectors...")
+    vectors = synthetic_vectors(args.size, args.dim, args.clusters)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(0, args.size, args.queries)]
+    queries = queries + 0.2 * rng.standard_normal(queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    variants = [(BACKEND_EXACT, {})]
+    variants += [(BACKEND_IVF, {"nprobe": nprobe}) for nprobe in args.nprobe]
+    try:
+        import hnswlib  # noqa: F401
+        variants += [(BACKEND_HNSW, {"ef_search": ef}) for ef in args.ef_search]
+    except ImportError:
+        print("hnswlib not installed, skipping the hnsw backend")
+
+    rows = []
+    truth = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend, params in variants:
+            cache_path = Path(tmp) / "-".join([backend, *(f"{k}{v}" for k, v in params.items())])
+            start = time.perf_counter()
+            index = create_index(backend, vectors, cache_path=cache_path, **params)
+            build_s = time.perf_counter() - start
+            # Second call loads the persisted structure (ivf/hnsw)
+            start = time.perf_counter()
+            create_index(backend, vectors, cache_path=cache_path, **params)
+            load_s = time.perf_counter() - start
+
+            latencies, top1 = [], []
+            run_start = time.perf_counter()
+            for query in queries:
+                t0 = time.perf_counter()
+                _, ids = index.search(query, 1)
+                latencies.append(time.perf_counter() - t0)
+                top1.append(int(ids[0]) if len(ids) else -1)
+            elapsed = time.perf_counter() - run_start
+            top1 = np.array(top1)
+            if truth is None:
+                truth = top1
+
+            rows.append({
+                "backend": backend,
+                "params": ",".join(f"{k}={v}" for k, v in params.items()) or "-",
+                "build_s": build_s,
+                "load_s": load_s,
+                "recall@1": float((top1 == truth).mean()),
+                **summarize(latencies, elapsed),
+            })
+
+    print_table(rows, ["backend", "params", "build_s", "load_s", "recall@1", "rps", "p50_ms", "p99_ms"])
+    write_results(args.output, "vector_index", vars(args), rows)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,49 @@
+"""
+Gunicorn configuration for multi-process serving (see app.prefork).
+
+Usage (from the backend directory):
+    gunicorn -c gunicorn.conf.py app.main:app
+"""
+
+import glob
+import os
+import tempfile
+
+from app.config import settings
+
+# Prometheus multiprocess mode: each worker writes its samples to files in this
+# directory, aggregated by /metrics. It must be set before prometheus_client is
+# imported (by app.prefork below); files of a previous run are removed.
+if settings.web_workers > 1:
+    metrics_dir = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "hr-chatbot-metrics")
+    )
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, "*.db")):
+        os.remove(path)
+
+from app import metrics, prefork  # noqa: E402
+
+bind = "0.0.0.0:8000"
+workers = settings.web_workers
+worker_class = "uvicorn.workers.UvicornWorker"
+# Import the application in the master so workers share what it loads
+preload_app = settings.web_preload_enabled
+# Workers load the embedding model or warm it up before serving
+timeout = 120
+
+
+def when_ready(server):
+    """Runs in the master once the application is imported, before the workers are forked."""
+    if server.cfg.preload_app:
+        prefork.preload()
+
+
+def post_fork(server, worker):
+    """Runs in each worker right after the fork."""
+    prefork.after_fork(server.cfg.workers)
+
+
+def child_exit(server, worker):
+    """Runs in the master when a worker exits."""
+    metrics.worker_exited(worker.pid)
@@ -0,0 +1,93 @@
+"""
+Test doubles shared by the tests.
+
+FakeOllama answers /api/generate like Ollama (streamed or not) and is served
+to OllamaService through httpx.MockTransport, without a network.
+FakeEmbedder stands in for the embedding model of RAGEngine.
+"""
+
+import csv
+import hashlib
+import json
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import httpx
+import numpy as np
+
+from app.llm_service import OllamaService
+
+TOKENS = ["Vous avez ", "25 jours ", "de congés."]
+
+
+class FakeOllama:
+    """Callable httpx.MockTransport handler recording the /api/generate payloads."""
+
+    def __init__(
+        self,
+        tokens: Sequence[str] = TOKENS,
+        status_code: int = 200,
+        context: Optional[List[int]] = None
+    ):
+        self.tokens = list(tokens)
+        self.status_code = status_code
+        self.context = context if context is not None else [1, 2, 3]
+        self.payloads: List[dict] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        self.payloads.append(payload)
+        if self.status_code != 200:
+            return httpx.Response(self.status_code, json={"error": "fake failure"})
+        final = {
+            "done": True,
+            "context": self.context + [len(self.payloads)],
+            "prompt_eval_count": len(payload["prompt"].split()),
+        }
+        if not payload["stream"]:
+            return httpx.Response(200, json={**final, "response": "".join(self.tokens)})
+        lines = [json.dumps({"response": token, "done": False}) for token in self.tokens]
+        lines.append(json.dumps({**final, "response": ""}))
+        return httpx.Response(200, content="\n".join(lines) + "\n")
+
+
+def make_service(handler) -> OllamaService:
+    """OllamaService whose client is served by handler."""
+    service = OllamaService(base_url="http://ollama.test", model="test-model")
+    service._client = httpx.AsyncClient(base_url=service.base_url, transport=httpx.MockTransport(handler))
+    return service
+
+
+async def collect(tokens) -> list:
+    """All the items of an async iterator."""
+    return [token async for token in tokens]
+
+
+class FakeEmbedder:
+    """Deterministic embeddings derived from the text, counting the texts encoded."""
+
+    def __init__(self, dim: int = 16):
+        self.dim = dim
+        self.encoded: List[str] = []
+
+    def encode(self, texts, convert_to_numpy: bool = True, normalize_embeddings: bool = False, **kwargs):
+        self.encoded.extend(texts)
+        rows = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+            rows.append(np.random.default_rng(seed).standard_normal(self.dim) * 3.0)
+        vectors = np.asarray(rows, dtype=np.float32).reshape(len(texts), self.dim)
+        if normalize_embeddings:
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+
+KB_COLUMNS = ("question_id", "profil", "domaine", "question", "reponse")
+
+
+def write_kb(path: Path, rows: Sequence[Tuple[int, str, str, str, str]]):
+    """Write a knowledge base CSV (question_id, profil, domaine, question, reponse)."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(KB_COLUMNS)
+        writer.writerows(rows)
@@ -0,0 +1,155 @@
+"""Tests of LLM admission control: fairness, priorities, queue bounds and deadlines."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.admission import (
+    PRIORITY_BATCH,
+    REASON_DEADLINE,
+    REASON_QUEUE_FULL,
+    AdmissionController,
+    AdmissionRejected,
+)
+
+
+def later(seconds: float = 60.0) -> float:
+    return time.monotonic() + seconds
+
+
+async def hold(admission: AdmissionController, release: asyncio.Event, user: str = "holder"):
+    """Keep a slot until release is set."""
+    async with admission.slot(user, later()):
+        await release.wait()
+
+
+async def queue_requests(admission: AdmissionController, requests, served: list) -> list:
+    """Queue (user, priority) requests in order; each records its user once admitted."""
+    async def request(user, priority):
+        async with admission.slot(user, later(), priority):
+            served.append(user)
+
+    tasks = []
+    for user, priority in requests:
+        tasks.append(asyncio.create_task(request(user, priority)))
+        await asyncio.sleep(0)
+    return tasks
+
+
+def test_waiting_users_are_served_round_robin():
+    async def main():
+        admission = AdmissionController("test", max_concurrency=1, max_queue=10)
+        release, served = asyncio.Event(), []
+        holder = asyncio.create_task(hold(admission, release))
+        await asyncio.sleep(0)
+        tasks = await queue_requests(admission, [("a", 0), ("a", 0), ("a", 0), ("b", 0), ("c", 0)], served)
+        assert admission.queued == 5
+
+        release.set()
+        await asyncio.gather(holder, *tasks)
+        return served
+
+    assert asyncio.run(main()) == ["a", "b", "c", "a", "a"]
+
+
+def test_interactive_requests_are_served_before_batch_ones():
+    async def main():
+        admission = AdmissionController("test", max_concurrency=1, max_queue=10)
+        release, served = asyncio.Event(), []
+        holder = asyncio.create_task(hold(admission, release))
+        await asyncio.sleep(0)
+        tasks = await queue_requests(admission, [("batch", PRIORITY_BATCH), ("user", 0)], served)
+
+        release.set()
+        await asyncio.gather(holder, *tasks)
+        return served
+
+    assert asyncio.run(main()) == ["user", "batch"]
+
+
+def test_full_queue_rejects_right_away():
+    async def main():
+        admission = AdmissionController("test", max_concurrency=1, max_queue=1)
+        release, served = asyncio.Event(), []
+        holder = asyncio.create_task(hold(admission, release))
+        await asyncio.sleep(0)
+        tasks = await queue_requests(admission, [("a", 0)], served)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with admission.slot("b", later()):
+                pass
+
+        release.set()
+        await asyncio.gather(holder, *tasks)
+        return admission, rejected.value
+
+    admission, rejected = asyncio.run(main())
+    assert rejected.reason == REASON_QUEUE_FULL
+    assert admission.rejected[REASON_QUEUE_FULL] == 1
+    assert (admission.active, admission.queued) == (0, 0)
+
+
+def test_request_that_cannot_start_before_its_deadline_is_rejected_without_queueing():
+    async def main():
+        admission = AdmissionController("test", max_concurrency=1, max_queue=10, initial_service_seconds=5.0)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(admission, release))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with admission.slot("a", later(1.0)):
+                pass
+        queued = admission.queued
+
+        release.set()
+        await holder
+        return rejected.value, queued
+
+    rejected, queued = asyncio.run(main())
+    assert rejected.reason == REASON_DEADLINE
+    assert rejected.retry_after_header == "5"
+    assert queued == 0
+
+
+def test_waiter_whose_deadline_passes_leaves_the_queue():
+    async def main():
+        admission = AdmissionController("test", max_concurrency=1, max_queue=10, initial_service_seconds=0.01)
+        release, served = asyncio.Event(), []
+        holder = asyncio.create_task(hold(admission, release))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with admission.slot("late", later(0.05)):
+                pass
+        tasks = await queue_requests(admission, [("next", 0)], served)
+
+        release.set()
+        await asyncio.gather(holder, *tasks)
+        return admission, rejected.value, served
+
+    admission, rejected, served = asyncio.run(main())
+    assert rejected.reason == REASON_DEADLINE
+    assert served == ["next"]
+    assert (admission.active, admission.queued) == (0, 0)
+
+
+def test_cancelled_waiter_does_not_take_a_slot():
+    async def main():
+        admission = AdmissionController("test", max_concurrency=1, max_queue=10)
+        release, served = asyncio.Event(), []
+        holder = asyncio.create_task(hold(admission, release))
+        await asyncio.sleep(0)
+        cancelled, queued = await queue_requests(admission, [("gone", 0), ("next", 0)], served)
+
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        assert admission.queued == 1
+        release.set()
+        await asyncio.gather(holder, queued)
+        return admission, served
+
+    admission, served = asyncio.run(main())
+    assert served == ["next"]
+    assert (admission.active, admission.queued) == (0, 0)
+    assert admission.admitted == 2
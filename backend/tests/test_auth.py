@@ -0,0 +1,83 @@
+"""Tests of the authentication dependencies."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app import auth
+from app.config import settings
+from app.ldap_service import ldap_service
+
+PROFILE = {
+    "username": "jdupont",
+    "full_name": "Jean Dupont",
+    "email": "jean.dupont@example.com",
+    "employee_type": "CDI",
+    "department": "RH",
+}
+
+
+class SlowDirectory:
+    """Stand-in for ldap_service.lookup_user_profile counting the lookups."""
+
+    def __init__(self, profiles, delay: float = 0.05):
+        self.profiles = profiles
+        self.delay = delay
+        self.lookups = []
+        self._lock = threading.Lock()
+
+    def __call__(self, username: str):
+        with self._lock:
+            self.lookups.append(username)
+        time.sleep(self.delay)
+        return self.profiles.get(username)
+
+
+@pytest.fixture
+def directory(monkeypatch):
+    directory = SlowDirectory({"jdupont": PROFILE})
+    monkeypatch.setattr(ldap_service, "lookup_user_profile", directory)
+    monkeypatch.setattr(settings, "jwt_profile_claims_enabled", False)
+    monkeypatch.setattr(settings, "profile_cache_enabled", True)
+    auth.profile_cache.clear()
+    yield directory
+    auth.profile_cache.clear()
+
+
+def credentials(username: str) -> HTTPAuthorizationCredentials:
+    token = auth.create_access_token({"sub": username})
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def test_concurrent_cache_misses_share_one_ldap_lookup(directory):
+    async def main():
+        return await asyncio.gather(*[auth.get_current_user(credentials("jdupont")) for _ in range(5)])
+
+    users = asyncio.run(main())
+
+    assert [user.username for user in users] == ["jdupont"] * 5
+    assert directory.lookups == ["jdupont"]
+
+
+def test_cached_profile_is_not_looked_up_again(directory):
+    asyncio.run(auth.get_current_user(credentials("jdupont")))
+    asyncio.run(auth.get_current_user(credentials("jdupont")))
+
+    assert directory.lookups == ["jdupont"]
+
+
+def test_unknown_users_share_one_lookup_and_are_rejected(directory):
+    async def main():
+        return await asyncio.gather(
+            *[auth.get_current_user(credentials("inconnu")) for _ in range(3)],
+            return_exceptions=True
+        )
+
+    errors = asyncio.run(main())
+
+    assert all(isinstance(e, HTTPException) and e.status_code == 401 for e in errors)
+    assert directory.lookups == ["inconnu"]
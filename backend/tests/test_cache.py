@@ -0,0 +1,160 @@
+"""Tests of the in-process caches."""
+
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from app.cache import MISSING, SemanticCache, TTLCache
+
+
+class Clock:
+    """Settable replacement of time.monotonic (synchronous tests only)."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    return clock
+
+
+def unit(*values) -> np.ndarray:
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_semantic_cache_returns_the_closest_entry_within_distance():
+    cache = SemanticCache("test", max_size=10, max_distance=0.1)
+    cache.set("p", unit(1, 0, 0), "a")
+    cache.set("p", unit(0, 1, 0), "b")
+
+    assert cache.get("p", unit(1, 0.1, 0)) == "a"
+    assert cache.get("p", unit(0, 0, 1)) is MISSING
+    assert cache.get("other", unit(1, 0, 0)) is MISSING
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_semantic_cache_skips_an_expired_best_match_for_the_next_live_one(clock):
+    cache = SemanticCache("test", max_size=10, max_distance=0.2, ttl_seconds=60)
+    cache.set("p", unit(1, 0, 0), "old")
+    clock.now += 30
+    cache.set("p", unit(1, 0.3, 0), "recent")
+    clock.now += 40
+
+    assert cache.get("p", unit(1, 0, 0)) == "recent"
+    assert cache.expirations == 1
+    assert len(cache) == 1
+
+
+def test_semantic_cache_drops_a_partition_whose_entries_all_expired(clock):
+    cache = SemanticCache("test", max_size=10, max_distance=0.1, ttl_seconds=60)
+    cache.set("p", unit(1, 0, 0), "a")
+    clock.now += 61
+
+    assert cache.get("p", unit(1, 0, 0)) is MISSING
+    assert len(cache) == 0
+    assert cache._partitions == {}
+
+
+def test_semantic_cache_evicts_the_least_recently_used_entry_across_partitions():
+    cache = SemanticCache("test", max_size=2, max_distance=0.1)
+    cache.set("p", unit(1, 0, 0), "a")
+    cache.set("q", unit(0, 1, 0), "b")
+    cache.get("p", unit(1, 0, 0))
+
+    cache.set("p", unit(0, 0, 1), "c")
+
+    assert cache.get("q", unit(0, 1, 0)) is MISSING
+    assert cache.get("p", unit(1, 0, 0)) == "a"
+    assert cache.get("p", unit(0, 0, 1)) == "c"
+    assert cache.evictions == 1
+
+
+def test_semantic_cache_reuses_freed_rows_instead_of_growing():
+    cache = SemanticCache("test", max_size=4, max_distance=0.01)
+    rng = np.random.default_rng(0)
+    for i in range(100):
+        cache.set("p", unit(*rng.normal(size=8)), i)
+
+    partition = cache._partitions["p"]
+    assert len(partition) == 4
+    assert len(partition.matrix) == 4
+    assert cache.evictions == 96
+
+
+def test_semantic_cache_stores_entries_updated_in_place():
+    cache = SemanticCache("test", max_size=100, max_distance=0.01)
+    vectors = [unit(*row) for row in np.random.default_rng(1).normal(size=(20, 8))]
+    for i, vector in enumerate(vectors):
+        cache.set("p", vector, i)
+
+    assert [cache.get("p", vector) for vector in vectors] == list(range(20))
+
+
+def test_semantic_cache_disabled_with_max_size_zero():
+    cache = SemanticCache("test", max_size=0, max_distance=1.0)
+    cache.set("p", unit(1, 0), "a")
+
+    assert cache.get("p", unit(1, 0)) is MISSING
+    assert cache.clear() == 0
+
+
+def test_ttl_cache_entry_expires_after_its_ttl(clock):
+    cache = TTLCache("test", max_size=10, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl_seconds=120)
+    clock.now += 61
+
+    assert cache.get("a") is MISSING
+    assert cache.get("b") == 2
+    assert cache.stats()["expirations"] == 1
+
+
+def test_ttl_cache_keeps_none_values():
+    cache = TTLCache("test", max_size=10)
+    cache.set("unknown", None)
+
+    assert cache.get("unknown") is None
+    assert cache.get("other", default="default") == "default"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_ttl_cache_evicts_the_least_recently_used_entry():
+    cache = TTLCache("test", max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get_many(["a", "b", "c"]) == [1, MISSING, 3]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_async_variants_match_the_sync_ones():
+    cache = TTLCache("test", max_size=10)
+
+    async def main():
+        await cache.aset("a", 1)
+        await cache.aset_many([("b", 2), ("c", 3)])
+        values = await cache.aget_many(["a", "b", "x"])
+        deleted = await cache.adelete("a")
+        return values, deleted, await cache.aget("a"), await cache.aclear()
+
+    assert asyncio.run(main()) == ([1, 2, MISSING], True, MISSING, 2)
+
+
+def test_ttl_cache_disabled_with_max_size_zero():
+    cache = TTLCache("test", max_size=0)
+    cache.set("a", 1)
+    cache.set_many([("b", 2)])
+
+    assert cache.get("a") is MISSING
+    assert len(cache) == 0
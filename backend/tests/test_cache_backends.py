@@ -0,0 +1,125 @@
+"""Tests of the cache backends, the shared one against the fake key-value server."""
+
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from app.cache import TTLCache
+from app.cache_backends import MISSING, RedisBackend, pack_value, unpack_value
+from benchmarks.common import free_port
+from benchmarks.fake_kv import FakeKVServer
+
+redis = pytest.importorskip("redis")
+
+
+@pytest.fixture(scope="module")
+def server():
+    with FakeKVServer() as server:
+        yield server
+
+
+@pytest.fixture
+def backend(server):
+    server.store.data.clear()
+    return RedisBackend("test", redis.Redis.from_url(server.url, socket_timeout=2), "test:")
+
+
+@pytest.fixture
+def unreachable():
+    client = redis.Redis(port=free_port(), socket_timeout=0.2, socket_connect_timeout=0.2)
+    return RedisBackend("test", client, "test:")
+
+
+@pytest.mark.parametrize("value", [
+    "Vous avez 25 jours de congés.",
+    {"username": "jdupont", "employee_type": "CDI"},
+    None,
+    [1, 2.5, "trois"],
+])
+def test_values_survive_serialization(value):
+    assert unpack_value(pack_value(value)) == value
+
+
+def test_arrays_survive_serialization():
+    array = np.arange(12, dtype=np.float32).reshape(3, 4)
+
+    unpacked = unpack_value(pack_value(array))
+
+    assert unpacked.dtype == np.float32
+    np.testing.assert_array_equal(unpacked, array)
+
+
+def test_object_arrays_are_refused():
+    with pytest.raises(ValueError):
+        pack_value(np.array([object()]))
+
+
+def test_shared_backend_stores_values_under_its_prefix(backend, server):
+    backend.set_many([("a", "un"), ("b", np.ones(3, dtype=np.float32))], None)
+
+    assert backend.get("a") == "un"
+    values = backend.get_many(["a", "b", "c"])
+    assert values[0] == "un"
+    np.testing.assert_array_equal(values[1], np.ones(3))
+    assert values[2] is MISSING
+    assert sorted(server.store.data) == [b"test:a", b"test:b"]
+
+
+def test_shared_backend_entries_expire(backend):
+    backend.set("a", "un", ttl_seconds=0.05)
+    assert backend.get("a") == "un"
+    time.sleep(0.1)
+
+    assert backend.get("a") is MISSING
+
+
+def test_shared_backend_delete_and_clear_only_touch_its_keys(backend, server):
+    other = RedisBackend("other", backend.client, "other:")
+    backend.set_many([("a", 1), ("b", 2), ("c", 3)], None)
+    other.set("a", 1, None)
+
+    assert backend.delete("a") is True
+    assert backend.delete("a") is False
+    assert backend.clear() == 2
+    assert sorted(server.store.data) == [b"other:a"]
+
+
+def test_unreachable_store_is_a_miss_and_drops_writes(unreachable):
+    unreachable.set("a", 1, None)
+
+    assert unreachable.get_many(["a", "b"]) == [MISSING, MISSING]
+    assert unreachable.delete("a") is False
+    assert unreachable.clear() == 0
+    assert unreachable.errors == 4
+
+
+def test_unreadable_value_is_a_miss(backend):
+    backend.client.set("test:corrupt", b"?garbage")
+
+    assert backend.get("corrupt") is MISSING
+    assert backend.errors == 1
+
+
+def test_ttl_cache_counts_store_failures_as_misses(unreachable):
+    cache = TTLCache("test", max_size=10, backend=unreachable)
+
+    async def main():
+        await cache.aset("a", 1)
+        return await cache.aget("a")
+
+    assert asyncio.run(main()) is MISSING
+    assert cache.stats()["errors"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_ttl_cache_shares_entries_through_the_store(backend):
+    writer = TTLCache("test", max_size=10, backend=backend)
+    reader = TTLCache("test", max_size=10, backend=RedisBackend("test", backend.client, "test:"))
+
+    async def main():
+        await writer.aset_many([("a", "un"), ("b", None)])
+        return await reader.aget_many(["a", "b", "c"])
+
+    assert asyncio.run(main()) == ["un", None, MISSING]
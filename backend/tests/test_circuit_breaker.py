@@ -0,0 +1,137 @@
+"""Circuit breaker state machine, and how OllamaService records outcomes."""
+
+import asyncio
+
+import pytest
+
+from app.circuit_breaker import (
+    STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN, CircuitBreaker, CircuitOpenError
+)
+
+from .fakes import FakeOllama, make_service
+
+
+def make_breaker(probe, threshold: int = 2, open_seconds: float = 10.0) -> CircuitBreaker:
+    return CircuitBreaker("test", failure_threshold=threshold, open_seconds=open_seconds, probe=probe)
+
+
+def open_breaker(breaker: CircuitBreaker):
+    """Open the breaker and let its open period elapse."""
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker.opened_at -= breaker.open_seconds
+
+
+async def healthy_probe() -> bool:
+    return True
+
+
+async def unhealthy_probe() -> bool:
+    return False
+
+
+def test_opens_after_consecutive_failures_and_rejects_calls():
+    breaker = make_breaker(healthy_probe)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        asyncio.run(breaker.check())
+    assert error.value.retry_after == pytest.approx(10.0, abs=0.5)
+    assert breaker.rejected == 1
+
+
+def test_closes_when_the_probe_passes_after_the_open_period():
+    breaker = make_breaker(healthy_probe)
+    open_breaker(breaker)
+
+    asyncio.run(breaker.check())
+
+    assert breaker.state == STATE_CLOSED
+    assert breaker.consecutive_failures == 0
+
+
+def test_opens_again_when_the_probe_fails():
+    breaker = make_breaker(unhealthy_probe)
+    open_breaker(breaker)
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(breaker.check())
+
+    assert breaker.state == STATE_OPEN
+    assert breaker.retry_after() > 9.0
+
+
+def test_cancelled_probe_leaves_the_breaker_open_not_half_open():
+    async def scenario():
+        probing = asyncio.Event()
+
+        async def hanging_probe() -> bool:
+            probing.set()
+            await asyncio.Event().wait()
+            return True
+
+        breaker = make_breaker(hanging_probe)
+        open_breaker(breaker)
+        task = asyncio.create_task(breaker.check())
+        await probing.wait()
+        assert breaker.state == STATE_HALF_OPEN
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return breaker
+
+    breaker = asyncio.run(scenario())
+
+    assert breaker.state == STATE_OPEN
+    assert breaker.retry_after() > 9.0
+    # The next probe is possible once the new open period has elapsed
+    breaker.probe = healthy_probe
+    breaker.opened_at -= breaker.open_seconds
+    asyncio.run(breaker.check())
+    assert breaker.state == STATE_CLOSED
+
+
+def test_concurrent_callers_are_rejected_while_probing():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow_probe() -> bool:
+            await release.wait()
+            return True
+
+        breaker = make_breaker(slow_probe)
+        open_breaker(breaker)
+        prober = asyncio.create_task(breaker.check())
+        await asyncio.sleep(0)
+        with pytest.raises(CircuitOpenError):
+            await breaker.check()
+        release.set()
+        await prober
+        return breaker
+
+    assert asyncio.run(scenario()).state == STATE_CLOSED
+
+
+def test_disabled_breaker_never_rejects():
+    breaker = CircuitBreaker("test", 1, 10.0, probe=unhealthy_probe, enabled=False)
+    breaker.record_failure()
+
+    asyncio.run(breaker.check())
+
+
+@pytest.mark.parametrize("status_code, failures", [(404, 0), (503, 1)])
+def test_ollama_client_errors_are_not_dependency_failures(status_code, failures):
+    service = make_service(FakeOllama(status_code=status_code))
+    service.breaker.consecutive_failures = 1
+
+    answer = asyncio.run(service.generate_response("Question ?", user="alice"))
+
+    assert answer
+    assert service.breaker.failures == failures
+    # A 4xx is not a success either: the failure streak is left as it was
+    assert service.breaker.consecutive_failures == 1 + failures
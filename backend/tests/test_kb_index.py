@@ -0,0 +1,108 @@
+"""Tests of the knowledge base embedding artifact."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import kb_index
+from app.rag import RAGEngine
+
+from .fakes import FakeEmbedder, write_kb
+
+CSV_HASH = "a" * 64
+
+
+def vectors(n: int = 4, dim: int = 8) -> np.ndarray:
+    return np.arange(n * dim, dtype=np.float32).reshape(n, dim)
+
+
+def test_saved_index_is_mapped_back(tmp_path):
+    kb_index.save_index(tmp_path, vectors(), CSV_HASH, "model", True)
+
+    loaded = kb_index.load_index(tmp_path, CSV_HASH, "model", True)
+
+    assert isinstance(loaded, np.memmap)
+    np.testing.assert_array_equal(loaded, vectors())
+
+
+@pytest.mark.parametrize("csv_hash, model_name, normalize", [
+    ("b" * 64, "model", True),
+    (CSV_HASH, "other-model", True),
+    (CSV_HASH, "model", False),
+])
+def test_stale_index_is_not_loaded(tmp_path, csv_hash, model_name, normalize):
+    kb_index.save_index(tmp_path, vectors(), CSV_HASH, "model", True)
+
+    assert kb_index.load_index(tmp_path, csv_hash, model_name, normalize) is None
+
+
+def test_index_of_an_older_format_is_not_loaded(tmp_path):
+    kb_index.save_index(tmp_path, vectors(), CSV_HASH, "model", True)
+    path = tmp_path / kb_index.METADATA_FILENAME
+    metadata = json.loads(path.read_text())
+    metadata["format_version"] = kb_index.INDEX_FORMAT_VERSION - 1
+    path.write_text(json.dumps(metadata))
+
+    assert kb_index.load_index(tmp_path, CSV_HASH, "model", True) is None
+
+
+def test_embeddings_not_matching_their_metadata_are_not_loaded(tmp_path):
+    path = kb_index.save_index(tmp_path, vectors(), CSV_HASH, "model", True)
+    np.save(path, vectors(n=3))
+
+    assert kb_index.load_index(tmp_path, CSV_HASH, "model", True) is None
+
+
+def test_failed_write_keeps_the_previous_file(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"previous")
+
+    def write(f):
+        f.write(b"partial")
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        kb_index._atomic_write(path, write)
+
+    assert path.read_bytes() == b"previous"
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_new_build_removes_the_previous_files(tmp_path):
+    old = kb_index.save_index(tmp_path, vectors(), CSV_HASH, "model", True)
+    (tmp_path / f"{kb_index.VECTORS_PREFIX}ivf-old-all.npz").write_bytes(b"")
+
+    new = kb_index.save_index(tmp_path, vectors(), "b" * 64, "model", True)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([kb_index.METADATA_FILENAME, new.name])
+    assert not old.exists()
+
+
+def test_sort_by_profile_groups_rows_in_order_of_first_appearance():
+    df = pd.DataFrame({"profil": ["CDI", "CDD", "cdi", "CADRE", "CDD"], "question_id": [1, 2, 3, 4, 5]})
+
+    grouped = kb_index.sort_by_profile(df)
+
+    assert grouped["question_id"].tolist() == [1, 3, 2, 5, 4]
+    assert kb_index.sort_by_profile(grouped) is grouped
+
+
+def test_loaded_engine_searches_the_mapped_embeddings_without_copying(tmp_path, monkeypatch):
+    csv_path = tmp_path / "kb.csv"
+    write_kb(csv_path, [
+        (1, "CDI", "Congés", "Comment poser un congé annuel ?", "Via le portail RH"),
+        (2, "CDD", "Congés", "Ai-je droit aux congés payés ?", "Oui, au prorata"),
+        (3, "CDI", "Paie", "Quand la paie est-elle versée ?", "Le dernier jour du mois"),
+    ])
+    engine = RAGEngine(csv_path=str(csv_path), index_dir=str(tmp_path / "index"), model_name="fake")
+    engine.normalize = True
+    monkeypatch.setattr(engine, "_load_embedder", FakeEmbedder)
+
+    engine.load()
+
+    assert isinstance(engine.embeddings, np.memmap)
+    assert np.shares_memory(engine.index.embeddings, engine.embeddings)
+    assert engine.index.question_ids.tolist() == [1, 3, 2]
+    assert engine.search_knowledge("Ai-je droit aux congés payés ?", "CDD")[0] == "Oui, au prorata"
@@ -0,0 +1,40 @@
+"""
+Streaming path of OllamaService against a fake Ollama (httpx.MockTransport).
+
+Run from the backend directory with the application requirements and pytest:
+    python -m pytest tests
+"""
+
+import asyncio
+
+import pytest
+
+from app.llm_service import ERROR_UNAVAILABLE, OllamaError
+
+from .fakes import TOKENS, FakeOllama, collect, make_service
+
+
+def test_stream_response_yields_tokens_and_takes_an_admission_slot():
+    service = make_service(FakeOllama())
+
+    received = asyncio.run(collect(service.stream_response("Combien de jours de congés ?", user="alice")))
+
+    assert received == TOKENS
+    if service.admission is not None:
+        stats = service.admission.stats()
+        assert stats["admitted"] == 1
+        assert stats["active"] == 0
+
+
+def test_stream_response_fails_fast_while_the_breaker_is_open():
+    ollama = FakeOllama()
+    service = make_service(ollama)
+    service.breaker.enabled = True
+    for _ in range(service.breaker.failure_threshold):
+        service.breaker.record_failure()
+
+    with pytest.raises(OllamaError) as error:
+        asyncio.run(collect(service.stream_response("Combien de jours de congés ?", user="alice")))
+
+    assert str(error.value) == ERROR_UNAVAILABLE
+    assert ollama.payloads == []
@@ -0,0 +1,53 @@
+"""Prometheus exposition, in one process and aggregated over worker processes."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+WORKER = """
+from app.metrics import ROUTE_RAG_HIT, STAGE_ENCODE
+ROUTE_RAG_HIT.inc()
+STAGE_ENCODE.observe(0.01)
+"""
+
+SCRAPE = """
+import sys
+from app.metrics import render_metrics
+sys.stdout.write(render_metrics().decode("utf-8"))
+"""
+
+
+def run(code: str, env: dict) -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return result.stdout
+
+
+def sample(exposition: str, name: str) -> float:
+    for line in exposition.splitlines():
+        if line.startswith(name + " ") or line.startswith(name + "{"):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{name} not exported")
+
+
+def test_multiprocess_scrape_aggregates_the_samples_of_all_workers(tmp_path):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    for _ in range(3):
+        run(WORKER, env)
+
+    exposition = run(SCRAPE, env)
+
+    assert sample(exposition, 'hr_chat_route_total{route="rag_hit"}') == 3.0
+    assert sample(exposition, 'hr_chat_stage_duration_seconds_count{stage="encode"}') == 3.0
+
+
+def test_single_process_scrape_reads_the_default_registry():
+    env = {key: value for key, value in os.environ.items() if key != "PROMETHEUS_MULTIPROC_DIR"}
+
+    exposition = run(WORKER + SCRAPE, env)
+
+    assert sample(exposition, 'hr_chat_route_total{route="rag_hit"}') == 1.0
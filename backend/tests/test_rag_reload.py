@@ -0,0 +1,112 @@
+"""Knowledge base hot reload: reuse of embeddings and reloads across workers."""
+
+import os
+
+import numpy as np
+import pytest
+
+from app import kb_index
+from app.rag import RAGEngine
+
+from .fakes import FakeEmbedder, write_kb
+
+ROWS = [
+    (1, "CDI", "Congés", "Comment poser un congé annuel ?", "Via le portail RH"),
+    (2, "CDD", "Congés", "Ai-je droit aux congés payés ?", "Oui, au prorata"),
+    (3, "CDI", "Paie", "Quand la paie est-elle versée ?", "Le dernier jour du mois"),
+]
+
+
+@pytest.fixture
+def kb(tmp_path):
+    csv_path = tmp_path / "kb.csv"
+    write_kb(csv_path, ROWS)
+    return csv_path
+
+
+def make_engine(kb, monkeypatch, normalize: bool = True) -> RAGEngine:
+    """Engine over kb with a fake embedding model, loaded."""
+    engine = RAGEngine(csv_path=str(kb), index_dir=str(kb.parent / "index"), model_name="fake")
+    engine.normalize = normalize
+    monkeypatch.setattr(engine, "_load_embedder", FakeEmbedder)
+    engine.load()
+    return engine
+
+
+def update_kb(kb, rows):
+    write_kb(kb, rows)
+    # Make sure the modification time differs from the loaded file
+    stat = os.stat(kb)
+    os.utime(kb, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_reload_encodes_only_new_and_edited_questions(kb, monkeypatch):
+    engine = make_engine(kb, monkeypatch)
+    engine.model.encoded.clear()
+    update_kb(kb, [
+        ROWS[0],
+        (2, "CDD", "Congés", "Combien de congés pour un CDD ?", "Au prorata"),
+        (4, "CADRE", "Forfait", "Comment fonctionne le forfait jours ?", "218 jours par an"),
+    ])
+
+    stats = engine.reload()
+
+    assert (stats["added"], stats["edited"], stats["removed"], stats["reencoded"]) == (1, 1, 1, 2)
+    assert engine.model.encoded == ["Combien de congés pour un CDD ?", "Comment fonctionne le forfait jours ?"]
+    assert engine.search_knowledge("Comment fonctionne le forfait jours ?", "CADRE")[0] == "218 jours par an"
+
+
+def test_reload_matches_rows_by_question_id_not_position(kb, monkeypatch):
+    engine = make_engine(kb, monkeypatch)
+    engine.model.encoded.clear()
+    # Same questions, reversed, one of them moved to another profile
+    update_kb(kb, [ROWS[2], (2, "CADRE", "Congés", ROWS[1][3], "Selon votre forfait"), ROWS[0]])
+
+    stats = engine.reload()
+
+    assert (stats["added"], stats["edited"], stats["removed"], stats["reencoded"]) == (0, 0, 0, 0)
+    assert engine.model.encoded == []
+    # Reused embeddings followed their rows: similarity search finds them
+    engine.exact_match_enabled = False
+    assert engine.search_knowledge(ROWS[1][3], "CADRE")[0] == "Selon votre forfait"
+    assert engine.search_knowledge(ROWS[2][3], "CDI")[0] == "Le dernier jour du mois"
+
+
+def test_reload_without_change_does_nothing(kb, monkeypatch):
+    engine = make_engine(kb, monkeypatch)
+
+    assert engine.reload()["changed"] is False
+
+
+def test_other_worker_maps_the_index_written_by_a_reload(kb, monkeypatch):
+    receiving = make_engine(kb, monkeypatch)
+    other = make_engine(kb, monkeypatch)
+    assert not other.index_changed()
+    update_kb(kb, ROWS + [(4, "CADRE", "Forfait", "Comment fonctionne le forfait jours ?", "218 jours")])
+
+    receiving.reload()
+    other.model.encoded.clear()
+
+    assert other.index_changed()
+    stats = other.reload()
+    assert stats["reencoded"] == 0
+    assert other.model.encoded == []
+    assert isinstance(other.embeddings, np.memmap)
+    assert not other.index_changed()
+
+
+@pytest.mark.parametrize("normalize", [True, False])
+def test_reloaded_artifact_matches_its_normalize_flag(kb, monkeypatch, normalize):
+    engine = make_engine(kb, monkeypatch, normalize=normalize)
+    update_kb(kb, ROWS + [(4, "CADRE", "Forfait", "Comment fonctionne le forfait jours ?", "218 jours")])
+
+    engine.reload()
+
+    csv_hash = kb_index.compute_csv_hash(kb)
+    stored = kb_index.load_index(engine.index_dir, csv_hash, engine.model_id, normalize)
+    # Artifact rows are grouped by profile: CDI, CDD, CADRE
+    expected = FakeEmbedder().encode(
+        [ROWS[0][3], ROWS[2][3], ROWS[1][3], "Comment fonctionne le forfait jours ?"],
+        normalize_embeddings=normalize
+    )
+    np.testing.assert_allclose(stored, expected, rtol=1e-6)
@@ -0,0 +1,105 @@
+"""Knowledge base search: exact matches and similarity search."""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.rag import SEARCH_MODE_GLOBAL, SEARCH_MODE_PARTITIONED, RAGEngine
+
+from .fakes import FakeEmbedder, write_kb
+
+ROWS = [
+    (1, "CDI", "Congés", "Comment poser un congé annuel ?", "Via le portail RH"),
+    (2, "CDD", "Congés", "Comment poser un congé annuel ?", "Auprès de votre manager"),
+    (3, "CDI", "Paie", "Quand la paie est-elle versée ?", "Le dernier jour du mois"),
+]
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch) -> RAGEngine:
+    csv_path = tmp_path / "kb.csv"
+    write_kb(csv_path, ROWS)
+    engine = RAGEngine(csv_path=str(csv_path), index_dir=str(tmp_path / "index"), model_name="fake")
+    engine.normalize = True
+    engine.search_mode = SEARCH_MODE_GLOBAL
+    monkeypatch.setattr(engine, "_load_embedder", FakeEmbedder)
+    engine.load()
+    engine.model.encoded.clear()
+    engine.query_cache.clear()
+    return engine
+
+
+@pytest.mark.parametrize("question", [
+    "Quand la paie est-elle versée ?",
+    "quand la PAIE est elle versee",
+    "  Quand la paie est-elle versée ?!  ",
+])
+def test_variants_of_a_kb_question_are_answered_without_encoding(engine, question):
+    answer, domain, similarity, allowed = engine.search_knowledge(question, "CDI")
+
+    assert (answer, domain, similarity, allowed) == ("Le dernier jour du mois", "Paie", 1.0, True)
+    assert engine.model.encoded == []
+    assert engine.exact_match_stats()["hits"] == 1
+
+
+def test_exact_match_uses_the_entry_of_the_user_profile(engine):
+    assert engine.search_knowledge("Comment poser un congé annuel ?", "CDD")[0] == "Auprès de votre manager"
+    assert engine.search_knowledge("Comment poser un congé annuel ?", "cdi")[0] == "Via le portail RH"
+
+
+def test_exact_match_of_another_profile_is_refused_in_global_mode(engine):
+    answer, _, similarity, allowed = engine.search_knowledge("Quand la paie est-elle versée ?", "CDD")
+
+    assert (answer, similarity, allowed) == (None, 1.0, False)
+
+
+def test_partitioned_mode_only_matches_the_user_entries(engine):
+    engine.search_mode = SEARCH_MODE_PARTITIONED
+
+    answer, _, _, allowed = engine.search_knowledge("Quand la paie est-elle versée ?", "CDD")
+
+    assert answer is None and allowed
+    assert engine.model.encoded == ["Quand la paie est-elle versée ?"]
+    assert engine.exact_match_stats()["misses"] == 1
+
+
+def test_other_questions_are_encoded(engine):
+    answer, _, _, _ = engine.search_knowledge("Combien de RTT par an ?", "CDI")
+
+    assert answer is None
+    assert engine.model.encoded == ["Combien de RTT par an ?"]
+
+
+def test_exact_match_can_be_disabled(engine):
+    engine.exact_match_enabled = False
+
+    engine.search_knowledge("Quand la paie est-elle versée ?", "CDI")
+
+    assert engine.model.encoded == ["Quand la paie est-elle versée ?"]
+
+
+def test_async_search_answers_exact_matches_without_encoding(engine):
+    result = asyncio.run(engine.asearch_knowledge("quand la paie est elle versee ?", "CDI"))
+
+    assert result == ("Le dernier jour du mois", "Paie", 1.0, True)
+    assert engine.model.encoded == []
+
+
+@pytest.mark.parametrize("offload_min_rows, offloaded", [(0, True), (1000, False)])
+def test_large_similarity_searches_run_off_the_event_loop(engine, monkeypatch, offload_min_rows, offloaded):
+    threads = []
+    search = engine._similarity_search
+
+    def recording_search(*args):
+        threads.append(threading.current_thread())
+        return search(*args)
+
+    monkeypatch.setattr(engine, "_similarity_search", recording_search)
+    engine.search_offload_min_rows = offload_min_rows
+
+    result = asyncio.run(engine.asearch_knowledge("Combien de RTT par an ?", "CDI"))
+
+    assert result[0] is None
+    assert len(threads) == 1
+    assert (threads[0] is not threading.main_thread()) == offloaded
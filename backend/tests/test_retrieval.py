@@ -0,0 +1,83 @@
+"""Tests of KnowledgeIndex and its vector index backends."""
+
+import numpy as np
+
+from app.retrieval import KnowledgeIndex
+from app.vector_index import BACKEND_EXACT, BACKEND_IVF, ExactIndex, IVFIndex, create_index
+
+
+def random_vectors(n: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    """n random L2-normalized float32 vectors."""
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_index(n: int = 60, **options) -> KnowledgeIndex:
+    """Index of n entries spread over three profiles, interleaved."""
+    profiles = ["cadre", "non-cadre", "stagiaire"]
+    return KnowledgeIndex(
+        embeddings=random_vectors(n),
+        profiles=[profiles[i % 3] for i in range(n)],
+        domains=["conges"] * n,
+        questions=[f"question {i}" for i in range(n)],
+        answers=[f"reponse {i}" for i in range(n)],
+        question_ids=list(range(n)),
+        **options
+    )
+
+
+def test_partitions_are_built_lazily_by_default():
+    index = make_index()
+
+    assert index._partition_indexes == {}
+    index.top_k(index.embeddings[0], profile=0)
+    assert list(index._partition_indexes) == [0]
+
+
+def test_partitioned_index_builds_every_partition_when_compiled():
+    index = make_index(vector_backend=BACKEND_IVF, vector_params={"nlist": 2}, partitioned=True)
+
+    assert sorted(index._partition_indexes) == sorted(index.partitions)
+    assert all(isinstance(p, IVFIndex) for p in index._partition_indexes.values())
+
+
+def test_small_partitions_fall_back_to_exact_search():
+    index = make_index(vector_backend=BACKEND_IVF, ann_min_rows=30, partitioned=True)
+
+    # 60 rows overall, 20 per profile
+    assert isinstance(index._global_index, IVFIndex)
+    assert all(isinstance(p, ExactIndex) for p in index._partition_indexes.values())
+
+
+def test_partition_search_returns_rows_of_the_profile():
+    index = make_index(vector_backend=BACKEND_IVF, vector_params={"nlist": 2, "nprobe": 2})
+    profile = index.profile_code("non-cadre")
+    row = index.partitions[profile][0] + 3
+
+    scores, rows = index.top_k(index.embeddings[row], k=3, profile=profile)
+
+    assert rows[0] == row
+    assert np.isclose(scores[0], 1.0, atol=1e-5)
+    assert all(index.profile_codes[r] == profile for r in rows)
+
+
+def test_ivf_scanning_every_cluster_matches_exact_search():
+    vectors = random_vectors(500)
+    queries = random_vectors(20, seed=1)
+    exact = create_index(BACKEND_EXACT, vectors)
+    ivf = create_index(BACKEND_IVF, vectors, nlist=8, nprobe=8)
+
+    for query in queries:
+        exact_scores, exact_rows = exact.search(query, k=5)
+        ivf_scores, ivf_rows = ivf.search(query, k=5)
+        assert list(ivf_rows) == list(exact_rows)
+        np.testing.assert_allclose(ivf_scores, exact_scores, rtol=1e-5)
+
+
+def test_ivf_index_is_loaded_back_from_its_cache(tmp_path):
+    vectors = random_vectors(200)
+    built = create_index(BACKEND_IVF, vectors, cache_path=tmp_path / "vectors", nlist=4)
+    loaded = create_index(BACKEND_IVF, vectors, cache_path=tmp_path / "vectors", nlist=4)
+
+    np.testing.assert_array_equal(loaded.centroids, built.centroids)
+    np.testing.assert_array_equal(loaded.list_ids, built.list_ids)
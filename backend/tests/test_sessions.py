@@ -0,0 +1,111 @@
+"""Chat sessions: eviction, context handling and sharing of LLM turns."""
+
+import asyncio
+
+from app import sessions as sessions_module
+from app.sessions import ChatSession, SessionStore
+
+from .fakes import TOKENS, FakeOllama, collect, make_service
+
+QUESTION = "Quelle est la politique de télétravail ?"
+
+
+def make_store(max_sessions: int = 10, idle_seconds: float = 60.0) -> SessionStore:
+    return SessionStore("test", max_sessions, idle_seconds, max_turns=5, max_context_tokens=100)
+
+
+def test_store_evicts_least_recently_used_sessions_over_capacity():
+    store = make_store(max_sessions=2)
+    store.get("alice")
+    store.get("bob")
+    store.get("alice")
+    store.get("carol")
+
+    assert store.get("bob", create=False) is None
+    assert store.get("alice", create=False) is not None
+    assert store.evicted_capacity == 1
+
+
+def test_store_drops_idle_sessions(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(sessions_module.time, "monotonic", lambda: now[0])
+    store = make_store(idle_seconds=30.0)
+    store.get("alice")
+    now[0] += 31.0
+
+    assert store.get("alice", create=False) is None
+    assert store.evicted_idle == 1
+
+
+def test_session_drops_a_context_over_the_token_limit():
+    session = ChatSession("alice", max_turns=5, max_context_tokens=3)
+
+    session.add_generation("q1", "a1", [1, 2, 3], 10, continued=False)
+    assert session.context_tokens() == 3
+    session.add_generation("q2", "a2", [1, 2, 3, 4], 10, continued=True)
+    assert session.context is None
+    assert session.generated
+
+
+def test_answers_without_generation_do_not_start_a_conversation():
+    session = ChatSession("alice", max_turns=5, max_context_tokens=100)
+    session.add_answer("Bonjour", "Bonjour ! Comment puis-je vous aider ?")
+
+    assert not session.generated
+    assert len(session.pending) == 0
+
+
+def test_llm_turn_after_small_talk_is_shared_through_the_response_cache():
+    ollama = FakeOllama()
+    service = make_service(ollama)
+    alice = ChatSession("alice", max_turns=5, max_context_tokens=100)
+    bob = ChatSession("bob", max_turns=5, max_context_tokens=100)
+
+    async def scenario():
+        turns = []
+        for session in (alice, bob):
+            session.add_answer("Bonjour", "Bonjour ! Comment puis-je vous aider ?")
+            turns.append(await service.generate_turn(session, QUESTION, profile="CDI", user=session.username))
+        return turns
+
+    first, second = asyncio.run(scenario())
+
+    assert first.answer == second.answer == "".join(TOKENS).strip()
+    if service.response_cache is not None:
+        assert len(ollama.payloads) == 1
+    # Neither prompt carried the greeting as history
+    assert "Échanges précédents" not in ollama.payloads[0]["prompt"]
+
+
+def test_follow_up_continues_from_the_context_of_the_generation():
+    ollama = FakeOllama()
+    service = make_service(ollama)
+    session = ChatSession("alice", max_turns=5, max_context_tokens=100)
+
+    async def scenario():
+        await service.generate_turn(session, QUESTION, profile="CDI", user="alice")
+        return await service.generate_turn(session, "Et pour les cadres ?", profile="CDI", user="alice")
+
+    turn = asyncio.run(scenario())
+
+    assert turn.continued
+    assert ollama.payloads[-1]["context"] == [1, 2, 3, 1]
+
+
+def test_stream_turn_does_not_hold_the_session_lock_while_the_client_reads():
+    service = make_service(FakeOllama())
+    session = ChatSession("alice", max_turns=5, max_context_tokens=100)
+
+    async def scenario():
+        tokens = service.stream_turn(session, QUESTION, profile="CDI", user="alice")
+        first = await tokens.__anext__()
+        locked = session.lock.locked()
+        rest = await collect(tokens)
+        return [first] + rest, locked
+
+    received, locked = asyncio.run(scenario())
+
+    assert received == TOKENS
+    assert not locked
+    assert session.generated
+    assert session.turns[-1].answer == "".join(TOKENS).strip()
@@ -0,0 +1,170 @@
+"""Tests of single-flight call and stream coalescing."""
+
+import asyncio
+
+import pytest
+
+from app.singleflight import SingleFlight
+
+
+class Upstream:
+    """
+    Async iterator yielding its first items right away and the others once
+    released, recording whether it was closed.
+    """
+
+    def __init__(self, items, ready: int = 0):
+        self.items = list(items)
+        self.ready = ready
+        self.release = asyncio.Event()
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.ready > 0:
+            self.ready -= 1
+        else:
+            await self.release.wait()
+        if not self.items:
+            raise StopAsyncIteration
+        return self.items.pop(0)
+
+    async def aclose(self):
+        self.closed = True
+
+
+async def consume(stream) -> list:
+    return [item async for item in stream]
+
+
+def test_concurrent_calls_share_one_call():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def main():
+        group = SingleFlight("test")
+        results = await asyncio.gather(*[group.do("key", fetch) for _ in range(4)])
+        return group, results
+
+    group, results = asyncio.run(main())
+    assert results == ["answer"] * 4
+    assert calls == [1]
+    assert (group.leaders, group.followers) == (1, 3)
+    assert group.stats()["in_flight"] == 0
+
+
+def test_call_error_is_raised_to_every_caller():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        group = SingleFlight("test")
+        return await asyncio.gather(*[group.do("key", fail) for _ in range(2)], return_exceptions=True)
+
+    assert [type(e) for e in asyncio.run(main())] == [ValueError, ValueError]
+
+
+def test_cancelling_the_leader_does_not_cancel_the_shared_call():
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "answer"
+
+    async def main():
+        group = SingleFlight("test")
+        leader = asyncio.create_task(group.do("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(group.do("key", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower, group
+
+    result, group = asyncio.run(main())
+    assert result == "answer"
+    assert group.leaders == 1
+
+
+def test_a_later_call_starts_a_new_call():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return len(calls)
+
+    async def main():
+        group = SingleFlight("test")
+        return [await group.do("key", fetch), await group.do("key", fetch)]
+
+    assert asyncio.run(main()) == [1, 2]
+
+
+def test_late_stream_subscriber_receives_the_items_already_produced():
+    async def main():
+        group = SingleFlight("test")
+        upstream = Upstream(["a", "b", "c"], ready=1)
+        first = asyncio.create_task(consume(group.stream("key", lambda: upstream)))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(consume(group.stream("key", lambda: Upstream([]))))
+        await asyncio.sleep(0)
+        upstream.release.set()
+        return await first, await second, group
+
+    first, second, group = asyncio.run(main())
+    assert first == second == ["a", "b", "c"]
+    assert (group.leaders, group.followers) == (1, 1)
+
+
+def test_stream_keeps_running_while_a_subscriber_remains():
+    async def main():
+        group = SingleFlight("test")
+        upstream = Upstream(["a", "b"])
+        leaving = asyncio.create_task(consume(group.stream("key", lambda: upstream)))
+        staying = asyncio.create_task(consume(group.stream("key", lambda: upstream)))
+        await asyncio.sleep(0)
+        leaving.cancel()
+        await asyncio.gather(leaving, return_exceptions=True)
+        upstream.release.set()
+        return await staying
+
+    assert asyncio.run(main()) == ["a", "b"]
+
+
+def test_stream_is_cancelled_and_closed_when_its_last_subscriber_leaves():
+    async def main():
+        group = SingleFlight("test")
+        upstream = Upstream(["a"])
+        subscriber = asyncio.create_task(consume(group.stream("key", lambda: upstream)))
+        await asyncio.sleep(0.01)
+        subscriber.cancel()
+        await asyncio.gather(subscriber, return_exceptions=True)
+        await asyncio.sleep(0.01)
+        return upstream, group
+
+    upstream, group = asyncio.run(main())
+    assert upstream.closed
+    assert group.stats()["in_flight"] == 0
+
+
+def test_upstream_error_is_raised_to_every_subscriber():
+    class Failing(Upstream):
+        async def __anext__(self):
+            await self.release.wait()
+            raise ConnectionError("upstream down")
+
+    async def main():
+        group = SingleFlight("test")
+        upstream = Failing([])
+        tasks = [asyncio.create_task(consume(group.stream("key", lambda: upstream))) for _ in range(2)]
+        await asyncio.sleep(0)
+        upstream.release.set()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert [type(e) for e in asyncio.run(main())] == [ConnectionError, ConnectionError]
@@ -0,0 +1,77 @@
+"""Tests of small talk recognition."""
+
+import json
+
+import pytest
+
+from app.small_talk import (
+    DEFAULT_TEMPLATES,
+    KIND_CONVERSATIONAL,
+    KIND_GREETING,
+    SmallTalkMatcher,
+)
+
+
+@pytest.fixture
+def matcher():
+    return SmallTalkMatcher(DEFAULT_TEMPLATES, max_extra_words=2)
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("Bonjour !", "greeting"),
+    ("  SALUT  ", "greeting"),
+    ("Merci beaucoup pour votre aide", "thanks"),
+    ("Au revoir", "goodbye"),
+    ("Comment vas-tu ?", "how_are_you"),
+    ("Qui es-tu ?", "identity"),
+])
+def test_small_talk_alone_is_complete(matcher, message, intent):
+    found = matcher.match(message)
+
+    assert found.intent == intent
+    assert found.complete
+
+
+def test_greeting_followed_by_a_question_is_not_complete(matcher):
+    found = matcher.match("Bonjour, comment poser un congé annuel ?")
+
+    assert found.intent == "greeting"
+    assert found.kind == KIND_GREETING
+    assert not found.complete
+
+
+def test_a_few_extra_words_are_allowed(matcher):
+    assert matcher.match("Bonjour à tous !").complete
+    assert not matcher.match("Merci, et pour la mutuelle alors ?").complete
+
+
+def test_first_listed_intent_wins(matcher):
+    found = matcher.match("Bonjour, qui êtes-vous ?")
+
+    assert found.intent == "identity"
+    assert found.complete
+
+
+def test_hr_question_is_not_small_talk(matcher):
+    assert matcher.match("Combien de jours de congés pour un CDD ?") is None
+
+
+def test_templates_are_loaded_from_a_file(tmp_path):
+    path = tmp_path / "templates.json"
+    path.write_text(json.dumps([{
+        "intent": "help",
+        "kind": KIND_CONVERSATIONAL,
+        "patterns": [r"\baide\b"],
+        "response": "Posez votre question RH.",
+    }]), encoding="utf-8")
+
+    matcher = SmallTalkMatcher.from_file(str(path), max_extra_words=0)
+
+    assert matcher.match("aide").response == "Posez votre question RH."
+    assert not matcher.match("aide moi").complete
+    assert matcher.match("Bonjour") is None
+
+
+def test_unknown_kind_is_refused():
+    with pytest.raises(ValueError):
+        SmallTalkMatcher([{"intent": "x", "kind": "other", "patterns": ["x"], "response": ""}])